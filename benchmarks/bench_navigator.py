@@ -0,0 +1,195 @@
+"""
+Times the main operations of the Navigator on synthetic NTFS images and compares them to a stored
+baseline.  Run from the root of the repository:
+
+    python benchmarks/bench_navigator.py
+    python benchmarks/bench_navigator.py --update-baseline
+
+Each benchmark is run several times and the fastest run is kept.  A benchmark regresses when it is
+slower than its baseline by more than its threshold, and the script then exits with status 1.
+Baselines are only comparable on the machine they were recorded on.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Allow importing the package and the image generator
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(os.path.join(parent, "src"))
+sys.path.append(os.path.join(parent, "tests"))
+
+import synthetic_ntfs
+from parse_reparsepoint.Navigator import Navigator
+
+BASELINE = os.path.join(current, "baseline.json")
+
+# The slowdown allowed before a benchmark counts as a regression, unless the baseline sets its own
+DEFAULT_THRESHOLD = 1.25
+
+# The number of entries looked up by the lookup benchmarks
+LOOKUPS = 1000
+
+
+def benchBootParse(images: dict) -> float:
+    """
+    Opens an image, which parses the boot sector and the MFT runlist.
+    """
+
+    start = time.perf_counter()
+    Navigator(images["main"]).close()
+    return time.perf_counter() - start
+
+
+def benchRunlistExpansion(images: dict) -> float:
+    """
+    Opens an image with a heavily fragmented MFT and maps every cluster of the MFT to the image,
+    several times over so the run is long enough to time reliably.
+    """
+
+    start = time.perf_counter()
+    with Navigator(images["fragmented"]) as navigator:
+        runlist = navigator.mft_clusters
+        for _ in range(10):
+            for vcn in range(len(runlist)):
+                runlist.lookup(vcn)
+    return time.perf_counter() - start
+
+
+def benchGetEntry(images: dict) -> float:
+    """
+    Looks up reparse points one at a time, and returns the time of one lookup.
+    """
+
+    with Navigator(images["main"]) as navigator:
+        start = time.perf_counter()
+        for entry in images["lookups"]:
+            navigator.getEntry(entry)
+        return (time.perf_counter() - start) / len(images["lookups"])
+
+
+def benchBatchLookup(images: dict) -> float:
+    """
+    Looks up the same reparse points with one batch.
+    """
+
+    with Navigator(images["main"]) as navigator:
+        start = time.perf_counter()
+        navigator.getEntries(images["lookups"])
+        return time.perf_counter() - start
+
+
+def benchFullSweep(images: dict) -> float:
+    """
+    Sweeps the whole MFT.
+    """
+
+    with Navigator(images["main"]) as navigator:
+        start = time.perf_counter()
+        for _ in navigator.sweepEntries():
+            pass
+        return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "boot_parse": benchBootParse,
+    "runlist_expansion": benchRunlistExpansion,
+    "get_entry": benchGetEntry,
+    "batch_lookup": benchBatchLookup,
+    "full_sweep": benchFullSweep,
+}
+
+
+def buildImages(directory: str, records: int) -> dict:
+    """
+    Builds the images the benchmarks run on.
+
+    :param directory: The directory to build the images in
+    :param records:   The number of MFT records of each image
+
+    :return:          The paths of the images, and the reparse points to look up
+    """
+
+    main, files = synthetic_ntfs.generate(
+        os.path.join(directory, "main.img"), num_records=records, fragments=8, nonresident_fraction=0.1
+    )
+
+    # As many runs as the runlist of a single $MFT record has room for
+    fragmented, _ = synthetic_ntfs.generate(
+        os.path.join(directory, "fragmented.img"),
+        num_records=records,
+        fragments=128,
+        reparse_fraction=0,
+        fill=False,
+    )
+
+    reparse_points = [entry for entry, spec in files.items() if spec["tag"] is not None]
+    lookups = random.Random(0).choices(reparse_points, k=LOOKUPS)
+
+    return {"main": main, "fragmented": fragmented, "lookups": lookups}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Navigator on synthetic images")
+    parser.add_argument("--records", help="MFT records of each image", type=int, default=65536)
+    parser.add_argument("--repeat", help="Runs of each benchmark, the fastest is kept", type=int, default=5)
+    parser.add_argument("--baseline", help="Baseline file", default=BASELINE)
+    parser.add_argument("--update-baseline", help="Store the results as the new baseline", action="store_true")
+    parser.add_argument("--only", help="Benchmarks to run", nargs="+", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if baseline and baseline.get("records") != args.records and not args.update_baseline:
+        print(f"[-] ERROR: The baseline was recorded with --records {baseline.get('records')}")
+        sys.exit(2)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="parse-reparsepoint-bench-") as directory:
+        images = buildImages(directory, args.records)
+
+        for name, benchmark in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = min(benchmark(images) for _ in range(args.repeat))
+
+    regressions = []
+    print(f"{'benchmark':<20}{'seconds':>12}{'baseline':>12}{'ratio':>8}")
+    for name, seconds in results.items():
+        expected = baseline.get("results", {}).get(name)
+        if expected is None:
+            print(f"{name:<20}{seconds:>12.6f}{'-':>12}{'-':>8}")
+            continue
+
+        ratio = seconds / expected
+        threshold = baseline.get("thresholds", {}).get(name, DEFAULT_THRESHOLD)
+        regressed = ratio > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<20}{seconds:>12.6f}{expected:>12.6f}{ratio:>8.2f}{'  REGRESSION' if regressed else ''}")
+
+    if args.update_baseline:
+        baseline["records"] = args.records
+        baseline.setdefault("thresholds", {})
+        baseline["results"] = {**baseline.get("results", {}), **results}
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=4)
+            baseline_file.write("\n")
+        print(f"[+] Baseline written to {args.baseline}")
+        return
+
+    if regressions:
+        print(f"[-] ERROR: Regressed beyond the threshold: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
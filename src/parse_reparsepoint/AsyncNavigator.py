@@ -0,0 +1,195 @@
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, Optional, TypeVar, Union
+
+from .Navigator import Navigator
+from .ReparseRecord import ReparseRecord
+
+T = TypeVar("T")
+
+
+class AsyncNavigator:
+
+    # The number of reads allowed in flight for one image at a time
+    DEFAULT_MAX_IN_FLIGHT = 4
+
+    # The number of threads in the executor shared by every async navigator
+    DEFAULT_MAX_WORKERS = 32
+
+    # The number of records pulled from a sweep by each trip to the executor
+    SWEEP_BATCH_SIZE = 256
+
+    # The executor shared by every async navigator that is not given its own
+    __shared_executor = None
+
+    def __init__(
+        self,
+        navigator: Navigator,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        """
+        Wraps a navigator so it can be used from an event loop.  Reads run on a bounded thread pool
+        that is shared by every async navigator, so one process can serve many images at once.
+
+        Each image gets a fixed number of handles, which caps the reads in flight for it.  The
+        handles are copies of the navigator that open the image again, so reads in flight never
+        share a file position, while the boot sector and runlist information is only parsed once,
+        and the directory paths and cluster cache are shared between them.
+
+        :param navigator:     The navigator to wrap
+        :param max_in_flight: The number of reads allowed in flight for the image at a time
+        :param executor:      The executor to run reads on.  A shared one is used if omitted.
+        """
+
+        self.navigator = navigator
+        self.max_in_flight = max_in_flight
+        self.__executor = executor if executor is not None else self.__getSharedExecutor()
+
+        self.__handles = asyncio.Queue()
+        self.__handles.put_nowait(navigator)
+        for _ in range(max_in_flight - 1):
+            self.__handles.put_nowait(copy.copy(navigator))
+
+
+    @classmethod
+    def __getSharedExecutor(cls) -> ThreadPoolExecutor:
+        """
+        :return: The executor shared by every async navigator, created on first use
+        """
+
+        if AsyncNavigator.__shared_executor is None:
+            AsyncNavigator.__shared_executor = ThreadPoolExecutor(
+                max_workers=cls.DEFAULT_MAX_WORKERS, thread_name_prefix="parse-reparsepoint"
+            )
+
+        return AsyncNavigator.__shared_executor
+
+
+    @classmethod
+    async def open(
+        cls,
+        file_name: str,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        executor: Optional[ThreadPoolExecutor] = None,
+        **navigator_args,
+    ) -> "AsyncNavigator":
+        """
+        Opens an image without blocking the event loop.
+
+        :param file_name:      The name of the file to parse
+        :param max_in_flight:  The number of reads allowed in flight for the image at a time
+        :param executor:       The executor to run reads on.  A shared one is used if omitted.
+        :param navigator_args: Other arguments to create the Navigator with
+
+        :return:               The async navigator
+        """
+
+        loop = asyncio.get_running_loop()
+        run_on = executor if executor is not None else cls.__getSharedExecutor()
+
+        navigator = await loop.run_in_executor(run_on, lambda: Navigator(file_name, **navigator_args))
+        return await loop.run_in_executor(run_on, lambda: cls(navigator, max_in_flight, executor))
+
+
+    async def __aenter__(self) -> "AsyncNavigator":
+        return self
+
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+    async def __run(self, function: Callable[[Navigator], T]) -> T:
+        """
+        Runs a function with a free handle on the executor, waiting for a handle if all of them
+        are in use.
+
+        :param function: The function to run, which is given the handle
+
+        :return:         The result of the function
+        """
+
+        handle = await self.__handles.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.__executor, function, handle)
+        finally:
+            self.__handles.put_nowait(handle)
+
+
+    async def getEntry(self, entry: int) -> ReparseRecord:
+        """
+        Gets an entry like Navigator.getEntry.
+
+        :param entry: The MFT entry number of the entry to get
+
+        :return:      The data obtained from the entry
+        """
+
+        return await self.__run(lambda navigator: navigator.getEntry(entry))
+
+
+    async def getEntries(self, entries: Iterable[int]) -> list[Union[ReparseRecord, Exception]]:
+        """
+        Gets many entries at once like Navigator.getEntries.
+
+        :param entries: The MFT entry numbers of the entries to get
+
+        :return:        The data obtained from each entry, or the exception raised while getting it
+        """
+
+        entries = list(entries)
+        return await self.__run(lambda navigator: navigator.getEntries(entries))
+
+
+    async def sweepEntries(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> AsyncIterator[ReparseRecord]:
+        """
+        Sweeps the MFT like Navigator.sweepEntries.  One handle is held for the whole sweep, and
+        records are pulled from it in batches so the event loop is not woken up for every record.
+
+        :param start: The first entry number to sweep
+        :param stop:  The entry number to stop before.  Defaults to the end of the MFT.
+
+        :return:      The data obtained from each reparse point entry
+        """
+
+        loop = asyncio.get_running_loop()
+        handle = await self.__handles.get()
+
+        try:
+            records = handle.sweepEntries(start, stop)
+
+            def nextBatch() -> list[ReparseRecord]:
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= self.SWEEP_BATCH_SIZE:
+                        break
+
+                return batch
+
+            while True:
+                batch = await loop.run_in_executor(self.__executor, nextBatch)
+                if not batch:
+                    break
+
+                for record in batch:
+                    yield record
+
+        finally:
+            self.__handles.put_nowait(handle)
+
+
+    async def close(self) -> None:
+        """
+        Closes every handle once the reads in flight finish.
+
+        :return: None
+        """
+
+        for _ in range(self.max_in_flight):
+            handle = await self.__handles.get()
+            handle.close()
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class ClusterCache:
+
+    # The default number of bytes of cluster data kept in memory
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        A least recently used cache of cluster data.  One cache can be shared by several navigators,
+        including navigators used from different threads, since clusters are keyed by both the image
+        and the cluster number.
+
+        :param max_bytes: The number of bytes of cluster data to keep before evicting the least recently used
+        """
+
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.__clusters = OrderedDict()
+        self.__lock = threading.Lock()
+
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the cache as an empty cache with the same size bound, so sending a navigator to
+        another process does not send the cached clusters with it.
+
+        :return: The arguments to rebuild the cache with
+        """
+
+        return (ClusterCache, (self.max_bytes,))
+
+
+    def __len__(self) -> int:
+        return len(self.__clusters)
+
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.__lock:
+            return key in self.__clusters
+
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        :param key: The key of the cluster, usually the image path and the cluster number
+
+        :return:    The cached cluster data, or None if the cluster is not cached
+        """
+
+        with self.__lock:
+            data = self.__clusters.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.__clusters.move_to_end(key)
+            return data
+
+
+    def put(self, key: Hashable, data: bytes) -> None:
+        """
+        Caches cluster data, evicting the least recently used clusters if the cache is full.
+
+        :param key:  The key of the cluster, usually the image path and the cluster number
+        :param data: The cluster data
+        """
+
+        with self.__lock:
+            previous = self.__clusters.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+
+            self.__clusters[key] = data
+            self.size += len(data)
+
+            while self.size > self.max_bytes and self.__clusters:
+                _, evicted = self.__clusters.popitem(last=False)
+                self.size -= len(evicted)
+
+
+    def clear(self) -> None:
+        """
+        Removes every cached cluster.
+
+        :return: None
+        """
+
+        with self.__lock:
+            self.__clusters.clear()
+            self.size = 0
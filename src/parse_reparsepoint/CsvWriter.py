@@ -0,0 +1,34 @@
+import csv
+from typing import IO, Any, Sequence
+
+from .RecordWriter import RecordWriter
+
+
+class CsvWriter(RecordWriter):
+
+    def __init__(self, stream: IO, columns: Sequence[str] = RecordWriter.COLUMNS):
+        """
+        Writes records as CSV with a header row.  Fields of a record that are not one of the columns
+        are left out, and columns a record does not have are left empty.
+
+        :param stream:  The text stream to write to, opened with newline=""
+        :param columns: The columns to write
+        """
+
+        super().__init__(stream, columns)
+
+        self.__writer = csv.DictWriter(stream, self.columns, extrasaction="ignore")
+        self.__writer.writeheader()
+
+
+    def writeBatch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Writes the rows as CSV lines.
+
+        :param rows: The rows to write
+        """
+
+        self.__writer.writerows(rows)
+
+
+RecordWriter.registerFormat("csv")(CsvWriter)
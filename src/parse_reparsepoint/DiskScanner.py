@@ -0,0 +1,131 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, Optional
+
+from .Navigator import Navigator, initShardWorker, sweepShard
+from .PartitionTable import PartitionTable
+from .ReparseRecord import ReparseRecord
+from .SegmentedImageSource import SegmentedImageSource
+from .Stats import Stats
+
+
+class DiskScanner:
+
+    def __init__(
+        self,
+        file_name: str,
+        use_mmap: bool = False,
+        resolve_paths: bool = False,
+        stats: Optional[Stats] = None,
+        readahead: Optional[int] = None,
+        tags: Optional[Iterable[int]] = None,
+    ):
+        """
+        Finds every NTFS volume of a disk image from its partition table, and opens a navigator for
+        each one.  Partitions that look like NTFS but whose boot sector cannot be parsed are left out
+        and kept in failed, so one damaged volume does not stop the others from being scanned.
+
+        The navigators are kept open until close() is called, or until the end of a with block.
+
+        :param file_name:     The name of the disk image, or of the first segment of a split image
+        :param use_mmap:      Whether to memory map the image instead of reading it with syscalls
+        :param resolve_paths: Whether to add the full path of each file to the entries returned
+        :param stats:         The stats to count reads, records and stage timings into
+        :param readahead:     The number of bytes to read ahead of small reads of the image, or None
+                              for the default of the image source
+        :param tags:          The reparse tags to report from sweeps, or None for every reparse point
+        """
+
+        with SegmentedImageSource.openImage(file_name, use_mmap, readahead) as source:
+            self.partition_table = PartitionTable(source)
+            partitions = self.partition_table.getNTFSPartitions()
+
+        self.file_name = file_name
+        self.stats = stats
+        self.partitions = []
+        self.navigators = []
+        self.failed = []
+
+        for partition in partitions:
+            try:
+                navigator = Navigator(
+                    file_name,
+                    use_mmap=use_mmap,
+                    resolve_paths=resolve_paths,
+                    stats=stats,
+                    readahead=readahead,
+                    partition_offset=partition["offset"],
+                    tags=tags,
+                )
+            except Exception as ex:
+                self.failed.append((partition, ex))
+                continue
+
+            self.partitions.append(partition)
+            self.navigators.append(navigator)
+
+
+    def __enter__(self) -> "DiskScanner":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Closes the navigator of every partition.
+
+        :return: None
+        """
+
+        for navigator in self.navigators:
+            navigator.close()
+
+
+    def sweepEntries(self, jobs: int = 1) -> Iterator[tuple[dict[str, Any], ReparseRecord]]:
+        """
+        Sweeps the MFT of every NTFS partition.  With more than one job, the MFTs are split into
+        shards that are swept together by one pool of worker processes, so small and large volumes
+        keep every worker busy.  Results are yielded in partition order, then entry order.
+
+        :param jobs: The number of worker processes, or 1 to sweep in this process
+
+        :return:     The partition and the data obtained from each reparse point entry
+        """
+
+        if jobs <= 1:
+            for partition, navigator in zip(self.partitions, self.navigators):
+                for record in navigator.sweepEntries():
+                    yield partition, record
+            return
+
+        shards = []
+        total = sum(navigator.getEntryCount() for navigator in self.navigators)
+        shard_size = max(Navigator.MIN_SHARD_SIZE, -(-total // (jobs * 4)))
+        for index, navigator in enumerate(self.navigators):
+            entry_count = navigator.getEntryCount()
+            shards.extend(
+                (index, start, min(start + shard_size, entry_count)) for start in range(0, entry_count, shard_size)
+            )
+
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=initShardWorker, initargs=(self.navigators,)
+        ) as executor:
+            for (index, _, _), (records, shard_stats) in zip(shards, executor.map(sweepShard, shards)):
+                if shard_stats is not None:
+                    self.stats.merge(shard_stats)
+                for record in records:
+                    yield self.partitions[index], record
+
+
+    def sweepIndexedEntries(self) -> Iterator[tuple[dict[str, Any], ReparseRecord]]:
+        """
+        Finds the reparse points of every NTFS partition with its $Extend\\$Reparse index.
+
+        :return: The partition and the data obtained from each reparse point entry
+        """
+
+        for partition, navigator in zip(self.partitions, self.navigators):
+            for record in navigator.sweepIndexedEntries():
+                yield partition, record
@@ -0,0 +1,150 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class FixupBatch:
+
+    # The signature at the start of every valid MFT entry, and the stride of the fixup values
+    SIGNATURE = b"FILE"
+    SECTOR_SIZE = 512
+
+    def __init__(
+        self, data: bytes, bytes_per_entry: int, use_numpy: bool = True, signature: bytes = SIGNATURE
+    ):
+        """
+        Applies the NTFS fixup to a run of consecutive MFT entries at once and validates each of them.
+        An entry is valid when it has the 'FILE' signature, an update sequence array of the expected
+        size, and the update sequence number at the end of every sector.  Entries that fail any of
+        these checks are torn or corrupt and are flagged as invalid in the mask.
+
+        When NumPy is installed the checks and fixups for all entries are vectorized, otherwise each
+        entry is processed in Python.
+
+        :param data:            The raw entries to fix up.  Trailing bytes that do not form a full entry are ignored.
+        :param bytes_per_entry: The size of each MFT entry
+        :param use_numpy:       Whether to use NumPy if it is installed
+        :param signature:       The signature every entry must start with, e.g. b"INDX" for index blocks
+        """
+
+        self.signature = signature
+        self.bytes_per_entry = bytes_per_entry
+        self.num_entries = len(data) // bytes_per_entry
+
+        self.__buffer = bytearray(data[: self.num_entries * bytes_per_entry])
+        self.__view = memoryview(self.__buffer)
+
+        if use_numpy and np is not None:
+            self.valid = self.__fixupNumpy()
+        else:
+            self.valid = self.__fixupPython()
+
+
+    def __len__(self) -> int:
+        return self.num_entries
+
+
+    @property
+    def buffer(self) -> memoryview:
+        """
+        :return: A view of every fixed up entry of the batch, one after the other
+        """
+
+        return self.__view
+
+
+    def __getitem__(self, index: int) -> memoryview:
+        """
+        :param index: The index of the entry in the batch
+
+        :return:      A view of the fixed up entry
+        """
+
+        if not 0 <= index < self.num_entries:
+            raise IndexError(f"[-] ERROR: Entry {index} is outside of the batch")
+
+        return self.__view[index * self.bytes_per_entry : (index + 1) * self.bytes_per_entry]
+
+
+    def __fixupPython(self) -> list[bool]:
+        """
+        Fixes up and validates each entry one at a time.
+
+        :return: The mask of valid entries
+        """
+
+        sectors = self.bytes_per_entry // self.SECTOR_SIZE
+        buffer = self.__buffer
+
+        valid = []
+        for start in range(0, len(buffer), self.bytes_per_entry):
+            offset_to_fixup = start + int.from_bytes(buffer[start + 4 : start + 6], "little")
+            num_fixup_entries = int.from_bytes(buffer[start + 6 : start + 8], "little")
+
+            if (
+                buffer[start : start + 4] != self.signature
+                or num_fixup_entries != sectors + 1
+                or offset_to_fixup + (num_fixup_entries * 2) > start + self.bytes_per_entry
+            ):
+                valid.append(False)
+                continue
+
+            usn = buffer[offset_to_fixup : offset_to_fixup + 2]
+            is_valid = True
+            for i in range(1, num_fixup_entries):
+                sector_end = start + (self.SECTOR_SIZE * i)
+
+                # A sector that does not end in the update sequence number was not completely written
+                if buffer[sector_end - 2 : sector_end] != usn:
+                    is_valid = False
+                buffer[sector_end - 2 : sector_end] = buffer[
+                    offset_to_fixup + (2 * i) : offset_to_fixup + (2 * i) + 2
+                ]
+
+            valid.append(is_valid)
+
+        return valid
+
+
+    def __fixupNumpy(self) -> list[bool]:
+        """
+        Fixes up and validates every entry at once with NumPy.  Writes go through to the underlying
+        buffer, since the array shares its memory.
+
+        :return: The mask of valid entries
+        """
+
+        sectors = self.bytes_per_entry // self.SECTOR_SIZE
+        entries = np.frombuffer(self.__buffer, dtype=np.uint8).reshape(
+            self.num_entries, self.bytes_per_entry
+        )
+        rows = np.arange(self.num_entries)
+
+        signatures = entries[:, 0:4].copy().view("<u4")[:, 0]
+        offsets_to_fixup = entries[:, 4:6].copy().view("<u2")[:, 0].astype(np.int64)
+        num_fixup_entries = entries[:, 6:8].copy().view("<u2")[:, 0]
+
+        valid = (
+            (signatures == int.from_bytes(self.signature, "little"))
+            & (num_fixup_entries == sectors + 1)
+            & (offsets_to_fixup + (2 * (sectors + 1)) <= self.bytes_per_entry)
+        )
+
+        # Point corrupt entries at a harmless offset so the gathers below stay in bounds.  Their
+        # contents do not matter since they are flagged as invalid.
+        offsets_to_fixup = np.where(valid, offsets_to_fixup, 0)
+
+        usn_low = entries[rows, offsets_to_fixup]
+        usn_high = entries[rows, offsets_to_fixup + 1]
+
+        for i in range(1, sectors + 1):
+            sector_end = self.SECTOR_SIZE * i
+
+            # A sector that does not end in the update sequence number was not completely written
+            valid &= (entries[:, sector_end - 2] == usn_low) & (entries[:, sector_end - 1] == usn_high)
+
+            entries[valid, sector_end - 2] = entries[valid, offsets_to_fixup[valid] + (2 * i)]
+            entries[valid, sector_end - 1] = entries[valid, offsets_to_fixup[valid] + (2 * i) + 1]
+
+        return valid.tolist()
@@ -0,0 +1,61 @@
+from typing import Hashable, Iterable
+
+
+class IOScheduler:
+
+    # Reads are widened to whole blocks of this many bytes, and requests whose blocks touch are
+    # read together.  A read of a few extra KiB costs far less than a seek on a spinning disk or a
+    # round trip to network storage.
+    DEFAULT_BLOCK_SIZE = 64 * 1024
+
+    # The largest read that requests are merged into
+    DEFAULT_MAX_READ_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE, max_read_size: int = DEFAULT_MAX_READ_SIZE):
+        """
+        Plans the reads for a batch of pending read requests, such as the MFT entries of a batch
+        lookup or the clusters of their non-resident attributes.  The requests are ordered by where
+        they are stored in the image, each one is widened to the blocks it touches, and neighbours
+        are merged into large aligned reads.  The image is then read front to back, once.
+
+        The scheduler only plans the reads, so the caller reads through its own counted and
+        partition relative reads.
+
+        :param block_size:    The size of the blocks reads are aligned to, or 1 to only merge
+                              requests that touch
+        :param max_read_size: The largest read requests are merged into.  A single request larger
+                              than this is read on its own.
+        """
+
+        self.block_size = max(1, block_size)
+        self.max_read_size = max_read_size
+
+
+    def plan(
+        self, requests: Iterable[tuple[int, int, Hashable]]
+    ) -> list[tuple[int, int, list[tuple[int, int, Hashable]]]]:
+        """
+        Orders and merges read requests.
+
+        :param requests: The byte offset, the length and a key of each request.  The same range can
+                         be requested more than once.
+
+        :return:         The byte offset and length of each read in image order, with the requests
+                         it holds
+        """
+
+        reads = []
+        for offset, length, key in sorted(requests, key=lambda request: (request[0], request[1])):
+            start = offset - (offset % self.block_size)
+            end = -(-(offset + length) // self.block_size) * self.block_size
+
+            if reads:
+                read_start, read_end, members = reads[-1]
+                if start <= read_end and max(read_end, end) - read_start <= self.max_read_size:
+                    reads[-1] = (read_start, max(read_end, end), members)
+                    members.append((offset, length, key))
+                    continue
+
+            reads.append((start, end, [(offset, length, key)]))
+
+        return [(start, end - start, members) for start, end, members in reads]
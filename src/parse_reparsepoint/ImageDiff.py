@@ -0,0 +1,262 @@
+from typing import Any, Iterator, Optional, Union
+
+from .FixupBatch import FixupBatch
+from .Interpreter import Interpreter
+from .Navigator import Navigator
+from .ReparsePrefilter import ReparsePrefilter
+from .ReparseRecord import ReparseRecord
+
+
+class ImageDiff:
+
+    # The kinds of change reported by compare, named like the ones of Inventory
+    ADDED = "added"
+    REMOVED = "removed"
+    MODIFIED = "modified"
+
+    def __init__(self, old: Navigator, new: Navigator):
+        """
+        Compares two images of the same volume taken at different times, such as snapshots of one
+        machine taken days apart.  Both MFTs are walked in lockstep in chunks of entries, and only
+        the entries whose bytes differ are parsed.  A chunk whose raw bytes are the same in both
+        images is only fixed up and run through the prefilter.
+
+        A reparse point can also change without its entry changing, so these are looked up in both
+        images as well:
+        - the base entries of changed extension entries, which can hold the reparse attribute
+        - the reparse points whose data is stored outside the entry, which can be rewritten in place
+        - every reparse point, when paths are resolved and a directory was renamed or moved
+
+        :param old: The navigator of the earlier image
+        :param new: The navigator of the later image
+        """
+
+        if old.bytes_per_entry != new.bytes_per_entry:
+            raise Exception("[-] ERROR: The images have different MFT entry sizes")
+
+        self.old = old
+        self.new = new
+        self.prefilter = ReparsePrefilter()
+
+        # The number of entries compared, and the number of them whose bytes differed
+        self.entries_compared = 0
+        self.entries_differing = 0
+
+
+    def __getInfo(self, navigator: Navigator, record: Union[ReparseRecord, Exception]) -> Optional[dict[str, Any]]:
+        """
+        :param navigator: The navigator of the image the record was read from
+        :param record:    The parsed entry, or the exception raised while parsing it
+
+        :return:          The information about the reparse point, or None if the entry is not one
+                          with one of the tags of the navigator
+        """
+
+        if isinstance(record, Exception):
+            return None
+
+        if navigator.tags is not None and record.tag not in navigator.tags:
+            return None
+
+        return Interpreter(record, navigator.stats).resolveAllInfo()
+
+
+    def __getReparseInfo(
+        self, navigator: Navigator, batch: FixupBatch, index: int, entry: int
+    ) -> Optional[dict[str, Any]]:
+        """
+        Parses an entry of a fixed up chunk, if it is an in use base entry with a reparse point.
+
+        :param navigator: The navigator of the image the chunk was read from
+        :param batch:     The fixed up chunk
+        :param index:     The index of the entry in the chunk
+        :param entry:     The MFT entry number of the entry
+
+        :return:          The information about the reparse point, or None if the entry is not one
+                          with one of the tags of the navigator
+        """
+
+        # The in use flag is stored at offset 0x16, and the reference to the base entry at offset 0x20
+        entry_bytes = batch[index]
+        if not batch.valid[index] or not entry_bytes[0x16] & 0x01 or any(entry_bytes[0x20:0x26]):
+            return None
+
+        try:
+            record = navigator.parseEntry(entry_bytes, entry)
+        except Exception as ex:
+            record = ex
+
+        return self.__getInfo(navigator, record)
+
+
+    def __compareInfo(
+        self, entry: int, old_info: Optional[dict[str, Any]], new_info: Optional[dict[str, Any]], reused: bool
+    ) -> Iterator[tuple[str, int, dict[str, Any]]]:
+        """
+        Compares the information about the reparse point of an entry in both images.
+
+        :param entry:    The MFT entry number of the entry
+        :param old_info: The information from the earlier image, or None if it is not a reparse point
+        :param new_info: The information from the later image, or None if it is not a reparse point
+        :param reused:   Whether the entry was reused for another file
+
+        :return:         The changes to the reparse point of the entry
+        """
+
+        if old_info is None and new_info is None:
+            return
+
+        if old_info is None:
+            yield self.ADDED, entry, new_info
+        elif new_info is None:
+            yield self.REMOVED, entry, old_info
+        elif reused:
+            yield self.REMOVED, entry, old_info
+            yield self.ADDED, entry, new_info
+        elif old_info != new_info:
+            yield self.MODIFIED, entry, new_info
+
+
+    def __compareEntry(
+        self, old_batch: FixupBatch, new_batch: FixupBatch, index: int, entry: int
+    ) -> Iterator[tuple[str, int, dict[str, Any]]]:
+        """
+        Compares an entry whose bytes differ between the images.
+
+        :param old_batch: The fixed up chunk of the earlier image
+        :param new_batch: The fixed up chunk of the later image
+        :param index:     The index of the entry in the chunks
+        :param entry:     The MFT entry number of the entry
+
+        :return:          The changes to the reparse point of the entry
+        """
+
+        old_info = self.__getReparseInfo(self.old, old_batch, index, entry)
+        new_info = self.__getReparseInfo(self.new, new_batch, index, entry)
+
+        # The sequence number at offset 0x10 changes when the entry is reused for another file
+        reused = old_batch[index][0x10:0x12] != new_batch[index][0x10:0x12]
+        yield from self.__compareInfo(entry, old_info, new_info, reused)
+
+
+    def __compareLookups(self, entries: list[int]) -> Iterator[tuple[str, int, dict[str, Any]]]:
+        """
+        Compares entries whose own bytes are the same in both images, by looking them up in each.
+
+        :param entries: The MFT entry numbers of the entries, in order
+
+        :return:        The changes to the reparse points of the entries
+        """
+
+        old_records = self.old.getEntries(entries)
+        new_records = self.new.getEntries(entries)
+
+        for entry, old_record, new_record in zip(entries, old_records, new_records):
+            old_info = self.__getInfo(self.old, old_record)
+            new_info = self.__getInfo(self.new, new_record)
+            yield from self.__compareInfo(entry, old_info, new_info, False)
+
+
+    def __isMoved(self, batch: FixupBatch, index: int, entry: int) -> bool:
+        """
+        :param batch: A fixed up chunk of the earlier image
+        :param index: The index of a differing entry in the chunk
+        :param entry: The MFT entry number of the entry
+
+        :return:      Whether the entry is a directory whose path differs between the images
+        """
+
+        # Directories have the flag 0x02 at offset 0x16
+        entry_bytes = batch[index]
+        if not batch.valid[index] or entry_bytes[0x16] & 0x03 != 0x03:
+            return False
+
+        return self.old.getDirectoryPath(entry) != self.new.getDirectoryPath(entry)
+
+
+    def compare(self) -> Iterator[tuple[str, int, dict[str, Any]]]:
+        """
+        Finds the reparse points that were added, removed or modified between the images.  An entry
+        that was reused for another file is reported as removed and then added.
+
+        :return: The kind of change, the MFT entry number and the information about each changed
+                 reparse point, in entry order.  Removed reparse points come with their information
+                 from the earlier image, and the others with their information from the later one.
+        """
+
+        bytes_per_entry = self.old.bytes_per_entry
+        chunk_entries = Navigator.SWEEP_CHUNK_SIZE // bytes_per_entry
+        entry_count = max(self.old.getEntryCount(), self.new.getEntryCount())
+        resolve_paths = self.old.resolve_paths or self.new.resolve_paths
+
+        changes = []
+        differing_entries = set()
+
+        # The entries to look up in both images once the MFTs are walked: the base entries of
+        # differing extension entries, the unchanged reparse points with data outside the entry,
+        # and every unchanged reparse point, which is only needed if a directory was moved
+        bases = set()
+        non_resident = []
+        unchanged = []
+        moved = False
+
+        for start in range(0, entry_count, chunk_entries):
+            stop = min(start + chunk_entries, entry_count)
+            self.entries_compared += stop - start
+
+            old_chunk = self.old.readRawEntries(start, stop)
+            new_chunk = self.new.readRawEntries(start, stop)
+
+            # Memory mapped images are read as memoryviews, which compare item by item
+            if isinstance(old_chunk, memoryview):
+                old_chunk = bytes(old_chunk)
+            if isinstance(new_chunk, memoryview):
+                new_chunk = bytes(new_chunk)
+
+            if old_chunk == new_chunk:
+                differing = []
+            else:
+                differing = [
+                    index
+                    for index in range(stop - start)
+                    if old_chunk[index * bytes_per_entry : (index + 1) * bytes_per_entry]
+                    != new_chunk[index * bytes_per_entry : (index + 1) * bytes_per_entry]
+                ]
+            self.entries_differing += len(differing)
+
+            old_batch = FixupBatch(old_chunk, bytes_per_entry)
+            new_batch = FixupBatch(new_chunk, bytes_per_entry) if differing else old_batch
+
+            for index in differing:
+                entry = start + index
+                differing_entries.add(entry)
+                changes.extend(self.__compareEntry(old_batch, new_batch, index, entry))
+
+                # The reference to the base entry is stored at offset 0x20
+                for batch in (old_batch, new_batch):
+                    if batch.valid[index] and any(batch[index][0x20:0x26]):
+                        bases.add(int.from_bytes(batch[index][0x20:0x26], "little"))
+
+                if resolve_paths and not moved:
+                    moved = self.__isMoved(old_batch, index, entry)
+
+            differing_indexes = set(differing)
+            for index in self.prefilter.filter(old_batch):
+                if index in differing_indexes:
+                    continue
+
+                unchanged.append(start + index)
+                attribute = ReparsePrefilter.findAttribute(old_batch[index], (ReparsePrefilter.REPARSE_ATTRIBUTE,))
+
+                # Non-resident attributes have a non-zero byte at offset 0x08.  Entries with an
+                # attribute list are looked up too, as their reparse attribute can be non-resident.
+                if attribute is None or old_batch[index][attribute[1] + 0x08]:
+                    non_resident.append(start + index)
+
+        lookups = set(unchanged) if moved else set(non_resident)
+        lookups |= bases - differing_entries
+        changes.extend(self.__compareLookups(sorted(lookups)))
+
+        # Sorting is stable, so an entry that was reused stays removed and then added
+        changes.sort(key=lambda change: change[1])
+        yield from changes
@@ -0,0 +1,209 @@
+import mmap
+import os
+from typing import Any, Optional, Union
+
+
+class ImageSource:
+
+    # The number of bytes read at once to serve smaller reads.  The operating system already reads
+    # ahead of reads from a single file, so it is off by default.
+    DEFAULT_READAHEAD = 0
+
+    # The access pattern hints given to the operating system by advise, for images read with
+    # syscalls and for memory mapped images.  Hints a platform does not have are skipped.
+    FADVISE_HINTS = {
+        "sequential": getattr(os, "POSIX_FADV_SEQUENTIAL", None),
+        "willneed": getattr(os, "POSIX_FADV_WILLNEED", None),
+    }
+    MADVISE_HINTS = {
+        "sequential": getattr(mmap, "MADV_SEQUENTIAL", None),
+        "willneed": getattr(mmap, "MADV_WILLNEED", None),
+    }
+
+    def __init__(self, path: str, use_mmap: bool = False, readahead: Optional[int] = None):
+        """
+        Reads an image stored in a single file.  This is what a Navigator reads from, and other image
+        formats subclass it, implementing open, close and readRange.  A subclass that is created with
+        other arguments must also implement __reduce__, so navigators using it can be pickled.
+
+        Reads shorter than readahead are served from a buffer of readahead bytes read from the image
+        in one go, so runs of small reads close together cost a single read of the image.  Memory
+        mapped images are never buffered, as reads from them return views of the mapping.
+
+        :param path:      The path of the image
+        :param use_mmap:  Whether to memory map the image instead of reading it with syscalls
+        :param readahead: The number of bytes to read ahead of small reads, or None for the default
+        """
+
+        self.path = path
+        self.use_mmap = use_mmap
+        self.readahead = self.DEFAULT_READAHEAD if readahead is None else readahead
+        self.segments = []
+        self.size = 0
+
+        self.__buffer = b""
+        self.__buffer_offset = 0
+
+        self.__file = None
+        self.__map = None
+        self.__view = None
+
+        self.open()
+
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the source as the arguments it was created with, so a copy in another process opens
+        its own handles to the image.
+
+        :return: The arguments to reopen the source with
+        """
+
+        return (type(self), (self.path, self.use_mmap, self.readahead))
+
+
+    def clone(self) -> "ImageSource":
+        """
+        Opens the image again with its own handles and buffer, so the copy can be read from by
+        another thread at the same time as this source.
+
+        :return: The new source
+        """
+
+        constructor, args = self.__reduce__()
+        return constructor(*args)
+
+
+    def __enter__(self) -> "ImageSource":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def open(self) -> None:
+        """
+        Opens the image, memory maps it if requested, and sets its segments and size.
+
+        :return: None
+        """
+
+        self.segments = [self.path]
+        self.__file = open(self.path, "rb")
+        self.size = os.fstat(self.__file.fileno()).st_size
+
+        if self.use_mmap and self.size:
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__view = memoryview(self.__map)
+
+
+    def close(self) -> None:
+        """
+        Releases the memory map and closes the image.  If views of the mapping are still alive
+        (for example from an unfinished sweep), the mapping is unmapped once they are released.
+
+        :return: None
+        """
+
+        self.__buffer = b""
+
+        if self.__view is not None:
+            self.__view.release()
+            self.__view = None
+        if self.__map is not None:
+            try:
+                self.__map.close()
+            except BufferError:
+                pass
+            self.__map = None
+        if self.__file is not None:
+            self.__file.close()
+
+
+    @classmethod
+    def adviseFile(cls, handle: Any, mapping: Optional[mmap.mmap], offset: int, length: int, hint: str) -> None:
+        """
+        Gives an access pattern hint for a range of one open file, with madvise if it is memory
+        mapped and posix_fadvise otherwise.  Hints are only hints, so failures are ignored.
+
+        :param handle:  The open file
+        :param mapping: The memory map of the file, or None
+        :param offset:  The byte offset of the range in the file
+        :param length:  The length of the range
+        :param hint:    "sequential" or "willneed"
+
+        :return:        None
+        """
+
+        try:
+            if mapping is not None:
+                advice = cls.MADVISE_HINTS[hint]
+                if advice is not None:
+                    # madvise needs a range that starts on a page boundary
+                    start = offset - (offset % mmap.PAGESIZE)
+                    mapping.madvise(advice, start, min(length + offset - start, len(mapping) - start))
+            elif handle is not None:
+                advice = cls.FADVISE_HINTS[hint]
+                if advice is not None:
+                    os.posix_fadvise(handle.fileno(), offset, length, advice)
+        except (OSError, ValueError):
+            pass
+
+
+    def advise(self, offset: int, length: int, hint: str) -> None:
+        """
+        Tells the operating system how a range of the image is about to be read.  "sequential"
+        means the range is read front to back, so the operating system reads further ahead, and
+        "willneed" means the range is read soon, so it starts reading it in the background.
+
+        :param offset: The byte offset of the range
+        :param length: The length of the range
+        :param hint:   "sequential" or "willneed"
+
+        :return:       None
+        """
+
+        if 0 <= offset < self.size and length > 0:
+            self.adviseFile(self.__file, self.__map, offset, min(length, self.size - offset), hint)
+
+
+    def read(self, offset: int, length: int) -> Union[bytes, memoryview]:
+        """
+        Reads bytes from the image, through the readahead buffer if the read is short enough.  Fewer
+        bytes are returned if the read goes past the end of the image.
+
+        :param offset: The byte offset to read from
+        :param length: The number of bytes to read
+
+        :return:       The bytes read
+        """
+
+        if length >= self.readahead or self.use_mmap:
+            return self.readRange(offset, length)
+
+        start = offset - self.__buffer_offset
+        if start < 0 or start + length > len(self.__buffer):
+            self.__buffer = self.readRange(offset, self.readahead)
+            self.__buffer_offset = offset
+            start = 0
+
+        return self.__buffer[start : start + length]
+
+
+    def readRange(self, offset: int, length: int) -> Union[bytes, memoryview]:
+        """
+        Reads bytes from the image without buffering.  When the image is memory mapped, a memoryview
+        of the mapping is returned and no data is copied.
+
+        :param offset: The byte offset to read from
+        :param length: The number of bytes to read
+
+        :return:       The bytes read
+        """
+
+        if self.__view is not None:
+            return self.__view[offset : offset + length]
+
+        self.__file.seek(offset)
+        return self.__file.read(length)
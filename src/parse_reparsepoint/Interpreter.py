@@ -1,5 +1,27 @@
 import re
-import string
+import struct
+import time
+from typing import Any, Callable, Mapping, Optional
+
+from .Stats import Stats
+
+# Every byte that is not a printable, non-whitespace ASCII character.  These are deleted from the
+# reparse data before searching it for text.
+UNPRINTABLE_BYTES = bytes(range(0x21)) + bytes(range(0x7F, 0x100))
+
+# OneDrive Business accounts use GUIDs as CIDs
+GUID_REGEX = re.compile(rb"[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}")
+
+# OneDrive Personal accounts use 16 digit alphanums as CIDs
+PERSONAL_CID_REGEX = re.compile(rb"[0-9A-F]{16}!")
+
+# The substitute name offset and length, the print name offset and length, and the flags that
+# start the data of a symbolic link.  The path buffer follows them.
+SYMLINK_HEADER = struct.Struct("<HHHHI")
+
+# The substitute name offset and length and the print name offset and length that start the data
+# of a mount point.  The path buffer follows them.
+MOUNT_POINT_HEADER = struct.Struct("<HHHH")
 
 
 class Interpreter:
@@ -225,43 +247,111 @@ class Interpreter:
         ),
     }
 
-    def __init__(self, reparse_data: dict[str, bytes]):
+    # Decoders for the data of each kind of reparse point, keyed by the mask applied to the tag and
+    # then by the masked tag.  Each decoder is given the Interpreter and returns a dict of the
+    # information it found.  Use registerDecoder to add to it.
+    DECODERS = {}
+
+    def __init__(self, reparse_data: Mapping[str, Any], stats: Optional[Stats] = None):
         """
         Initializes a new instance of the Interpreter class.
 
         :param reparse_data: The reparse data to interpret
+        :param stats:        The stats to count decode failures and interpretation timings into
         """
 
         self.reparse_data = reparse_data
         self.tag = int.from_bytes(reparse_data["reparse_tag"], "little")
+        self.stats = stats
+
+        self.__printable_data = None
 
 
-    def __pull_regex(self, raw_data: bytes, regex_str: str) -> str:
+    @classmethod
+    def registerDecoder(
+        cls, tag: int, mask: int = 0xFFFFFFFF
+    ) -> Callable[[Callable[["Interpreter"], dict[str, str]]], Callable[["Interpreter"], dict[str, str]]]:
         """
-        Take a raw byte string and return anything that matches the compiled regex string.
-        Ignore all non-printable characters and whitespace.
+        Registers a decoder to be run by resolveAllInfo for every reparse point whose tag matches.
+        Can be used as a decorator:
 
-        :param raw_data: The raw byte string to convert
-        :param regex_str: The regex string to use
+            @Interpreter.registerDecoder(0x80000023)
+            def resolveAppExecLinkInfo(interpreter):
+                return {"App Exec Link": ...}
 
-        :return: A string with the regex match
+        :param tag:  The tag the decoder handles
+        :param mask: The bits of the tag to compare, for tags that carry flags in their other bits
+
+        :return:     A function that registers the decoder it is given and returns it
         """
 
-        # Convert bytes to string and remove all non-printable characters
-        str_raw = raw_data.decode("utf-8", "ignore")
-        all_ascii = "".join(filter(lambda x: x in string.printable, str_raw))
+        def register(decoder: Callable[["Interpreter"], dict[str, str]]) -> Callable[["Interpreter"], dict[str, str]]:
+            cls.DECODERS.setdefault(mask, {}).setdefault(tag & mask, []).append(decoder)
+            return decoder
 
-        # Remove all whitespace
-        str = "".join(all_ascii.split())
+        return register
 
-        # Search for the regex
-        regex = re.compile(regex_str)
-        res = re.search(regex, str)
+
+    @classmethod
+    def findTags(cls, name: str) -> set[int]:
+        """
+        Finds the reparse tags a name refers to.  The name is either a tag value, e.g. 0xA000000C,
+        or a tag identity without its IO_REPARSE_TAG_ prefix, in any case.  The variants of a tag,
+        whose identities add a suffix to it, are included, so "cloud" refers to every CLOUD tag and
+        "mount" to MOUNT_POINT.
+
+        :param name: The name of the tags
+
+        :return:     The tags the name refers to
+        """
+
+        if name.lower().startswith("0x"):
+            return {int(name, 16)}
+
+        identity = "IO_REPARSE_TAG_" + name.upper().removeprefix("IO_REPARSE_TAG_")
+        tags = {
+            tag
+            for tag, (tag_identity, _) in cls.REPARSE_TAG_INFO.items()
+            if tag_identity == identity or tag_identity.startswith(identity + "_")
+        }
+        if not tags:
+            raise Exception(f"[-] ERROR: Unknown reparse tag: {name}")
+
+        return tags
+
+
+    def countDecodeFailure(self) -> None:
+        """
+        Counts a field that could not be decoded, if stats are enabled.  Decoders call this when
+        they fall back to a placeholder value.
+
+        :return: None
+        """
+
+        if self.stats is not None:
+            self.stats.count("decode_failures")
+
+
+    def __pull_regex(self, regex: re.Pattern) -> str:
+        """
+        Take the raw reparse data and return anything that matches the compiled regex.
+        Ignore all non-printable characters and whitespace.
+
+        :param regex: The compiled bytes regex to use
+
+        :return:      A string with the regex match
+        """
+
+        # Remove all non-printable characters and whitespace once, and reuse it for every pattern
+        if self.__printable_data is None:
+            self.__printable_data = bytes(self.reparse_data["reparse_data"]).translate(None, UNPRINTABLE_BYTES)
+
+        res = regex.search(self.__printable_data)
 
         if not res:
             raise ValueError("Regex not found in byte string")
 
-        return res.group()
+        return res.group().decode("ascii")
 
 
     def resolveReparseTag(self) -> str:
@@ -299,33 +389,45 @@ class Interpreter:
 
         # Check to see if it's a OneDrive Buisiness account.  These use GUIDs as CIDs
         try:
-            guid_regex = "[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}"
-
             return {
-                "OneDrive CID": self.__pull_regex(self.reparse_data["reparse_data"], guid_regex),
+                "OneDrive CID": self.__pull_regex(GUID_REGEX),
                 "OneDrive Account Type": "OneDrive Business",
             }
 
-        except:
+        except ValueError:
             pass
 
         # Check to see if it's a OneDrive Personal account.  These use 16 digit alphanum as CIDs.
         try:
-            pers_regex = "[0-9A-F]{16}!"
-
             return {
-                "OneDrive CID": self.__pull_regex(self.reparse_data["reparse_data"], pers_regex)[:-1],
+                "OneDrive CID": self.__pull_regex(PERSONAL_CID_REGEX)[:-1],
                 "OneDrive Account Type": "OneDrive Personal",
             }
 
         # It's a OneDrive account, but doesn't match any known pattern
-        except:
+        except ValueError:
+            self.countDecodeFailure()
             return {
                 "OneDrive CID": "Unable to resolve OneDrive CID",
                 "OneDrive Account Type": "Unknown",
             }
 
 
+    def __pull_name(self, offset: int, length: int, path_buffer_offset: int) -> str:
+        """
+        Decodes a UTF-16 name from the path buffer of a symbolic link or mount point.
+
+        :param offset:             The offset of the name in the path buffer
+        :param length:             The length of the name in bytes
+        :param path_buffer_offset: The offset of the path buffer in the reparse data
+
+        :return:                   The decoded name
+        """
+
+        start = path_buffer_offset + offset
+        return bytes(self.reparse_data["reparse_data"][start : start + length]).decode("utf-16")
+
+
     def resolveSymLinkInfo(self) -> str:
         """
         Takes the reparse data, and returns a human-readable string with the symlink target.
@@ -336,39 +438,43 @@ class Interpreter:
         if self.tag != 0xA000000C:
             raise ValueError("[-] ERROR: Not a symbolic link reparse point")
 
+        try:
+            (
+                substitute_name_offset,
+                substitute_name_length,
+                print_name_offset,
+                print_name_length,
+                flag,
+            ) = SYMLINK_HEADER.unpack_from(self.reparse_data["reparse_data"])
+
+        except struct.error:
+            self.countDecodeFailure()
+            return {
+                "Substitute Name": "Unable to parse subsitiute name",
+                "Print Name": "Unable to parse print name",
+                "Flag Info": "Unable to parse flags",
+            }
+
         try:
             # The substitute name is the computer readable target of the symlink
-            substitute_name_offset = int.from_bytes(self.reparse_data["reparse_data"][0:2], "little") + 12
-            substitute_name_length = int.from_bytes(self.reparse_data["reparse_data"][2:4], "little")
-
-            substitute_name = self.reparse_data["reparse_data"][
-                substitute_name_offset : substitute_name_offset + substitute_name_length
-            ].decode("utf-16")
-        
-        except:
+            substitute_name = self.__pull_name(substitute_name_offset, substitute_name_length, SYMLINK_HEADER.size)
+
+        except UnicodeDecodeError:
+            self.countDecodeFailure()
             substitute_name = "Unable to parse subsitiute name"
 
         try:
             # The print name is the human readable target of the symlink
-            print_name_offset = int.from_bytes(self.reparse_data["reparse_data"][4:6], "little") + 12
-            print_name_length = int.from_bytes(self.reparse_data["reparse_data"][6:8], "little")
-
-            print_name = self.reparse_data["reparse_data"][
-                print_name_offset : print_name_offset + print_name_length
-            ].decode("utf-16")
-
-        except:
-            print_name = "Unable to parse print name"    
+            print_name = self.__pull_name(print_name_offset, print_name_length, SYMLINK_HEADER.size)
 
-        try:
-            # The flag is a boolean value that determines if the substitute name is an absolute or relative path
-            flag = int.from_bytes(self.reparse_data["reparse_data"][8:12], "little")
-            flag_value = "Substitute name is an absolute path name"
-            if flag:
-                flag_value = "Substitute name is a relative path name"
+        except UnicodeDecodeError:
+            self.countDecodeFailure()
+            print_name = "Unable to parse print name"
 
-        except:
-            flag_value = "Unable to parse flags"
+        # The flag is a boolean value that determines if the substitute name is an absolute or relative path
+        flag_value = "Substitute name is an absolute path name"
+        if flag:
+            flag_value = "Substitute name is a relative path name"
 
         return {
             "Substitute Name": substitute_name,
@@ -388,27 +494,34 @@ class Interpreter:
             raise ValueError("[-] ERROR: Not a mount point reparse point")
 
         try:
-            # The substitute name is the computer readable target of the mount point
-            substitute_name_offset = int.from_bytes(self.reparse_data["reparse_data"][0:2], "little") + 8
-            substitute_name_length = int.from_bytes(self.reparse_data["reparse_data"][2:4], "little")
+            (
+                substitute_name_offset,
+                substitute_name_length,
+                print_name_offset,
+                print_name_length,
+            ) = MOUNT_POINT_HEADER.unpack_from(self.reparse_data["reparse_data"])
+
+        except struct.error:
+            self.countDecodeFailure()
+            return {
+                "Substitute Name": "Unable to parse subsitiute name",
+                "Print Name": "Unable to parse print name",
+            }
 
-            substitute_name = self.reparse_data["reparse_data"][
-                substitute_name_offset : substitute_name_offset + substitute_name_length
-            ].decode("utf-16")
+        try:
+            # The substitute name is the computer readable target of the mount point
+            substitute_name = self.__pull_name(substitute_name_offset, substitute_name_length, MOUNT_POINT_HEADER.size)
 
-        except:
+        except UnicodeDecodeError:
+            self.countDecodeFailure()
             substitute_name = "Unable to parse subsitiute name"
 
         try:
             # The print name is the human readable target of the mount point
-            print_name_offset = int.from_bytes(self.reparse_data["reparse_data"][4:6], "little") + 8
-            print_name_length = int.from_bytes(self.reparse_data["reparse_data"][6:8], "little")
-
-            print_name = self.reparse_data["reparse_data"][
-                print_name_offset : print_name_offset + print_name_length
-            ].decode("utf-16")
-        
-        except:
+            print_name = self.__pull_name(print_name_offset, print_name_length, MOUNT_POINT_HEADER.size)
+
+        except UnicodeDecodeError:
+            self.countDecodeFailure()
             print_name = "Unable to parse print name"
 
         return {
@@ -417,6 +530,31 @@ class Interpreter:
         }
 
 
+    def resolveLinkTarget(self) -> tuple[str, bool]:
+        """
+        Decodes the target of a symbolic link or mount point, as the system follows it.
+
+        :return: The substitute name, and whether it is relative to the directory of the link
+        """
+
+        if self.tag == 0xA000000C:
+            header = SYMLINK_HEADER
+        elif self.tag == 0xA0000003:
+            header = MOUNT_POINT_HEADER
+        else:
+            raise ValueError("[-] ERROR: Not a symbolic link or mount point reparse point")
+
+        try:
+            fields = header.unpack_from(self.reparse_data["reparse_data"])
+            substitute_name = self.__pull_name(fields[0], fields[1], header.size)
+        except (struct.error, UnicodeDecodeError):
+            self.countDecodeFailure()
+            raise ValueError("[-] ERROR: Unable to parse the target of the link")
+
+        # Only symbolic links have flags, and flag 1 marks a target relative to the link
+        return substitute_name.rstrip("\x00"), header is SYMLINK_HEADER and bool(fields[4] & 0x01)
+
+
     def resolveAllInfo(self) -> str:
         """
         Takes the reparse data, and returns a human-readable string with all information
@@ -425,16 +563,23 @@ class Interpreter:
         :return: A human-readable string with all processed information.
         """
 
+        if self.stats is not None:
+            start = time.perf_counter()
+
         info = self.resolveReparseTag()
 
         info.update({"File Name": self.reparse_data["file_name"]})
+        if "file_path" in self.reparse_data:
+            info.update({"File Path": self.reparse_data["file_path"]})
+        if "mft_entry" in self.reparse_data:
+            info.update({"MFT Entry": self.reparse_data["mft_entry"]})
 
-        if self.tag & 0xFFFF0FFF == 0x9000001A:
-            info.update(self.resolveOneDriveInfo())
-        if self.tag == 0xA000000C:
-            info.update(self.resolveSymLinkInfo())
-        if self.tag == 0xA0000003:
-            info.update(self.resolveMountPointInfo())
+        for mask, decoders in self.DECODERS.items():
+            for decoder in decoders.get(self.tag & mask, ()):
+                info.update(decoder(self))
+
+        if self.stats is not None:
+            self.stats.time("interpret", time.perf_counter() - start)
 
         return info
 
@@ -447,9 +592,26 @@ class Interpreter:
         :return: None
         """
 
+        self.printInfo(self.resolveAllInfo())
+
+
+    @staticmethod
+    def printInfo(info: dict[str, str]) -> None:
+        """
+        Prints information previously returned by resolveAllInfo as a human-readable string.
+
+        :param info: The information to print
+
+        :return:     None
+        """
+
         buf = 25
 
-        info = self.resolveAllInfo()
         print("Gathered reparse info:")
         for key in info:
             print(f"[+] {key + ':' :<{buf}} {info[key]}")
+
+
+Interpreter.registerDecoder(0x9000001A, 0xFFFF0FFF)(Interpreter.resolveOneDriveInfo)
+Interpreter.registerDecoder(0xA000000C)(Interpreter.resolveSymLinkInfo)
+Interpreter.registerDecoder(0xA0000003)(Interpreter.resolveMountPointInfo)
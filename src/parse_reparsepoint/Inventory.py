@@ -0,0 +1,210 @@
+import json
+import os
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .Interpreter import Interpreter
+from .Navigator import Navigator
+from .ReparseRecord import ReparseRecord
+from .UsnJournal import UsnJournal
+
+
+class Inventory:
+
+    # The version of the inventory file format
+    VERSION = 1
+
+    # The kinds of change reported by update
+    ADDED = "added"
+    REMOVED = "removed"
+    MODIFIED = "modified"
+
+    def __init__(self, path: str):
+        """
+        The reparse points of a volume as of a checkpoint in its change journal, stored in a JSON
+        file.  Each update reports what changed since the previous one and moves the checkpoint on.
+
+        When the volume and its journal still hold every change since the checkpoint, only the
+        entries named by the journal are looked up again.  Otherwise the whole volume is swept, and
+        compared with the stored reparse points the same way.  The file does not need to exist yet;
+        the first update sweeps the volume and reports every reparse point as added.
+
+        :param path: The path of the inventory file
+        """
+
+        self.path = path
+        self.volume_serial = None
+        self.journal_id = None
+        self.next_usn = None
+        self.records = {}
+
+        # How the last update found the changes, and why the journal was not used if it was not
+        self.incremental = False
+        self.reason = None
+
+        if os.path.exists(path):
+            with open(path) as inventory_file:
+                state = json.load(inventory_file)
+
+            if state.get("version") != self.VERSION:
+                raise Exception(f"[-] ERROR: Unsupported inventory version in {path}")
+
+            self.volume_serial = state["volume_serial"]
+            self.journal_id = state["journal_id"]
+            self.next_usn = state["next_usn"]
+            self.records = {int(entry): info for entry, info in state["records"].items()}
+
+
+    def save(self) -> None:
+        """
+        Writes the inventory file.  The file is replaced at once, so an interrupted save leaves the
+        previous inventory in place.
+
+        :return: None
+        """
+
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as inventory_file:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "volume_serial": self.volume_serial,
+                    "journal_id": self.journal_id,
+                    "next_usn": self.next_usn,
+                    "records": {str(entry): info for entry, info in sorted(self.records.items())},
+                },
+                inventory_file,
+            )
+
+        os.replace(temporary_path, self.path)
+
+
+    def __getJournal(self, navigator: Navigator) -> Optional[UsnJournal]:
+        """
+        Opens the change journal of the volume, if it can be used to find the changes since the
+        checkpoint.  Otherwise the reason is stored in reason.
+
+        :param navigator: The navigator of the volume
+
+        :return:          The journal, or None if the volume has to be swept
+        """
+
+        try:
+            journal = UsnJournal(navigator)
+        except Exception:
+            self.reason = "the volume has no change journal"
+            self.journal_id = None
+            self.next_usn = None
+            return None
+
+        if self.next_usn is None:
+            self.reason = "there is no checkpoint yet"
+        elif self.volume_serial != navigator.volume_serial:
+            self.reason = "the checkpoint is from another volume"
+        elif self.journal_id != journal.journal_id:
+            self.reason = "the change journal was recreated since the checkpoint"
+        elif self.next_usn < journal.lowest_valid_usn:
+            self.reason = "the change journal no longer holds every change since the checkpoint"
+        elif self.next_usn > journal.next_usn:
+            self.reason = "the checkpoint is newer than the change journal"
+        else:
+            return journal
+
+        # Start the next checkpoint from this journal, even though it was not used
+        self.journal_id = journal.journal_id
+        self.next_usn = journal.next_usn
+        return None
+
+
+    def __resolve(self, record: ReparseRecord, navigator: Navigator) -> dict[str, Any]:
+        """
+        :param record:    The record of a reparse point
+        :param navigator: The navigator the record was read with
+
+        :return:          The information stored in the inventory for the reparse point
+        """
+
+        return Interpreter(record, navigator.stats).resolveAllInfo()
+
+
+    def __compare(self, entry: int, info: Optional[dict[str, Any]]) -> Optional[tuple[str, int, dict[str, Any]]]:
+        """
+        Compares the current information about an entry with the stored one, and stores it.
+
+        :param entry: The MFT entry number of the entry
+        :param info:  The information about the reparse point, or None if it is not a reparse point
+
+        :return:      The kind of change, the entry number and the information, or None if nothing
+                      changed
+        """
+
+        previous = self.records.get(entry)
+
+        if info is None:
+            if previous is None:
+                return None
+            del self.records[entry]
+            return self.REMOVED, entry, previous
+
+        self.records[entry] = info
+        if previous is None:
+            return self.ADDED, entry, info
+        if previous != info:
+            return self.MODIFIED, entry, info
+
+        return None
+
+
+    def update(
+        self, navigator: Navigator, sweep: Optional[Callable[[], Iterable[ReparseRecord]]] = None
+    ) -> Iterator[tuple[str, int, dict[str, Any]]]:
+        """
+        Finds the reparse points that were added, removed or modified since the checkpoint, and
+        updates the inventory with them.  Call save once the changes have been consumed to store
+        the new checkpoint.
+
+        :param navigator: The navigator of the volume.  It should resolve paths if the inventory
+                          is to hold them.
+        :param sweep:     The function that sweeps the volume when the journal cannot be used.
+                          Defaults to navigator.sweepEntries.
+
+        :return:          The kind of change, the MFT entry number and the information about
+                          each changed reparse point.  Removed reparse points come with their last
+                          stored information.
+        """
+
+        journal = self.__getJournal(navigator)
+        self.volume_serial = navigator.volume_serial
+        self.incremental = journal is not None
+
+        if journal is None:
+            swept = set()
+            for record in (sweep or navigator.sweepEntries)():
+                swept.add(record.mft_entry)
+                change = self.__compare(record.mft_entry, self.__resolve(record, navigator))
+                if change is not None:
+                    yield change
+
+            for entry in sorted(set(self.records) - swept):
+                yield self.__compare(entry, None)
+            return
+
+        self.reason = None
+        entries, directory_renamed = journal.getChangedEntries(self.next_usn)
+
+        # A renamed directory changes the path of every reparse point under it
+        if directory_renamed:
+            entries |= set(self.records)
+
+        for entry in sorted(entries):
+            info = None
+            if navigator.isEntryInUse(entry):
+                try:
+                    info = self.__resolve(navigator.getEntry(entry), navigator)
+                except Exception:
+                    pass
+
+            change = self.__compare(entry, info)
+            if change is not None:
+                yield change
+
+        self.next_usn = journal.next_usn
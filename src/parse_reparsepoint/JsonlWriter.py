@@ -0,0 +1,20 @@
+import json
+from typing import Any
+
+from .RecordWriter import RecordWriter
+
+
+class JsonlWriter(RecordWriter):
+
+    def writeBatch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Writes each row as a JSON object on its own line.  Every key of the row is written, including
+        the ones added by registered decoders.
+
+        :param rows: The rows to write
+        """
+
+        self.stream.write("".join(json.dumps(row) + "\n" for row in rows))
+
+
+RecordWriter.registerFormat("jsonl")(JsonlWriter)
@@ -1,130 +1,379 @@
-from typing import BinaryIO
-from pathlib import Path
+import pickle
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
+
+from .ClusterCache import ClusterCache
+from .FixupBatch import FixupBatch
+from .ImageSource import ImageSource
+from .IOScheduler import IOScheduler
+from .ReparsePrefilter import ReparsePrefilter
+from .ReparseRecord import ReparseRecord
+from .ResultCache import ResultCache
+from .Runlist import Runlist
+from .SegmentedImageSource import SegmentedImageSource
+from .Stats import Stats
 
 
 class Navigator:
 
-    def __init__(self, file_name: str):
+    # The number of bytes read from the MFT at a time when sweeping the whole volume
+    SWEEP_CHUNK_SIZE = 4 * 1024 * 1024
+
+    # The MFT entry of $Bitmap, which marks the clusters of the volume that are allocated
+    BITMAP_ENTRY = 6
+
+    # The MFT entry of the $Extend directory, which holds the $Reparse index
+    EXTEND_ENTRY = 11
+
+    # The MFT entry of the root directory, where path reconstruction stops
+    ROOT_ENTRY = 5
+
+    # The name of the change journal in the $Extend directory
+    USN_JOURNAL_NAME = "$UsnJrnl"
+
+    # The path given to files whose parent directory no longer exists
+    ORPHAN_PATH = "\\$OrphanFiles"
+
+    # The number of directory paths memoized before the memo is cleared, so the memory of a
+    # long-running navigator stays bounded
+    MAX_DIRECTORY_PATHS = 65536
+
+    # The smallest number of entries handed to a worker process when sweeping in parallel
+    MIN_SHARD_SIZE = 16384
+
+    # The number of bytes of scheduled reads the operating system is asked to fetch ahead of the
+    # read being parsed
+    PREFETCH_BYTES = 16 * 1024 * 1024
+
+    # The number of bytes scanned at a time when carving records out of the volume
+    CARVE_CHUNK_SIZE = 16 * 1024 * 1024
+
+    # Records are written in whole sectors, so carved records start on a sector boundary
+    CARVE_ALIGNMENT = 512
+
+    # The smallest number of bytes handed to a worker process when carving in parallel
+    MIN_CARVE_SHARD_SIZE = 256 * 1024 * 1024
+
+    # The signature records are found by when carving
+    CARVE_SIGNATURE = re.compile(re.escape(FixupBatch.SIGNATURE))
+
+    def __init__(
+        self,
+        file_name: Union[str, ImageSource],
+        use_mmap: bool = False,
+        cache: Optional[ResultCache] = None,
+        resolve_paths: bool = False,
+        cluster_cache: Optional[ClusterCache] = None,
+        stats: Optional[Stats] = None,
+        readahead: Optional[int] = None,
+        partition_offset: int = 0,
+        tags: Optional[Iterable[int]] = None,
+        io_block_size: Optional[int] = None,
+    ):
         """
         Reads the boot sector of the NTFS file system and extracts the following information:
         - Bytes per cluster
         - Bytes per entry
-        - The offset of the MFT in bytes
+        - The offset of the MFT in bytes, from the start of the volume
+
+        The volume starts at partition_offset, so a partition of a disk image can be read in place.
+        PartitionTable finds the offsets of the partitions of a disk image.
+
+        The image is kept open until close() is called, or until the end of a with block.
+
+        :param file_name:     The name of the file to parse, the first segment of a split image, or an
+                              open image source, which is then closed with the navigator
+        :param use_mmap:      Whether to memory map the image instead of reading it with syscalls
+        :param cache:         A cache to load the geometry and entry lookups of the image from, and
+                              store them into
+        :param resolve_paths: Whether to add the full path of each file to the entries returned
+        :param cluster_cache: The cache for clusters of non-resident attributes and extension entries.
+                              It can be shared between navigators.  A new one is created if omitted.
+        :param stats:         The stats to count reads, records and stage timings into.  Nothing is
+                              counted if omitted.
+        :param readahead:     The number of bytes to read ahead of small reads of the image, or None
+                              for the default of the image source
+        :param partition_offset: The byte offset of the NTFS volume in the image
+        :param tags:          The reparse tags to report from sweeps.  Every reparse point is reported
+                              if omitted.  Entries looked up by number are not filtered.
+        :param io_block_size: The block size batch lookups align and merge their reads to, or None for
+                              the default of the I/O scheduler
+        """
+
+        if isinstance(file_name, ImageSource):
+            self.source = file_name
+        else:
+            self.source = SegmentedImageSource.openImage(file_name, use_mmap, readahead)
+
+        self.file_name = self.source.path
+        self.use_mmap = self.source.use_mmap
+        self.partition_offset = partition_offset
+        self.cache = cache
+        self.cache_key = None
+        self.resolve_paths = resolve_paths
+        self.cluster_cache = cluster_cache if cluster_cache is not None else ClusterCache()
+        self.stats = stats
+        self.tags = frozenset(tags) if tags is not None else None
+        self.prefilter = ReparsePrefilter(self.tags)
+        self.scheduler = IOScheduler(
+            IOScheduler.DEFAULT_BLOCK_SIZE if io_block_size is None else io_block_size, self.SWEEP_CHUNK_SIZE
+        )
+        self.__directory_paths = {}
+        self.__cluster_bitmap = None
+        self.__position = 0
 
-        :param file_name: The name of the file to parse
+        try:
+            boot = self.__read(0, 512)
+
+            # The volume serial number is stored at offset 0x48 of the boot sector
+            self.volume_serial = self.__unpack(boot[0x48:0x50])
+
+            if cache is not None:
+                self.cache_key = cache.getImageKey(self.source.segments, boot, partition_offset)
+                geometry = cache.getGeometry(self.cache_key)
+
+                if geometry is not None:
+                    self.bytes_per_cluster = geometry["bytes_per_cluster"]
+                    self.bytes_per_entry = geometry["bytes_per_entry"]
+                    self.mft_byte_offset = geometry["mft_byte_offset"]
+                    self.mft_clusters = Runlist.fromExtents(geometry["mft_extents"])
+                    self.__scratch = bytearray(self.bytes_per_entry)
+                    return
+
+            bytes_per_sector = self.__unpack(boot[11:13])
+            sectors_per_cluster = self.__unpack(boot[13:14])
+            mft_starting_cluster = self.__unpack(boot[48:56])
+
+            self.bytes_per_cluster = bytes_per_sector * sectors_per_cluster
+            self.bytes_per_entry = 1024
+            self.mft_byte_offset = (
+                mft_starting_cluster * sectors_per_cluster * bytes_per_sector
+            )
+
+            self.mft_clusters = self.__getMFTClusters()
+        except:
+            self.close()
+            raise ValueError("[-] ERROR: Invalid MFT boot sector")
+
+        if cache is not None:
+            cache.putGeometry(
+                self.cache_key,
+                self.file_name,
+                {
+                    "bytes_per_cluster": self.bytes_per_cluster,
+                    "bytes_per_entry": self.bytes_per_entry,
+                    "mft_byte_offset": self.mft_byte_offset,
+                    "mft_extents": list(self.mft_clusters.extents()),
+                },
+            )
+
+        # Entries are fixed up into this buffer, so looking up an entry does not allocate a new one
+        self.__scratch = bytearray(self.bytes_per_entry)
+
+
+    def __getstate__(self) -> dict:
         """
+        Drops the scratch buffer and the cache connection when the navigator is pickled or copied.
+        The image source reopens the image in the copy, and the boot sector and runlist information
+        is kept, so a copy in another process does not need to parse them again.
 
-        if not Path(file_name).exists():
-            raise OSError(f"[-] ERROR: No such file or directory: {file_name}")
+        :return: The state of the navigator without its handles
+        """
 
-        with open(file_name, "rb") as file:
-            self.file_name = file_name
+        state = self.__dict__.copy()
 
-            file.seek(0)
-            boot = file.read(512)
+        # The cache connection cannot be shared between processes
+        state["cache"] = None
 
-            try:
-                bytes_per_sector = self.__unpack(boot[11:13])
-                sectors_per_cluster = self.__unpack(boot[13:14])
-                mft_starting_cluster = self.__unpack(boot[48:56])
-
-                self.bytes_per_cluster = bytes_per_sector * sectors_per_cluster
-                self.bytes_per_entry = 1024
-                self.mft_byte_offset = (
-                    mft_starting_cluster * sectors_per_cluster * bytes_per_sector
-                )
+        state.pop("_Navigator__scratch", None)
 
-                self.mft_clusters = self.__getMFTClusters(file)
-            except:
-                raise ValueError("[-] ERROR: Invalid MFT boot sector")
+        return state
 
 
-    def __unpack(self, data: bytes, byteorder="little", signed=False) -> int:
+    def __setstate__(self, state: dict) -> None:
         """
-        Unpacks the given bytes into an integer.  This is a wrapper for the int.from_bytes() method
-        with default values for byteorder and signed.
+        Restores a pickled or copied navigator.
 
-        :param data:      The bytes to unpack
-        :param byteorder: The byte order to use
-        :param signed:    Whether or not the bytes are signed
+        :param state: The state returned by __getstate__
+        """
 
-        :return:          The unpacked integer
+        self.__dict__.update(state)
+        self.__scratch = bytearray(self.bytes_per_entry)
+
+
+    def __copy__(self) -> "Navigator":
         """
+        Copies the navigator with its own handles to the image, so the copy can read at the same
+        time as this navigator from another thread.  The directory paths and cluster cache are
+        shared with the copy.
 
-        return int.from_bytes(data, byteorder=byteorder, signed=signed)
+        :return: The copy
+        """
 
+        copied = type(self).__new__(type(self))
+        copied.__setstate__(self.__getstate__())
+        copied.source = self.source.clone()
+
+        return copied
+
+
+    def __enter__(self) -> "Navigator":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Closes the image source.
 
-    def __applyFixup(self, data: bytes) -> bytes:
+        :return: None
         """
-        Applies the NTFS fixup to the given data.
 
-        :param data: The data to apply the fixup to
+        self.source.close()
 
-        :return:     The data with the fixup applied
+
+    def __read(self, offset: int, length: int) -> Union[bytes, memoryview]:
         """
+        Reads bytes from the image source.  When the image is memory mapped, a memoryview of the
+        mapping is returned and no data is copied.
 
-        offset_to_fixup = self.__unpack(data[4:6])
-        num_fixup_entries = self.__unpack(data[6:8])
+        :param offset: The byte offset to read from
+        :param length: The number of bytes to read
 
-        fixup = data[offset_to_fixup : offset_to_fixup + (num_fixup_entries * 2)]
+        :return:       The bytes read
+        """
 
-        data_bytes = bytearray(data)
-        for i in range(1, num_fixup_entries):
-            data_bytes[(512 * i) - 2 : (512 * i)] = fixup[(2 * i) : (2 * i) + 2]
+        if self.stats is not None:
+            return self.__readWithStats(offset, length)
 
-        return bytes(data_bytes)
+        return self.source.read(self.partition_offset + offset, length)
 
 
-    def __parseRunlist(self, runlist: bytes) -> list[int]:
+    def __readWithStats(self, offset: int, length: int) -> Union[bytes, memoryview]:
         """
-        Parses the runlist of a non-resident file and returns a list of the sectors that the file spans.
+        Reads bytes from the image like __read, counting the read and timing it.  A read counts as a
+        seek when it does not start where the previous read ended.
 
-        :param runlist: The runlist to parse
+        :param offset: The byte offset to read from
+        :param length: The number of bytes to read
 
-        :return:        A list of sectors that the file spans
+        :return:       The bytes read
         """
 
-        cluster_list = []
-        offset = 0
+        start = time.perf_counter()
+        data = self.source.read(self.partition_offset + offset, length)
+        self.stats.time("read", time.perf_counter() - start)
+        self.stats.count("read_calls")
+        self.stats.count("bytes_read", len(data))
+        if offset != self.__position:
+            self.stats.count("seeks")
+        self.__position = offset + len(data)
 
-        # Continue processing until 0x00 is reached.  This marks the end of the runlist.
-        while runlist[0] != 0x00:
-            # The number of bytes in the offset and length fields are stored in the first byte. The
-            # upper 4 bits are the number of bytes in the offset and the lower 4 bits are the number
-            # of bytes in the length.
-            offset_length = runlist[0] >> 4
-            length_length = runlist[0] & 0x0F
+        return data
 
-            # The number of conseutive sectors in the run
-            length = self.__unpack(runlist[1 : length_length + 1], signed=True)
 
-            # The offset of the start of the current run from the start of the previous run.  Since
-            # the start of the current run can be before than the start of the previous run, the offset
-            # is signed.
-            offset = offset + self.__unpack(
-                runlist[length_length + 1 : length_length + 1 + offset_length],
-                signed=True,
-            )
+    def __advise(self, offset: int, length: int, hint: str) -> None:
+        """
+        Tells the operating system how a range of the volume is about to be read.
+
+        :param offset: The byte offset of the range
+        :param length: The length of the range
+        :param hint:   "sequential" or "willneed"
+
+        :return:       None
+        """
+
+        self.source.advise(self.partition_offset + offset, length, hint)
+
+
+    def __iterScheduledReads(
+        self, reads: list[tuple[int, int, list]]
+    ) -> Iterator[tuple[int, Union[bytes, memoryview], list]]:
+        """
+        Reads the reads planned by the scheduler in order.  The operating system is asked to fetch up
+        to PREFETCH_BYTES of the following reads in the background while each one is used.
+
+        :param reads: The reads planned by the scheduler
 
-            # Add the sectors in the current run to the list of sectors
-            for i in range(length):
-                cluster_list.append(offset + i)
-            runlist = runlist[length_length + 1 + offset_length :]
+        :return:      The byte offset, the data and the requests of each read
+        """
+
+        advised = 0
+        ahead = 0
+
+        for number, (read_offset, read_length, requests) in enumerate(reads):
+            if advised > number:
+                ahead -= read_length
+            else:
+                advised = number + 1
+
+            while advised < len(reads) and ahead < self.PREFETCH_BYTES:
+                self.__advise(reads[advised][0], reads[advised][1], "willneed")
+                ahead += reads[advised][1]
+                advised += 1
 
-        return cluster_list
+            yield read_offset, self.__read(read_offset, read_length), requests
+
+
+    def __unpack(self, data: bytes, byteorder="little", signed=False) -> int:
+        """
+        Unpacks the given bytes into an integer.  This is a wrapper for the int.from_bytes() method
+        with default values for byteorder and signed.
 
+        :param data:      The bytes to unpack
+        :param byteorder: The byte order to use
+        :param signed:    Whether or not the bytes are signed
 
-    def __getMFTClusters(self, file: BinaryIO) -> list[int]:
+        :return:          The unpacked integer
         """
-        Gets the sectors that the MFT spans
 
-        :param file: The file to read from
+        return int.from_bytes(data, byteorder=byteorder, signed=signed)
+
+
+    def __applyFixup(self, data: bytes, buffer: Optional[bytearray] = None) -> memoryview:
+        """
+        Applies the NTFS fixup to the given data.  The fixed up data is written into the given
+        buffer, which lets callers reuse one buffer for many entries.
+
+        :param data:   The data to apply the fixup to
+        :param buffer: The buffer to write the fixed up data into.  A new one is allocated if omitted.
+
+        :return:       A view of the data with the fixup applied
+        """
+
+        offset_to_fixup = self.__unpack(data[4:6])
+        num_fixup_entries = self.__unpack(data[6:8])
+
+        if buffer is None:
+            buffer = bytearray(len(data))
+        buffer[:] = data
+
+        for i in range(1, num_fixup_entries):
+            fixup_entry = offset_to_fixup + (2 * i)
+            buffer[(512 * i) - 2 : (512 * i)] = data[fixup_entry : fixup_entry + 2]
+
+        # The end of every sector should hold the update sequence number before the fixup
+        if self.stats is not None:
+            usn = data[offset_to_fixup : offset_to_fixup + 2]
+            if any(data[(512 * i) - 2 : (512 * i)] != usn for i in range(1, num_fixup_entries)):
+                self.stats.count("fixup_mismatches")
+
+        return memoryview(buffer)
+
+
+    def __getMFTClusters(self) -> Runlist:
+        """
+        Gets the clusters that the MFT spans
 
-        :return:     A list of sectors that the MFT spans
+        :return: The runlist of the clusters that the MFT spans
         """
 
-        file.seek(self.mft_byte_offset)
-        raw_mft_entry = file.read(self.bytes_per_entry)
+        raw_mft_entry = self.__read(self.mft_byte_offset, self.bytes_per_entry)
 
         # The first 4 bytes of the MFT entry are the signature.  If the signature is not 'FILE', then
         # the MFT is corrupt.
@@ -136,130 +385,1387 @@ class Navigator:
         # The runlist is contained in the data attribute.  The data attribute has an ID of 0x80.
         data_attribute = self.__getRawAttribute(mft_entry, 0x80)
 
-        # The sectors that the MFT spans are stored in the runlist.  The offset to the runlist is stored
+        # The clusters that the MFT spans are stored in the runlist.  The offset to the runlist is stored
         # at offset 0x20 in the MFT entry.
         offset_to_runlist = self.__unpack(data_attribute[0x20:0x22])
-        return self.__parseRunlist(data_attribute[offset_to_runlist:])
+        return Runlist(data_attribute[offset_to_runlist:])
 
 
-    def __getRawMFTEntry(self, file: BinaryIO, entry: int) -> bytes:
+    def __getEntryOffset(self, entry: int) -> int:
         """
-        Gets the raw MFT entry bytes from the file.  Performs no processing.
+        Finds where an MFT entry is stored in the image.
 
-        :param file:  The file to read from
-        :param entry: The entry to read
+        :param entry: The entry to find
 
-        :return:      The raw MFT entry
+        :return:      The byte offset of the entry from the beginning of the file
         """
 
         entries_per_cluster = self.bytes_per_cluster // self.bytes_per_entry
 
         # The cluster number the entry is in, and the byte offset of the entry in the cluster
-        # print(entry, entries_per_cluster)
-        cluster_number = self.mft_clusters[entry // entries_per_cluster]
+        cluster_number = self.mft_clusters.lookup(entry // entries_per_cluster)
         cluster_offset = (entry % entries_per_cluster) * self.bytes_per_entry
 
-        # The byte offset of the MFT entry from the beginning of the file
-        byte_offset = (cluster_number * self.bytes_per_cluster) + cluster_offset
+        if cluster_number == Runlist.SPARSE:
+            raise Exception(f"[-] ERROR: Entry {entry} is in a sparse run of the MFT")
+
+        return (cluster_number * self.bytes_per_cluster) + cluster_offset
+
+
+    def __getRawMFTEntry(self, entry: int) -> memoryview:
+        """
+        Gets the MFT entry bytes from the file and applies the fixup.  The returned view points into
+        the scratch buffer, so it is only valid until the next entry is read.
+
+        :param entry: The entry to read
+
+        :return:      The fixed up MFT entry
+        """
 
-        file.seek(byte_offset)
-        return self.__applyFixup(file.read(self.bytes_per_entry))
+        byte_offset = self.__getEntryOffset(entry)
+        return self.__applyFixup(self.__read(byte_offset, self.bytes_per_entry), self.__scratch)
 
 
-    def __getRawAttribute(self, data: bytes, attribute: int) -> bytes:
+    def __iterRawAttributes(
+        self, data: bytes, attribute: int, name: Optional[str] = None
+    ) -> Iterator[memoryview]:
         """
-        Loops through each attribute in the MFT entry and returns the raw bytes
-        of the attribute with the given ID.
+        Loops through each attribute in the MFT entry and yields the raw bytes
+        of every attribute with the given ID.
 
         :param data:       The MFT entry to parse
-        :param attribute:  The ID of the attribute to get
+        :param attribute:  The ID of the attributes to get
+        :param name:       The name the attributes must have, e.g. "$I30".  Any name matches if omitted.
 
-        :return:           The raw bytes of the attribute
+        :return:           The raw bytes of each attribute
         """
 
         # The offset to the first attribute is stored at offset 0x14 in the MFT entry.
         attr_start = self.__unpack(data[0x14:0x16])
 
-        # Loop through each attribute until either the end of the MFT entry is reached or the
-        # attribute with the given ID is found.
-        while attr_start < self.bytes_per_entry:
-            attr_end = attr_start + self.__unpack(data[attr_start + 4 : attr_start + 8])
+        # Loop through each attribute until the end of the MFT entry is reached
+        while attr_start + 8 <= self.bytes_per_entry:
+            attr_type = self.__unpack(data[attr_start : attr_start + 4])
+            attr_length = self.__unpack(data[attr_start + 4 : attr_start + 8])
 
-            attr = data[attr_start:attr_end]
-
-            if self.__unpack(attr[0:4]) == 0xFFFFFFFF:
+            # The end of the attribute list is marked by 0xFFFFFFFF.  A zero length attribute can only
+            # appear in a corrupt entry, and would otherwise loop forever.
+            if attr_type == 0xFFFFFFFF or attr_length == 0:
                 break
-            if self.__unpack(attr[0:4]) == attribute:
-                return attr
+            if attr_type == attribute and (
+                name is None or self.__getAttributeName(data[attr_start:]) == name
+            ):
+                yield data[attr_start : attr_start + attr_length]
+
+            attr_start += attr_length
 
-            attr_start = attr_end
+
+    def __getRawAttribute(self, data: bytes, attribute: int, name: Optional[str] = None) -> bytes:
+        """
+        Returns the raw bytes of the first attribute with the given ID in the MFT entry.
+
+        :param data:       The MFT entry to parse
+        :param attribute:  The ID of the attribute to get
+        :param name:       The name the attribute must have, e.g. "$I30".  Any name matches if omitted.
+
+        :return:           The raw bytes of the attribute
+        """
+
+        for attr in self.__iterRawAttributes(data, attribute, name):
+            return attr
 
         raise Exception(f"[-] ERROR: Attribute: 0x{attribute:02x} not found")
 
 
-    def __parseFileNameAttribute(self, data: bytes) -> str:
+    def __getAttributeName(self, data: bytes) -> str:
+        """
+        Retrieves the name of an attribute.  Unnamed attributes have an empty name.
+
+        :param data: The attribute to get the name of
+
+        :return:     The attribute name
+        """
+
+        # The length of the name in characters is stored at offset 0x09, and the offset to the
+        # name at offset 0x0A.
+        name_length = data[0x09]
+        name_offset = self.__unpack(data[0x0A:0x0C])
+
+        return bytes(data[name_offset : name_offset + (name_length * 2)]).decode("utf-16-le")
+
+
+    def __readAttributeData(self, data: bytes, cached: bool = True) -> bytes:
         """
-        Retrieves the file name from the file name attribute.
+        Reads the content of an attribute.  Resident content is taken from the attribute itself,
+        and non-resident content is read from the clusters in the attribute's runlist.
+
+        :param data:   The attribute to read the content of
+        :param cached: Whether to read the clusters through the cluster cache.  Large attributes
+                       that are read once are read directly, so they do not evict the cache.
+
+        :return:       The content of the attribute
+        """
+
+        # The non-resident flag is stored at offset 0x08
+        if not data[0x08]:
+            content_offset = self.__unpack(data[0x14:0x16])
+            content_length = self.__unpack(data[0x10:0x14])
+            return bytes(data[content_offset : content_offset + content_length])
+
+        # The offset to the runlist is stored at offset 0x20, and the real size of the content at
+        # offset 0x30
+        offset_to_runlist = self.__unpack(data[0x20:0x22])
+        real_size = self.__unpack(data[0x30:0x38])
+        runlist = Runlist(data[offset_to_runlist:])
+
+        content = bytearray()
+        for _, lcn, length in runlist.extents():
+            if len(content) >= real_size:
+                break
+
+            # Only read as many clusters as hold the real content
+            length = min(length, -(-(real_size - len(content)) // self.bytes_per_cluster))
+
+            # Sparse runs have no clusters on disk, and read back as zeros
+            if lcn == Runlist.SPARSE:
+                content += bytes(length * self.bytes_per_cluster)
+            elif cached:
+                content += self.__readClusters(lcn, length)
+            else:
+                content += self.__read(lcn * self.bytes_per_cluster, length * self.bytes_per_cluster)
+
+        return bytes(content[:real_size])
+
+
+    def __readClusters(self, lcn: int, count: int) -> bytes:
+        """
+        Reads consecutive clusters through the cluster cache.  Clusters that are not cached are read
+        with as few reads as possible and added to the cache.
+
+        :param lcn:   The logical cluster number of the first cluster
+        :param count: The number of clusters to read
+
+        :return:      The cluster data
+        """
+
+        clusters = [self.cluster_cache.get((self.file_name, self.partition_offset, lcn + i)) for i in range(count)]
+
+        i = 0
+        while i < count:
+            if clusters[i] is not None:
+                i += 1
+                continue
+
+            # Read the whole run of missing clusters at once
+            missing_end = i
+            while missing_end < count and clusters[missing_end] is None:
+                missing_end += 1
+
+            data = bytes(
+                self.__read((lcn + i) * self.bytes_per_cluster, (missing_end - i) * self.bytes_per_cluster)
+            )
+            for j in range(i, missing_end):
+                offset = (j - i) * self.bytes_per_cluster
+                clusters[j] = data[offset : offset + self.bytes_per_cluster]
+                self.cluster_cache.put((self.file_name, self.partition_offset, lcn + j), clusters[j])
+
+            i = missing_end
+
+        return b"".join(clusters)
+
+
+    def __prefetchClusters(self, batch: FixupBatch) -> None:
+        """
+        Reads the clusters of the non-resident reparse attributes of a batch of entries into the
+        cluster cache, with the reads ordered and merged by the scheduler, so parsing the entries
+        afterwards does not seek to each one in turn.
+
+        :param batch: The fixed up entries
+
+        :return:      None
+        """
+
+        requests = []
+        for index in ReparsePrefilter().filter(batch):
+            entry_bytes = batch[index]
+
+            try:
+                # Find the reparse attribute by the attribute headers alone
+                attribute = ReparsePrefilter.findAttribute(entry_bytes, (ReparsePrefilter.REPARSE_ATTRIBUTE,))
+                if attribute is None:
+                    continue
+
+                _, attr_start, attr_length = attribute
+                if not entry_bytes[attr_start + 0x08]:
+                    continue
+
+                # The offset to the runlist is stored at offset 0x20, and the real size of the
+                # content at offset 0x30
+                attribute = entry_bytes[attr_start : attr_start + attr_length]
+                runlist = Runlist(attribute[self.__unpack(attribute[0x20:0x22]) :])
+                remaining = -(-self.__unpack(attribute[0x30:0x38]) // self.bytes_per_cluster)
+            except Exception:
+                continue
+
+            for _, lcn, length in runlist.extents():
+                if remaining <= 0:
+                    break
+                length = min(length, remaining)
+                remaining -= length
+
+                if lcn == Runlist.SPARSE:
+                    continue
+
+                for cluster in range(lcn, lcn + length):
+                    if (self.file_name, self.partition_offset, cluster) not in self.cluster_cache:
+                        requests.append((cluster * self.bytes_per_cluster, self.bytes_per_cluster, cluster))
+
+        for read_offset, data, clusters in self.__iterScheduledReads(self.scheduler.plan(requests)):
+            data = bytes(data)
+            for byte_offset, length, cluster in clusters:
+                cluster_data = data[byte_offset - read_offset : byte_offset - read_offset + length]
+                if len(cluster_data) == length:
+                    self.cluster_cache.put((self.file_name, self.partition_offset, cluster), cluster_data)
+
+
+    def __getExtensionEntry(self, entry: int) -> memoryview:
+        """
+        Gets an MFT entry through the cluster cache and applies the fixup into a new buffer.  This is
+        used for the extension entries named in an attribute list, which are often shared by many
+        lookups, and must not overwrite the scratch buffer holding the base entry.
+
+        :param entry: The entry to read
+
+        :return:      The fixed up MFT entry
+        """
+
+        byte_offset = self.__getEntryOffset(entry)
+        lcn = byte_offset // self.bytes_per_cluster
+        cluster_offset = byte_offset % self.bytes_per_cluster
+
+        raw_entry = self.__readClusters(lcn, 1)[cluster_offset : cluster_offset + self.bytes_per_entry]
+        if raw_entry[0:4] != b"FILE":
+            raise Exception(f"[-] ERROR: Extension entry {entry} is corrupt - signature is not 'FILE'.")
+
+        return self.__applyFixup(raw_entry)
+
+
+    def __iterAllAttributes(self, entry_bytes: bytes, attribute: int) -> Iterator[memoryview]:
+        """
+        Yields every attribute with the given ID that belongs to an MFT entry.  Attributes in the
+        entry itself come first.  Entries with too many attributes to fit in one record keep an
+        $ATTRIBUTE_LIST naming the extension entries that hold the rest, and those are followed too.
+
+        :param entry_bytes: The base MFT entry
+        :param attribute:   The ID of the attributes to get
+
+        :return:            The raw bytes of each attribute
+        """
+
+        yield from self.__iterRawAttributes(entry_bytes, attribute)
+
+        attribute_list = next(self.__iterRawAttributes(entry_bytes, 0x20), None)
+        if attribute_list is None:
+            return
+        attribute_list = self.__readAttributeData(attribute_list)
+
+        # The entry number of the base entry is stored at offset 0x2C
+        base_entry = self.__unpack(entry_bytes[0x2C:0x30])
+        visited = {base_entry}
+
+        list_offset = 0
+        while list_offset + 0x1A <= len(attribute_list):
+            # Each attribute list entry stores the attribute type at offset 0x00, its own length at
+            # offset 0x04, and the reference of the entry holding the attribute at offset 0x10
+            list_type = self.__unpack(attribute_list[list_offset : list_offset + 4])
+            list_length = self.__unpack(attribute_list[list_offset + 4 : list_offset + 6])
+            extension_entry = self.__unpack(attribute_list[list_offset + 0x10 : list_offset + 0x16])
+
+            if list_length == 0:
+                break
+            list_offset += list_length
+
+            if list_type != attribute or extension_entry in visited:
+                continue
+            visited.add(extension_entry)
+
+            yield from self.__iterRawAttributes(self.__getExtensionEntry(extension_entry), attribute)
+
+
+    def __iterIndexEntries(self, entry_bytes: bytes, index_name: str) -> Iterator[memoryview]:
+        """
+        Yields the raw entries of an index, from both the $INDEX_ROOT attribute and every in use
+        block of the $INDEX_ALLOCATION attribute.  The entries are yielded in storage order rather
+        than in B+ tree order.
+
+        :param entry_bytes: The MFT entry that holds the index
+        :param index_name:  The name of the index, e.g. "$I30" or "$R"
+
+        :return:            The raw index entries, without the terminating entry of each node
+        """
+
+        # The index root holds the size of the index blocks at offset 0x08 of its content, and the
+        # index node header at offset 0x10.
+        index_root = memoryview(
+            self.__readAttributeData(self.__getRawAttribute(entry_bytes, 0x90, index_name))
+        )
+        index_block_size = self.__unpack(index_root[0x08:0x0C])
+        yield from self.__iterIndexNode(index_root, 0x10)
+
+        try:
+            index_allocation = self.__getRawAttribute(entry_bytes, 0xA0, index_name)
+        except Exception:
+            # Small indexes fit entirely in the index root
+            return
+
+        allocation = self.__readAttributeData(index_allocation)
+        bitmap = self.__readAttributeData(self.__getRawAttribute(entry_bytes, 0xB0, index_name))
+        blocks = FixupBatch(allocation, index_block_size, signature=b"INDX")
+
+        for i in range(len(blocks)):
+            # Blocks that are not marked in the bitmap are free and may hold stale data
+            if i // 8 >= len(bitmap) or not bitmap[i // 8] & (1 << (i % 8)):
+                continue
+            if not blocks.valid[i]:
+                raise Exception(f"[-] ERROR: Index block {i} of {index_name} is corrupt")
+
+            # The index node header of an index block is stored at offset 0x18
+            yield from self.__iterIndexNode(blocks[i], 0x18)
+
+
+    def __iterIndexNode(self, data: bytes, header_offset: int) -> Iterator[memoryview]:
+        """
+        Yields the raw entries of a single index node.
+
+        :param data:          The index root content or index block holding the node
+        :param header_offset: The offset of the index node header in the data
+
+        :return:              The raw index entries, without the terminating entry
+        """
+
+        # The offset to the first entry is relative to the index node header, and the size of the
+        # node is stored right after it
+        entry_start = header_offset + self.__unpack(data[header_offset : header_offset + 4])
+        node_end = header_offset + self.__unpack(data[header_offset + 4 : header_offset + 8])
+
+        while entry_start + 16 <= min(node_end, len(data)):
+            # Every index entry stores its length at offset 0x08 and its flags at offset 0x0C.  The
+            # last entry of a node has flag 0x02 set and holds no key.
+            entry_length = self.__unpack(data[entry_start + 0x08 : entry_start + 0x0A])
+            entry_flags = self.__unpack(data[entry_start + 0x0C : entry_start + 0x10])
+
+            if entry_flags & 0x02 or entry_length == 0:
+                break
+
+            yield data[entry_start : entry_start + entry_length]
+            entry_start += entry_length
+
+
+    def __findInDirectory(self, directory: int, file_name: str) -> int:
+        """
+        Looks up a file by name in the $I30 index of a directory.
+
+        :param directory: The MFT entry number of the directory
+        :param file_name: The name of the file to look up
+
+        :return:          The MFT entry number of the file
+        """
+
+        files = self.listDirectory(directory)
+        if file_name not in files:
+            raise Exception(f"[-] ERROR: {file_name} not found in directory {directory}")
+
+        return files[file_name]
+
+
+    def listDirectory(self, directory: int) -> dict[str, int]:
+        """
+        Reads the names of the files in a directory from its $I30 index.  A file with a short DOS
+        name is listed under both of its names.
+
+        :param directory: The MFT entry number of the directory
+
+        :return:          The MFT entry number of each file, by name
+        """
+
+        directory_bytes = bytes(self.__getRawMFTEntry(directory))
+
+        files = {}
+        for index_entry in self.__iterIndexEntries(directory_bytes, "$I30"):
+            # The key of a directory index entry is a $FILE_NAME attribute, stored at offset 0x10.
+            # The lower 6 bytes of the file reference are the MFT entry number.
+            key = index_entry[0x10:]
+            files[bytes(key[66 : 66 + (key[64] * 2)]).decode("utf-16-le")] = self.__unpack(index_entry[0:6])
+
+        return files
+
+
+    def getReparseIndex(self) -> list[tuple[int, int]]:
+        """
+        Reads the reparse tag and MFT entry number of every reparse point from the $R index of
+        $Extend\\$Reparse, which NTFS keeps up to date whenever a reparse point is set or removed.
+
+        :return: Tuples of the reparse tag and MFT entry number of each reparse point, by entry number
+        """
+
+        reparse_entry = self.__findInDirectory(self.EXTEND_ENTRY, "$Reparse")
+        reparse_bytes = bytes(self.__getRawMFTEntry(reparse_entry))
+
+        reparse_points = []
+        for index_entry in self.__iterIndexEntries(reparse_bytes, "$R"):
+            # The key of a $R index entry is the reparse tag followed by the file reference
+            reparse_points.append(
+                (self.__unpack(index_entry[0x10:0x14]), self.__unpack(index_entry[0x14:0x1A]))
+            )
+
+        return sorted(reparse_points, key=lambda reparse_point: reparse_point[1])
+
+
+    def __getUsnJournalEntry(self) -> bytes:
+        """
+        :return: The MFT entry of $Extend\\$UsnJrnl
+        """
+
+        return bytes(self.__getRawMFTEntry(self.__findInDirectory(self.EXTEND_ENTRY, self.USN_JOURNAL_NAME)))
+
+
+    def getUsnJournalInfo(self) -> dict[str, int]:
+        """
+        Reads the header of the change journal from the $Max stream of $Extend\\$UsnJrnl, and the
+        size of its $J stream, which is the USN the next change will be written at.
+
+        :return: The journal ID, which changes whenever the journal is recreated, the lowest USN
+                 still in the journal, the maximum size of the journal, and the next USN
+        """
+
+        journal_entry = self.__getUsnJournalEntry()
+
+        # $Max holds the maximum size at offset 0x00, the journal ID at offset 0x10 and the lowest
+        # valid USN at offset 0x18
+        header = self.__readAttributeData(self.__getRawAttribute(journal_entry, 0x80, "$Max"))
+
+        next_usn = 0
+        for attribute in self.__iterAllAttributes(journal_entry, 0x80):
+            if self.__getAttributeName(attribute) != "$J":
+                continue
+
+            # Only the first part of a non-resident attribute, starting at VCN 0, holds its real size
+            if not attribute[0x08]:
+                next_usn = len(self.__readAttributeData(attribute))
+            elif not self.__unpack(attribute[0x10:0x18]):
+                next_usn = self.__unpack(attribute[0x30:0x38])
+
+        return {
+            "journal_id": self.__unpack(header[0x10:0x18]),
+            "lowest_valid_usn": self.__unpack(header[0x18:0x20]),
+            "maximum_size": self.__unpack(header[0x00:0x08]),
+            "next_usn": next_usn,
+        }
+
+
+    def readUsnJournal(self, start_usn: int = 0) -> Iterator[tuple[int, bytes]]:
+        """
+        Reads the $J stream of the change journal, which holds the change records, from a USN to
+        its end.  A USN is the byte offset of its record in the stream.  The start of the stream is
+        sparse once the journal has been trimmed, and sparse runs are skipped instead of read.
+
+        :param start_usn: The USN to start reading at
+
+        :return:          The USN of the first byte of each chunk, and the chunk, in USN order
+        """
+
+        journal_entry = self.__getUsnJournalEntry()
+
+        parts = []
+        real_size = None
+        for attribute in self.__iterAllAttributes(journal_entry, 0x80):
+            if self.__getAttributeName(attribute) != "$J":
+                continue
+
+            if not attribute[0x08]:
+                content = self.__readAttributeData(attribute)
+                if start_usn < len(content):
+                    yield start_usn, content[start_usn:]
+                return
+
+            # Large journals are split across extension entries, each part mapping the clusters
+            # from the starting VCN stored at offset 0x10
+            start_vcn = self.__unpack(attribute[0x10:0x18])
+            if not start_vcn:
+                real_size = self.__unpack(attribute[0x30:0x38])
+            parts.append((start_vcn, Runlist(attribute[self.__unpack(attribute[0x20:0x22]) :])))
+
+        if real_size is None:
+            raise Exception(f"[-] ERROR: {self.USN_JOURNAL_NAME} has no $J stream")
+
+        chunk_size = self.SWEEP_CHUNK_SIZE - (self.SWEEP_CHUNK_SIZE % self.bytes_per_cluster)
+
+        for start_vcn, runlist in sorted(parts, key=lambda part: part[0]):
+            for vcn, lcn, length in runlist.extents():
+                if lcn == Runlist.SPARSE:
+                    continue
+
+                run_start = (start_vcn + vcn) * self.bytes_per_cluster
+                run_end = min(run_start + length * self.bytes_per_cluster, real_size)
+
+                for usn in range(max(run_start, start_usn), run_end, chunk_size):
+                    yield usn, bytes(
+                        self.__read(lcn * self.bytes_per_cluster + usn - run_start, min(chunk_size, run_end - usn))
+                    )
+
+
+    def getVolumeSize(self) -> int:
+        """
+        :return: The size of the volume in bytes, as stored in the boot sector, up to the end of the
+                 image
+        """
+
+        # The number of sectors of the volume is stored at offset 0x28 of the boot sector, and the
+        # size of a sector at offset 0x0B
+        boot = self.__read(0, 512)
+        size = self.__unpack(boot[0x28:0x30]) * self.__unpack(boot[0x0B:0x0D])
+
+        if self.source.size:
+            size = min(size, self.source.size - self.partition_offset)
+
+        return size
+
+
+    def getClusterBitmap(self) -> bytes:
+        """
+        Reads $Bitmap, which holds a bit for each cluster of the volume that is set while the cluster
+        is allocated.  The bitmap is read once and kept, and is sent along when the navigator is
+        copied to a worker process.
+
+        :return: The bitmap, with the bit of cluster n at bit n % 8 of byte n // 8
+        """
+
+        if self.__cluster_bitmap is None:
+            bitmap_entry = bytes(self.__getRawMFTEntry(self.BITMAP_ENTRY))
+            self.__cluster_bitmap = self.__readAttributeData(self.__getRawAttribute(bitmap_entry, 0x80), cached=False)
+
+        return self.__cluster_bitmap
+
+
+    def isEntryInUse(self, entry: int) -> bool:
+        """
+        Checks whether an MFT entry is an in use base entry, which are the entries sweepEntries
+        reports.
+
+        :param entry: The MFT entry number of the entry
+
+        :return:      Whether the entry is in use and is not an extension of another entry
+        """
+
+        try:
+            entry_bytes = self.__getRawMFTEntry(entry)
+        except Exception:
+            return False
+
+        # The in use flag is stored at offset 0x16, and the reference to the base entry at offset 0x20
+        return bool(entry_bytes[0x16] & 0x01) and not self.__unpack(entry_bytes[0x20:0x26])
+
+
+    def __parseFileNameAttribute(self, data: bytes) -> tuple[bytes, int, int]:
+        """
+        Retrieves the file name and parent directory from the file name attribute.  The name is left
+        as UTF-16 so it is only decoded if it is used.
 
         :param data: The file name attribute to parse
 
-        :return:     The file name
+        :return:     The UTF-16 file name, and the MFT entry number and sequence number of the parent
+                     directory
         """
 
         content_offset = self.__unpack(data[0x14:0x16])
         attribute_content = data[content_offset:]
 
-        return bytes.decode(
-            attribute_content[66 : 66 + (attribute_content[64] * 2)], "utf-16-le"
+        # The parent directory is stored as a file reference, with the entry number in the lower
+        # 6 bytes and the sequence number in the upper 2 bytes
+        return (
+            bytes(attribute_content[66 : 66 + (attribute_content[64] * 2)]),
+            self.__unpack(attribute_content[0:6]),
+            self.__unpack(attribute_content[6:8]),
         )
 
 
-    def __parseReparseAttribute(self, data: bytes) -> dict[str, bytes]:
+    def __parseFileName(self, entry_bytes: bytes) -> tuple[bytes, int, int]:
+        """
+        Retrieves the long file name of an MFT entry.  Entries can have more than one file name
+        attribute, and the short DOS name is only used when no other name exists.
+
+        :param entry_bytes: The MFT entry to parse
+
+        :return:            The UTF-16 file name, and the MFT entry number and sequence number of
+                            the parent directory
+        """
+
+        file_name = None
+        for file_attribute in self.__iterAllAttributes(entry_bytes, 0x30):
+            file_name = self.__parseFileNameAttribute(file_attribute)
+
+            # The namespace of the name is stored at offset 0x41 of the content.  Namespace 2 is
+            # the DOS namespace.
+            content_offset = self.__unpack(file_attribute[0x14:0x16])
+            if file_attribute[content_offset + 0x41] != 0x02:
+                break
+
+        if file_name is None:
+            raise Exception("[-] ERROR: File name attribute not found")
+
+        return file_name
+
+
+    def getDirectoryPath(self, entry: int, sequence: Optional[int] = None) -> str:
+        """
+        Builds the full path of a directory by following the parent references of its file name
+        attributes up to the root directory.  Every directory path built along the way is memoized,
+        so resolving the paths of many files in the same directories reads each directory only once.
+        The memo is cleared once it holds MAX_DIRECTORY_PATHS paths.
+
+        :param entry:    The MFT entry number of the directory
+        :param sequence: The sequence number the directory entry must have.  A directory whose entry
+                         has been reused for another file is treated as orphaned.
+
+        :return:         The path of the directory, without a trailing separator.  The root
+                         directory is the empty string.
+        """
+
+        # The directories from the requested one up to the first one with a known path
+        unresolved = []
+        visited = set()
+
+        while True:
+            if entry == self.ROOT_ENTRY:
+                path = ""
+                break
+
+            # The memo is shared with copies of the navigator, which may clear it at any time
+            path = self.__directory_paths.get((entry, sequence))
+            if path is not None:
+                break
+            if entry in visited:
+                path = self.ORPHAN_PATH
+                break
+            visited.add(entry)
+
+            try:
+                entry_bytes = self.__getRawMFTEntry(entry)
+
+                # The sequence number is stored at offset 0x10, and the in use flag at offset 0x16
+                entry_sequence = self.__unpack(entry_bytes[0x10:0x12])
+                if (sequence is not None and entry_sequence != sequence) or not entry_bytes[0x16] & 0x01:
+                    raise Exception("[-] ERROR: Parent directory has been deleted")
+
+                name, parent_entry, parent_sequence = self.__parseFileName(entry_bytes)
+            except Exception:
+                path = self.ORPHAN_PATH
+                break
+
+            unresolved.append(((entry, sequence), name.decode("utf-16-le")))
+            entry, sequence = parent_entry, parent_sequence
+
+        if len(self.__directory_paths) + len(unresolved) > self.MAX_DIRECTORY_PATHS:
+            self.__directory_paths.clear()
+
+        for directory, name in reversed(unresolved):
+            path = f"{path}\\{name}"
+            if len(self.__directory_paths) < self.MAX_DIRECTORY_PATHS:
+                self.__directory_paths[directory] = path
+
+        return path
+
+
+    def __addPath(self, record: ReparseRecord) -> ReparseRecord:
+        """
+        Adds the full path of the file to the record of an entry, if paths are resolved.
+
+        :param record: The record of the entry
+
+        :return:       The same record
+        """
+
+        if self.resolve_paths and record.parent_entry is not None:
+            directory = self.getDirectoryPath(record.parent_entry, record.parent_sequence)
+            record.file_path = f"{directory}\\{record.file_name}"
+
+        return record
+
+
+    def __parseReparseAttribute(self, data: bytes) -> tuple[int, bytes]:
         """
         Parses and returns the reparse data and the reparse tag from the reparse attribute.
 
         :param data: The reparse attribute to parse
 
-        :return:     A dictionary containing the reparse tag and the reparse data
+        :return:     The reparse tag and the reparse data
         """
 
-        content_offset = self.__unpack(data[0x14:0x16])
-        attribute_content = data[content_offset:]
+        # Large reparse data can be stored in a non-resident attribute
+        attribute_content = self.__readAttributeData(data)
 
         reparse_data_length = self.__unpack(attribute_content[4:8])
 
-        return {
-            "reparse_tag": attribute_content[0:4],
-            "reparse_data": attribute_content[8 : 8 + reparse_data_length],
-        }
+        return (
+            self.__unpack(attribute_content[0:4]),
+            bytes(attribute_content[8 : 8 + reparse_data_length]),
+        )
+
+
+    def __parseEntry(self, entry_bytes: bytes, entry: int) -> ReparseRecord:
+        """
+        Parses the reparse and file name information out of an MFT entry that has already had the
+        fixup applied.
+
+        :param entry_bytes: The MFT entry to parse
+        :param entry:       The MFT entry number of the entry
+
+        :return:            The record of the reparse point
+        """
+
+        try:
+            reparse_attribute = next(self.__iterAllAttributes(entry_bytes, 0xC0))
+            tag, data = self.__parseReparseAttribute(reparse_attribute)
+        except:
+            raise Exception("[-] ERROR: File is not a reparse point")
+
+        try:
+            name_data, parent_entry, parent_sequence = self.__parseFileName(entry_bytes)
+        except:
+            raise Exception("[-] ERROR: File name attribute not found")
+
+        return ReparseRecord(tag, data, name_data, parent_entry, parent_sequence, entry)
+
+
+    def __parseEntryWithStats(self, entry_bytes: bytes, entry: int) -> ReparseRecord:
+        """
+        Parses an MFT entry like __parseEntry, counting the entry and timing it.  Callers pick this
+        method once instead of checking for stats on every entry.
+
+        :param entry_bytes: The MFT entry to parse
+        :param entry:       The MFT entry number of the entry
+
+        :return:            The record of the reparse point
+        """
+
+        start = time.perf_counter()
+        self.stats.count("records_parsed")
+
+        try:
+            record = self.__parseEntry(entry_bytes, entry)
+        finally:
+            self.stats.time("parse", time.perf_counter() - start)
+
+        self.stats.count("reparse_points")
+        return record
+
+
+    def __iterMFTRuns(self, start: int, stop: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Converts the extents of the MFT runlist into byte ranges of the image, limited to the entries
+        in the range [start, stop).
+
+        :param start: The first entry number to include
+        :param stop:  The entry number to stop before
+
+        :return:      Tuples of the first entry number, the byte offset and the byte length of each run
+        """
+
+        entries_per_cluster = self.bytes_per_cluster // self.bytes_per_entry
+
+        for vcn, lcn, length in self.mft_clusters.extents():
+            if lcn == Runlist.SPARSE:
+                continue
+
+            run_start = max(start, vcn * entries_per_cluster)
+            run_stop = min(stop, (vcn + length) * entries_per_cluster)
+            if run_start >= run_stop:
+                continue
+
+            yield (
+                run_start,
+                (lcn * self.bytes_per_cluster)
+                + ((run_start - (vcn * entries_per_cluster)) * self.bytes_per_entry),
+                (run_stop - run_start) * self.bytes_per_entry,
+            )
+
+
+    def getEntryCount(self) -> int:
+        """
+        :return: The number of entries the MFT has room for
+        """
+
+        return len(self.mft_clusters) * (self.bytes_per_cluster // self.bytes_per_entry)
 
 
-    def getEntry(self, entry: int) -> dict[str, bytes]:
+    def readRawEntries(self, start: int, stop: int) -> Union[bytes, bytearray, memoryview]:
+        """
+        Reads a range of MFT entries as they are stored, without applying the fixup.  A range in one
+        run of the MFT is read with a single read.  Entries in sparse runs or past the end of the MFT
+        are read as zeros, so ranges of two MFTs with different layouts line up.
+
+        :param start: The first entry number to read
+        :param stop:  The entry number to stop before
+
+        :return:      The raw entries
+        """
+
+        length = (stop - start) * self.bytes_per_entry
+        runs = list(self.__iterMFTRuns(start, stop))
+        if len(runs) == 1 and runs[0][0] == start and runs[0][2] == length:
+            return self.__read(runs[0][1], length)
+
+        data = bytearray(length)
+        for first_entry, byte_offset, byte_length in runs:
+            position = (first_entry - start) * self.bytes_per_entry
+            part = self.__read(byte_offset, byte_length)
+            data[position : position + len(part)] = part
+
+        return data
+
+
+    def sweepEntries(self, start: int = 0, stop: Optional[int] = None) -> Iterator[ReparseRecord]:
+        """
+        Walks the whole MFT with large sequential reads and yields every in use entry that is a
+        reparse point.  The fixup is applied to each chunk at once, and torn entries are skipped.
+        The prefilter then picks out the entries whose attribute headers show a reparse point with
+        one of the tags of the navigator, and only those are parsed.  Each yielded record has the
+        same layout as the one returned by getEntry.
+
+        :param start: The first entry number to sweep
+        :param stop:  The entry number to stop before.  Defaults to the end of the MFT.
+
+        :return:      The data obtained from each reparse point entry
+        """
+
+        if stop is None:
+            stop = self.getEntryCount()
+
+        # Keep the reads a multiple of the entry size so no entry is split between reads
+        chunk_size = self.SWEEP_CHUNK_SIZE - (self.SWEEP_CHUNK_SIZE % self.bytes_per_entry)
+        parse = self.__parseEntry if self.stats is None else self.__parseEntryWithStats
+
+        for first_entry, byte_offset, byte_length in self.__iterMFTRuns(start, stop):
+            self.__advise(byte_offset, byte_length, "sequential")
+
+            for chunk_offset in range(0, byte_length, chunk_size):
+                # Have the next chunk read in the background while this one is parsed
+                if chunk_offset + chunk_size < byte_length:
+                    self.__advise(
+                        byte_offset + chunk_offset + chunk_size,
+                        min(chunk_size, byte_length - chunk_offset - chunk_size),
+                        "willneed",
+                    )
+
+                chunk = memoryview(
+                    self.__read(byte_offset + chunk_offset, min(chunk_size, byte_length - chunk_offset))
+                )
+
+                chunk_entry = first_entry + chunk_offset // self.bytes_per_entry
+                with chunk:
+                    if self.stats is not None:
+                        fixup_start = time.perf_counter()
+                    batch = FixupBatch(chunk, self.bytes_per_entry)
+                    if self.stats is not None:
+                        self.stats.time("fixup", time.perf_counter() - fixup_start)
+
+                # Entries that are torn, were never initialized or are no longer in use are skipped
+                if self.stats is not None:
+                    for i in range(len(batch)):
+                        if not batch.valid[i]:
+                            self.stats.count("records_invalid")
+                            if batch[i][0:4] == FixupBatch.SIGNATURE:
+                                self.stats.count("fixup_mismatches")
+
+                # Only the entries whose attribute headers show a reparse point are parsed.  Extension
+                # entries are skipped too, as their attributes are reported through the base entry.
+                survivors = self.prefilter.filter(batch)
+                if self.stats is not None:
+                    self.stats.count("records_filtered", sum(batch.valid) - len(survivors))
+
+                for i in survivors:
+                    try:
+                        record = parse(batch[i], chunk_entry + i)
+                    except Exception:
+                        continue
+
+                    # The tag of a reparse point outside the entry is only known once it is parsed
+                    if self.tags is not None and record.tag not in self.tags:
+                        continue
+
+                    yield self.__addPath(record)
+
+
+    def getEntries(self, entries: Iterable[int]) -> list[Union[ReparseRecord, Exception]]:
+        """
+        Gets many entries at once.  The I/O scheduler orders the entries by where they are stored in
+        the image, and merges entries stored near each other into large aligned reads.  The clusters
+        of the non-resident reparse attributes of each read are then read the same way, before the
+        entries are parsed.  A failed lookup does not stop the batch, and its exception is returned
+        in place of its result.
+
+        :param entries: The MFT entry numbers of the entries to get
+
+        :return:        The data obtained from each entry, or the exception raised while getting it,
+                        in the same order as the entry numbers
+        """
+
+        entries = list(entries)
+        results = [None] * len(entries)
+
+        # The results of the lookups that were read, cached in one transaction at the end
+        fresh = []
+
+        cached = self.cache.getEntries(self.cache_key, entries) if self.cache is not None else {}
+
+        # Find where each entry that still has to be read is stored
+        pending = []
+        for index, entry in enumerate(entries):
+            try:
+                if entry in cached:
+                    result, error = cached[entry]
+                    results[index] = Exception(error) if error is not None else ReparseRecord.fromDict(result)
+                    continue
+
+                pending.append((self.__getEntryOffset(entry), self.bytes_per_entry, index))
+            except Exception as ex:
+                results[index] = ex
+
+        parse = self.__parseEntry if self.stats is None else self.__parseEntryWithStats
+
+        # The entries are gathered into windows, which are fixed up at once and parsed once the
+        # clusters of every entry in the window are read
+        window = []
+        window_data = []
+        window_bytes = 0
+        reads = self.scheduler.plan(pending)
+
+        for number, (read_offset, data, requests) in enumerate(self.__iterScheduledReads(reads)):
+            with memoryview(data) as run:
+                for byte_offset, _, index in requests:
+                    entry_start = byte_offset - read_offset
+                    raw_entry = bytes(run[entry_start : entry_start + self.bytes_per_entry])
+                    if len(raw_entry) < self.bytes_per_entry:
+                        results[index] = Exception(f"[-] ERROR: Entry {entries[index]} is outside of the image")
+                        continue
+
+                    window.append(index)
+                    window_data.append(raw_entry)
+            window_bytes += len(data)
+
+            if window_bytes < self.PREFETCH_BYTES and number + 1 < len(reads):
+                continue
+
+            batch = FixupBatch(b"".join(window_data), self.bytes_per_entry)
+            self.__prefetchClusters(batch)
+
+            for i, index in enumerate(window):
+                entry = entries[index]
+
+                # Entries the batch finds torn or corrupt are fixed up as a single lookup would be
+                entry_bytes = batch[i] if batch.valid[i] else self.__applyFixup(batch[i], self.__scratch)
+
+                try:
+                    results[index] = parse(entry_bytes, entry)
+                except Exception as ex:
+                    results[index] = ex
+
+                if self.cache is not None:
+                    if isinstance(results[index], Exception):
+                        fresh.append((entry, None, str(results[index])))
+                    else:
+                        fresh.append((entry, results[index], None))
+
+            window = []
+            window_data = []
+            window_bytes = 0
+
+        if self.cache is not None:
+            self.cache.putEntries(self.cache_key, fresh)
+
+        return [result if isinstance(result, Exception) else self.__addPath(result) for result in results]
+
+
+    def sweepIndexedEntries(self) -> Iterator[ReparseRecord]:
+        """
+        Yields every reparse point listed in the $R index of $Extend\\$Reparse, reading only those
+        entries instead of the whole MFT, with one batch lookup.  If the index cannot be read, the
+        whole MFT is swept instead.  Each yielded record has the same layout as the one returned by
+        getEntry.
+
+        :return: The data obtained from each reparse point entry
+        """
+
+        try:
+            reparse_points = self.getReparseIndex()
+        except Exception:
+            yield from self.sweepEntries()
+            return
+
+        entries = [entry for tag, entry in reparse_points if self.tags is None or tag in self.tags]
+
+        for record in self.getEntries(entries):
+            # The index can briefly be out of date with the entry it points to
+            if not isinstance(record, Exception):
+                yield record
+
+
+    def sweepEntriesParallel(
+        self, jobs: int, shard_size: Optional[int] = None
+    ) -> Iterator[ReparseRecord]:
+        """
+        Sweeps the MFT like sweepEntries, but splits it into shards of consecutive entries that are
+        swept by a pool of worker processes.  Every worker opens its own handle to the image and reuses
+        the boot sector and runlist information of this navigator.  Results are yielded in entry order.
+
+        :param jobs:       The number of worker processes
+        :param shard_size: The number of entries in each shard.  Defaults to a size that gives every
+                           worker several shards.
+
+        :return:           The data obtained from each reparse point entry
+        """
+
+        entry_count = self.getEntryCount()
+        if shard_size is None:
+            shard_size = max(self.MIN_SHARD_SIZE, -(-entry_count // (jobs * 4)))
+
+        shards = [
+            (0, start, min(start + shard_size, entry_count))
+            for start in range(0, entry_count, shard_size)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=initShardWorker, initargs=([self],)
+        ) as executor:
+            for shard, shard_stats in executor.map(sweepShard, shards):
+                if shard_stats is not None:
+                    self.stats.merge(shard_stats)
+                yield from shard
+
+
+    def __iterCarveExtents(
+        self, start: int, stop: int, bitmap: Optional[bytes]
+    ) -> Iterator[tuple[int, int, bool]]:
+        """
+        Finds the byte ranges of the volume to carve.  The runs of the live MFT are always carved,
+        for the entries that are no longer in use, which sweeps skip.
+
+        :param start:  The byte offset to start at
+        :param stop:   The byte offset to stop before
+        :param bitmap: The cluster bitmap, to only carve unallocated clusters outside the MFT, or
+                       None to carve every cluster
+
+        :return:       The start and stop byte offsets of each range, and whether it is part of the
+                       MFT, in order
+        """
+
+        mft_extents = []
+        for _, lcn, length in sorted(self.mft_clusters.extents(), key=lambda extent: extent[1]):
+            mft_start, mft_stop = lcn * self.bytes_per_cluster, (lcn + length) * self.bytes_per_cluster
+            if lcn != Runlist.SPARSE and mft_stop > start and mft_start < stop:
+                mft_extents.append((max(start, mft_start), min(stop, mft_stop), True))
+
+        extents = list(mft_extents)
+        if bitmap is not None:
+            # The bitmap is searched a byte at a time, so each range holds a group of 8 clusters
+            # with at least one unallocated cluster.  Allocated clusters in them, including those
+            # of the MFT, are skipped later.
+            group_size = 8 * self.bytes_per_cluster
+            first_group = start // group_size
+            stop_group = -(-stop // group_size)
+
+            for match in re.finditer(rb"[^\xff]+", bitmap[first_group:stop_group]):
+                extents.append(
+                    (
+                        max(start, (first_group + match.start()) * group_size),
+                        min(stop, (first_group + match.end()) * group_size),
+                        False,
+                    )
+                )
+
+            # Clusters past the end of the bitmap are not tracked by it
+            if len(bitmap) * group_size < stop:
+                extents.append((max(start, len(bitmap) * group_size), stop, False))
+        else:
+            position = start
+            for mft_start, mft_stop, _ in mft_extents:
+                if mft_start > position:
+                    extents.append((position, mft_start, False))
+                position = max(position, mft_stop)
+
+            if position < stop:
+                extents.append((position, stop, False))
+
+        return iter(sorted(extents))
+
+
+    def carveEntries(
+        self, start: int = 0, stop: Optional[int] = None, unallocated_only: bool = False
+    ) -> Iterator[tuple[int, ReparseRecord]]:
+        """
+        Scans the volume for the records of deleted files, both the entries of the MFT that are no
+        longer in use and records left outside the MFT in freed clusters or in the slack of others,
+        and yields the reparse points among them.  In use entries of the MFT are left to the sweeps.
+        The volume is read in large sequential chunks, and records are found by their FILE
+        signature at sector boundaries.  The candidates of each chunk are fixed up with one
+        FixupBatch, so torn records and stray signatures are skipped, and the prefilter picks out
+        the ones with a reparse attribute before they are parsed.  Records outside the MFT are
+        reported whether or not they are marked in use.
+
+        Reparse data stored outside a carved record is read from the clusters its runlist names,
+        which may have been reused since.
+
+        :param start:            The byte offset in the volume to start at, rounded down to a sector
+        :param stop:             The byte offset to stop before.  Defaults to the end of the volume.
+                                 A record that starts before stop is read whole, so ranges that meet
+                                 split the records between them without losing or repeating any.
+        :param unallocated_only: Whether to only scan the clusters that $Bitmap marks as free outside
+                                 the MFT
+
+        :return:                 The byte offset of each record in the image, and its reparse point
+        """
+
+        if stop is None:
+            stop = self.getVolumeSize()
+        start -= start % self.CARVE_ALIGNMENT
+
+        bitmap = self.getClusterBitmap() if unallocated_only else None
+        prefilter = ReparsePrefilter(self.tags, in_use_only=False)
+        parse = self.__parseEntry if self.stats is None else self.__parseEntryWithStats
+
+        for extent_start, extent_stop, in_mft in self.__iterCarveExtents(start, stop, bitmap):
+            self.__advise(extent_start, extent_stop - extent_start, "sequential")
+
+            for chunk_start in range(extent_start, extent_stop, self.CARVE_CHUNK_SIZE):
+                chunk_stop = min(chunk_start + self.CARVE_CHUNK_SIZE, extent_stop)
+                if chunk_stop < extent_stop:
+                    self.__advise(chunk_stop, min(self.CARVE_CHUNK_SIZE, extent_stop - chunk_stop), "willneed")
+
+                # Read one record past the end of the chunk, so the records that start in it are
+                # read whole
+                chunk = memoryview(self.__read(chunk_start, chunk_stop - chunk_start + self.bytes_per_entry - 1))
+
+                with chunk:
+                    offsets = []
+                    for match in self.CARVE_SIGNATURE.finditer(chunk):
+                        offset = chunk_start + match.start()
+                        if offset >= chunk_stop or match.start() + self.bytes_per_entry > len(chunk):
+                            break
+                        if offset % self.CARVE_ALIGNMENT:
+                            continue
+
+                        # The in use flag of an entry is stored at offset 0x16, outside the fixups
+                        if in_mft:
+                            if chunk[match.start() + 0x16] & 0x01:
+                                continue
+                            offsets.append(offset)
+                            continue
+
+                        # The ranges of an unallocated scan can hold allocated clusters too
+                        cluster = offset // self.bytes_per_cluster
+                        if bitmap is not None and cluster // 8 < len(bitmap):
+                            if bitmap[cluster // 8] & (1 << (cluster % 8)):
+                                continue
+
+                        offsets.append(offset)
+
+                    if not offsets:
+                        continue
+
+                    records = b"".join(
+                        chunk[offset - chunk_start : offset - chunk_start + self.bytes_per_entry] for offset in offsets
+                    )
+
+                if self.stats is not None:
+                    fixup_start = time.perf_counter()
+                batch = FixupBatch(records, self.bytes_per_entry)
+                if self.stats is not None:
+                    self.stats.time("fixup", time.perf_counter() - fixup_start)
+                    self.stats.count("records_invalid", len(batch) - sum(batch.valid))
+
+                survivors = prefilter.filter(batch)
+                if self.stats is not None:
+                    self.stats.count("records_filtered", sum(batch.valid) - len(survivors))
+
+                for i in survivors:
+                    # Records written since Windows XP store their entry number at offset 0x2C, in
+                    # front of the update sequence array, whose offset is stored at offset 0x04
+                    entry = None
+                    if self.__unpack(batch[i][0x04:0x06]) >= 0x30:
+                        entry = self.__unpack(batch[i][0x2C:0x30])
+
+                    try:
+                        record = parse(batch[i], entry)
+                    except Exception:
+                        continue
+
+                    if self.tags is not None and record.tag not in self.tags:
+                        continue
+
+                    yield self.partition_offset + offsets[i], self.__addPath(record)
+
+
+    def carveEntriesParallel(
+        self, jobs: int, unallocated_only: bool = False, shard_size: Optional[int] = None
+    ) -> Iterator[tuple[int, ReparseRecord]]:
+        """
+        Carves the volume like carveEntries, but splits it into shards of consecutive bytes that are
+        carved by a pool of worker processes.  A record that crosses from one shard into the next is
+        carved by the shard it starts in.  Results are yielded in the order of their offsets.
+
+        :param jobs:             The number of worker processes
+        :param unallocated_only: Whether to only scan the clusters that $Bitmap marks as free
+        :param shard_size:       The number of bytes in each shard, rounded up to a sector.
+                                 Defaults to a size that gives every worker several shards.
+
+        :return:                 The byte offset of each record in the image, and its reparse point
+        """
+
+        volume_size = self.getVolumeSize()
+        if shard_size is None:
+            shard_size = max(self.MIN_CARVE_SHARD_SIZE, -(-volume_size // (jobs * 4)))
+        shard_size = -(-shard_size // self.CARVE_ALIGNMENT) * self.CARVE_ALIGNMENT
+
+        # Read the bitmap once here, so every worker is sent it with the navigator
+        if unallocated_only:
+            self.getClusterBitmap()
+
+        shards = [
+            (0, start, min(start + shard_size, volume_size), unallocated_only)
+            for start in range(0, volume_size, shard_size)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=initShardWorker, initargs=([self],)
+        ) as executor:
+            for shard, shard_stats in executor.map(carveShard, shards):
+                if shard_stats is not None:
+                    self.stats.merge(shard_stats)
+                yield from shard
+
+
+    def parseEntry(self, entry_bytes: bytes, entry: int) -> ReparseRecord:
+        """
+        Parses an MFT entry that was read and fixed up elsewhere, such as by a FixupBatch, the same
+        way getEntry parses the entries it reads.
+
+        :param entry_bytes: The fixed up MFT entry
+        :param entry:       The MFT entry number of the entry
+
+        :return:            The data obtained from the entry
+        """
+
+        if self.stats is not None:
+            return self.__addPath(self.__parseEntryWithStats(entry_bytes, entry))
+
+        return self.__addPath(self.__parseEntry(entry_bytes, entry))
+
+
+    def getEntry(self, entry: int) -> ReparseRecord:
         """
         Gets the entry from the MFT and parses attribute agnostic information from it.
-        Returns a dictionary of the following:
+        Returns a ReparseRecord of the following, which can also be used as a dictionary:
         - The entry name
         - The reparse tag
         - The reparse data
+        - The entry number
 
         :param entry: The MFT entry number of the entry to get
 
         :return:      The data obtained from the entry
         """
 
-        with open(self.file_name, "rb") as file:
-            entry_bytes = self.__getRawMFTEntry(file, entry)
+        if self.cache is not None:
+            cached = self.cache.getEntry(self.cache_key, entry)
+            if cached is not None:
+                return self.__addPath(ReparseRecord.fromDict(cached))
 
         try:
-            reparse_attribute = self.__getRawAttribute(entry_bytes, 0xC0)
-            reparse_data = self.__parseReparseAttribute(reparse_attribute)
-        except:
-            raise Exception("[-] ERROR: File is not a reparse point")
+            entry_bytes = self.__getRawMFTEntry(entry)
+            if self.stats is not None:
+                record = self.__parseEntryWithStats(entry_bytes, entry)
+            else:
+                record = self.__parseEntry(entry_bytes, entry)
+        except Exception as ex:
+            if self.cache is not None:
+                self.cache.putEntry(self.cache_key, entry, None, str(ex))
+            raise
 
-        try:
-            file_attribute = self.__getRawAttribute(entry_bytes, 0x30)
-            reparse_data["file_name"] = self.__parseFileNameAttribute(file_attribute)
-        except:
-            raise Exception("[-] ERROR: File name attribute not found")
+        if self.cache is not None:
+            self.cache.putEntry(self.cache_key, entry, record)
+
+        return self.__addPath(record)
+
+
+# The navigators used by each worker process of the parallel sweeps and carves of Navigator and
+# DiskScanner
+_shard_navigators = None
+
+
+def initShardWorker(navigators: list[Navigator]) -> None:
+    """
+    Stores the navigators in a worker process, so the boot sector and runlist information is only
+    sent to each worker once.  A forked worker inherits the handles of the parent, whose file
+    offsets are shared with every other worker, so the navigators are copied to open their own.
+    Each copy is given stats of its own, as the navigators of the partitions of a disk share their
+    stats, and the stats counted before the workers started are already in the parent.
+
+    :param navigators: The navigators to sweep with
+    """
+
+    global _shard_navigators
+    _shard_navigators = pickle.loads(pickle.dumps(navigators))
+
+    for navigator in _shard_navigators:
+        if navigator.stats is not None:
+            navigator.stats = Stats()
+
+
+def sweepShard(shard: tuple[int, int, int]) -> tuple[list[ReparseRecord], Optional[dict]]:
+    """
+    Sweeps one shard of the MFT in a worker process.
+
+    :param shard: The index of the navigator, and the range [start, stop) of entries to sweep
+
+    :return:      The data obtained from each reparse point entry in the shard, and a snapshot of
+                  the stats counted while sweeping it if the navigator has stats
+    """
+
+    navigator = _shard_navigators[shard[0]]
+    records = list(navigator.sweepEntries(shard[1], shard[2]))
+    return records, takeShardStats(navigator)
+
+
+def carveShard(shard: tuple[int, int, int, bool]) -> tuple[list[tuple[int, ReparseRecord]], Optional[dict]]:
+    """
+    Carves one shard of the volume in a worker process.
+
+    :param shard: The index of the navigator, the range [start, stop) of bytes to carve, and whether
+                  to only carve unallocated clusters
+
+    :return:      The offset and data of each reparse point carved from the shard, and a snapshot
+                  of the stats counted while carving it if the navigator has stats
+    """
+
+    index, start, stop, unallocated_only = shard
+    navigator = _shard_navigators[index]
+    records = list(navigator.carveEntries(start, stop, unallocated_only))
+    return records, takeShardStats(navigator)
+
+
+def takeShardStats(navigator: Navigator) -> Optional[dict]:
+    """
+    Takes the stats counted by a navigator of a worker process for the shard it finished.
+
+    :param navigator: The navigator that worked on the shard
+
+    :return:          A snapshot of the stats, or None if the navigator has no stats
+    """
+
+    if navigator.stats is None:
+        return None
 
-        return reparse_data
+    # Start the next shard from empty stats, so nothing is merged twice
+    shard_stats = navigator.stats.snapshot()
+    navigator.stats = Stats()
+    return shard_stats
@@ -0,0 +1,71 @@
+from typing import IO, Any, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from .RecordWriter import RecordWriter
+
+
+class ParquetWriter(RecordWriter):
+
+    # Each batch is written as one row group
+    BATCH_SIZE = 64 * 1024
+
+    BINARY = True
+
+    # The columns written as integers, as every other column is written as a string
+    INTEGER_COLUMNS = ("MFT Entry", "Record Offset", "Partition", "Partition Offset", "Final Entry")
+
+    def __init__(self, stream: IO, columns: Sequence[str] = RecordWriter.COLUMNS):
+        """
+        Writes records as a Parquet file with one row group per batch.  Every column is a string
+        except the INTEGER_COLUMNS, such as the MFT entry number and offsets.  Needs pyarrow.
+
+        :param stream:  The binary stream to write to
+        :param columns: The columns to write
+        """
+
+        if pa is None:
+            raise Exception(
+                "[-] ERROR: Parquet output needs pyarrow. Install it with: pip install parse-reparsepoint[parquet]"
+            )
+
+        super().__init__(stream, columns)
+
+        self.__schema = pa.schema(
+            [(column, pa.int64() if column in self.INTEGER_COLUMNS else pa.string()) for column in self.columns]
+        )
+        self.__writer = pq.ParquetWriter(stream, self.__schema)
+
+
+    def writeBatch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Writes the rows as a row group.
+
+        :param rows: The rows to write
+        """
+
+        columns = {}
+        for column in self.columns:
+            values = [row.get(column) for row in rows]
+            convert = int if column in self.INTEGER_COLUMNS else str
+            values = [None if value is None else convert(value) for value in values]
+            columns[column] = values
+
+        self.__writer.write_table(pa.Table.from_pydict(columns, schema=self.__schema))
+
+
+    def finish(self) -> None:
+        """
+        Writes the Parquet footer.
+
+        :return: None
+        """
+
+        self.__writer.close()
+
+
+RecordWriter.registerFormat("parquet")(ParquetWriter)
@@ -0,0 +1,231 @@
+import uuid
+from typing import Any
+
+from .ImageSource import ImageSource
+
+
+class PartitionTable:
+
+    # The OEM ID in the boot sector of an NTFS volume
+    NTFS_OEM_ID = b"NTFS    "
+
+    # The MBR partition types of extended partitions, which hold a chain of logical partitions
+    EXTENDED_TYPES = (0x05, 0x0F, 0x85)
+
+    # The MBR partition type of the protective partition of a GPT disk
+    GPT_PROTECTIVE_TYPE = 0xEE
+
+    # The sector sizes a GPT header is looked for with, in order
+    SECTOR_SIZES = (512, 4096)
+
+    # The most logical partitions followed in an extended partition, so a looping chain ends
+    MAX_LOGICAL_PARTITIONS = 128
+
+    # The most GPT partition entries read.  Disks almost always have 128, so a larger count in a
+    # corrupt header is refused instead of reading that much of the image into memory.
+    MAX_GPT_ENTRIES = 1024
+
+    def __init__(self, source: ImageSource):
+        """
+        Reads the partition table of a disk image.  GPT disks, and MBR disks with their logical
+        partitions, are supported.  An image that starts with an NTFS boot sector is a volume
+        without a partition table, and is read as a single partition at offset 0.
+
+        Each partition is a dictionary of:
+        - number: The partition number, from 1.  Logical partitions of MBR disks start at 5.
+        - offset: The byte offset of the partition in the image
+        - size:   The size of the partition in bytes
+        - type:   The MBR partition type, e.g. 0x07, or the GPT partition type GUID
+        - name:   The GPT partition name, or an empty string
+
+        :param source: The image to read the partition table of
+        """
+
+        self.source = source
+        self.scheme = None
+        self.sector_size = 512
+        self.partitions = []
+
+        first_sector = bytes(source.read(0, 512))
+        if len(first_sector) < 512:
+            raise Exception("[-] ERROR: Image is too small to hold a partition table")
+
+        if first_sector[3:11] == self.NTFS_OEM_ID:
+            self.scheme = "none"
+            self.partitions = [{"number": 1, "offset": 0, "size": source.size, "type": "", "name": ""}]
+            return
+
+        if first_sector[510:512] != b"\x55\xaa":
+            raise Exception("[-] ERROR: No partition table or NTFS boot sector found")
+
+        entries = self.__parseMBREntries(first_sector)
+        if any(entry["type"] == self.GPT_PROTECTIVE_TYPE for entry in entries) and self.__parseGPT():
+            self.scheme = "gpt"
+            return
+
+        self.scheme = "mbr"
+        self.__parseMBR(entries)
+
+
+    def __parseMBREntries(self, sector: bytes) -> list[dict[str, int]]:
+        """
+        Parses the four partition entries of an MBR or extended boot record.  Empty entries are
+        skipped.
+
+        :param sector: The sector holding the entries
+
+        :return:       The type, starting sector and number of sectors of each entry, in order
+        """
+
+        entries = []
+        for index in range(4):
+            entry = sector[446 + index * 16 : 462 + index * 16]
+            partition_type = entry[4]
+            if partition_type == 0:
+                continue
+
+            entries.append(
+                {
+                    "index": index,
+                    "type": partition_type,
+                    "start": int.from_bytes(entry[8:12], "little"),
+                    "sectors": int.from_bytes(entry[12:16], "little"),
+                }
+            )
+
+        return entries
+
+
+    def __parseMBR(self, entries: list[dict[str, int]]) -> None:
+        """
+        Adds the primary partitions of an MBR disk, and the logical partitions of its extended
+        partition, which are read by following the chain of extended boot records.
+
+        :param entries: The partition entries of the MBR
+
+        :return:        None
+        """
+
+        for entry in entries:
+            if entry["type"] not in self.EXTENDED_TYPES:
+                self.__addPartition(entry["index"] + 1, entry["start"], entry["sectors"], f"0x{entry['type']:02X}")
+                continue
+
+            extended_start = entry["start"]
+            record_start = extended_start
+            number = 5
+
+            while number < 5 + self.MAX_LOGICAL_PARTITIONS:
+                record = bytes(self.source.read(record_start * self.sector_size, 512))
+                if len(record) < 512 or record[510:512] != b"\x55\xaa":
+                    break
+
+                logical = self.__parseMBREntries(record)
+                following = None
+                for logical_entry in logical:
+                    if logical_entry["type"] in self.EXTENDED_TYPES:
+                        following = extended_start + logical_entry["start"]
+                    elif logical_entry["sectors"]:
+                        self.__addPartition(
+                            number,
+                            record_start + logical_entry["start"],
+                            logical_entry["sectors"],
+                            f"0x{logical_entry['type']:02X}",
+                        )
+                        number += 1
+
+                if following is None or following <= record_start:
+                    break
+                record_start = following
+
+
+    def __parseGPT(self) -> bool:
+        """
+        Adds the partitions of a GPT disk.  The header is looked for after the protective MBR with
+        each sector size in turn, so disks with 4096 byte sectors are read too.
+
+        :return: Whether a GPT header was found
+        """
+
+        for sector_size in self.SECTOR_SIZES:
+            header = bytes(self.source.read(sector_size, 92))
+            if header[0:8] == b"EFI PART":
+                break
+        else:
+            return False
+
+        self.sector_size = sector_size
+
+        entries_lba = int.from_bytes(header[72:80], "little")
+        entry_count = int.from_bytes(header[80:84], "little")
+        entry_size = int.from_bytes(header[84:88], "little")
+        # The entry size is 128 times a power of two, so any power of two of at least 128
+        if entry_size < 128 or entry_size & (entry_size - 1):
+            raise Exception("[-] ERROR: Invalid GPT partition entry size")
+        if entry_count > self.MAX_GPT_ENTRIES:
+            raise Exception("[-] ERROR: Too many GPT partition entries")
+
+        entries_offset = entries_lba * sector_size
+        if entries_offset >= self.source.size:
+            raise Exception("[-] ERROR: GPT partition entries are outside of the image")
+
+        entries = bytes(
+            self.source.read(entries_offset, min(entry_count * entry_size, self.source.size - entries_offset))
+        )
+        for index in range(len(entries) // entry_size):
+            entry = entries[index * entry_size : (index + 1) * entry_size]
+            if entry[0:16] == bytes(16):
+                continue
+
+            first_lba = int.from_bytes(entry[32:40], "little")
+            last_lba = int.from_bytes(entry[40:48], "little")
+            name = entry[56:128].decode("utf-16-le", errors="replace").split("\x00", 1)[0]
+
+            self.__addPartition(
+                index + 1, first_lba, last_lba - first_lba + 1, str(uuid.UUID(bytes_le=entry[0:16])), name
+            )
+
+        return True
+
+
+    def __addPartition(self, number: int, start: int, sectors: int, partition_type: str, name: str = "") -> None:
+        """
+        Adds a partition.
+
+        :param number:         The partition number
+        :param start:          The first sector of the partition
+        :param sectors:        The number of sectors of the partition
+        :param partition_type: The partition type
+        :param name:           The partition name
+        """
+
+        self.partitions.append(
+            {
+                "number": number,
+                "offset": start * self.sector_size,
+                "size": sectors * self.sector_size,
+                "type": partition_type,
+                "name": name,
+            }
+        )
+
+
+    def isNTFS(self, partition: dict[str, Any]) -> bool:
+        """
+        Checks the boot sector of a partition for the NTFS OEM ID.  The partition type is not
+        trusted, as it is shared with other file systems.
+
+        :param partition: The partition to check
+
+        :return:          Whether the partition holds an NTFS volume
+        """
+
+        return bytes(self.source.read(partition["offset"] + 3, 8)) == self.NTFS_OEM_ID
+
+
+    def getNTFSPartitions(self) -> list[dict[str, Any]]:
+        """
+        :return: The partitions that hold NTFS volumes, in partition table order
+        """
+
+        return [partition for partition in self.partitions if self.isNTFS(partition)]
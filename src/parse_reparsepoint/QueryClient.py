@@ -0,0 +1,79 @@
+import json
+import socket
+from typing import Any, Union
+
+
+class QueryClient:
+
+    def __init__(self, address: Union[str, tuple[str, int]]):
+        """
+        Connects to a running QueryServer.  The connection stays open, so many requests can be sent
+        without paying for a new connection each time.
+
+        :param address: The Unix socket path, or the (host, port) tuple, the server listens on
+        """
+
+        if isinstance(address, str):
+            self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.__socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        self.__socket.connect(address)
+        self.__stream = self.__socket.makefile("rwb")
+
+
+    @staticmethod
+    def parseAddress(address: str) -> Union[str, tuple[str, int]]:
+        """
+        Parses a server address given on the command line.  HOST:PORT and PORT are TCP addresses,
+        and anything else is a Unix socket path.
+
+        :param address: The address to parse
+
+        :return:        The Unix socket path, or the (host, port) tuple
+        """
+
+        host, _, port = address.rpartition(":")
+        if port.isdigit() and "/" not in address:
+            return (host or "127.0.0.1", int(port))
+
+        return address
+
+
+    def __enter__(self) -> "QueryClient":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Closes the connection.
+
+        :return: None
+        """
+
+        self.__stream.close()
+        self.__socket.close()
+
+
+    def getEntries(self, file_name: str, entries: list[int]) -> list[dict[str, Any]]:
+        """
+        Looks up entries of an image on the server.
+
+        :param file_name: The path of the image, as seen by the server
+        :param entries:   The MFT entry numbers to look up
+
+        :return:          The resolved information, or a dictionary with an "error", for each entry
+        """
+
+        self.__stream.write(json.dumps({"file": file_name, "entries": list(entries)}).encode() + b"\n")
+        self.__stream.flush()
+
+        response = json.loads(self.__stream.readline())
+        if "error" in response:
+            raise Exception(response["error"])
+
+        return response["results"]
@@ -0,0 +1,207 @@
+import json
+import os
+import socketserver
+import stat
+import threading
+from collections import OrderedDict
+from typing import Any, Union
+
+from .Interpreter import Interpreter
+from .Navigator import Navigator
+
+
+class QueryServer:
+
+    # The number of images kept open before the least recently used is closed
+    DEFAULT_MAX_IMAGES = 16
+
+    def __init__(self, address: Union[str, tuple[str, int]], max_images: int = DEFAULT_MAX_IMAGES):
+        """
+        A long-running server that keeps navigators open, so lookups do not pay for parsing the
+        boot sector and the MFT runlist on every request.  Requests and responses are JSON objects,
+        one per line, and a client can send any number of requests over one connection.
+
+        The protocol is plain JSON lines over a Unix socket or a localhost TCP port rather than HTTP,
+        so a lookup costs one write and one read on an open connection.
+
+        A request names an image and the entries to look up:
+            {"file": "image.raw", "entries": [247645, 247650]}
+        and the response holds the resolved information or the error for each entry, in order:
+            {"results": [{"Tag Value": "0xA000000C", ...}, {"error": "..."}]}
+
+        :param address:    A Unix socket path, or a (host, port) tuple to listen on with TCP.  A stale
+                           socket left at the path is replaced, but any other file is left alone.
+        :param max_images: The number of images to keep open
+        """
+
+        self.address = address
+        self.max_images = max_images
+
+        self.__navigators = OrderedDict()
+        self.__navigators_lock = threading.Lock()
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+
+                    try:
+                        response = server.handleRequest(json.loads(line))
+                    except Exception as ex:
+                        response = {"error": str(ex)}
+
+                    self.wfile.write(json.dumps(response).encode() + b"\n")
+                    self.wfile.flush()
+
+        if isinstance(address, str):
+            if os.path.lexists(address):
+                if not stat.S_ISSOCK(os.lstat(address).st_mode):
+                    raise Exception(f"[-] ERROR: {address} exists and is not a socket")
+                os.unlink(address)
+            self.__server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        else:
+            self.__server = socketserver.ThreadingTCPServer(address, Handler)
+        self.__server.daemon_threads = True
+
+
+    def __acquire(self, file_name: str) -> dict[str, Any]:
+        """
+        Gets the open image for a path, and marks it as in use until it is released.  A new image is
+        opened outside of the lock on the open images, so other requests are not held up while it is
+        parsed, and requests for the same image wait on its lock until it is open.
+
+        :param file_name: The path of the image
+
+        :return:          The image, with its navigator, the lock that must be held while using it,
+                          and the error raised if it could not be opened
+        """
+
+        key = os.path.realpath(file_name)
+
+        with self.__navigators_lock:
+            image = self.__navigators.get(key)
+            opening = image is None
+
+            if opening:
+                image = {"navigator": None, "lock": threading.Lock(), "error": None, "users": 0, "retired": False}
+                self.__navigators[key] = image
+
+                # Nothing else holds the lock of a new image, so this never blocks
+                image["lock"].acquire()
+
+            self.__navigators.move_to_end(key)
+            image["users"] += 1
+
+        if opening:
+            try:
+                image["navigator"] = Navigator(file_name, resolve_paths=True)
+            except Exception as ex:
+                image["error"] = ex
+                with self.__navigators_lock:
+                    if self.__navigators.get(key) is image:
+                        del self.__navigators[key]
+            finally:
+                image["lock"].release()
+
+            self.__evict()
+
+        return image
+
+
+    def __release(self, image: dict[str, Any]) -> None:
+        """
+        Marks an image as no longer in use by a request, and closes it if it was evicted while it
+        was in use.
+
+        :param image: The image returned by __acquire
+
+        :return:      None
+        """
+
+        with self.__navigators_lock:
+            image["users"] -= 1
+            close = image["retired"] and image["users"] == 0
+
+        if close and image["navigator"] is not None:
+            image["navigator"].close()
+
+
+    def __evict(self) -> None:
+        """
+        Closes the least recently used images until at most max_images are open.  Images that are
+        in use are retired instead, and closed by the last request using them.
+
+        :return: None
+        """
+
+        closing = []
+        with self.__navigators_lock:
+            while len(self.__navigators) > self.max_images:
+                _, image = self.__navigators.popitem(last=False)
+                image["retired"] = True
+                if image["users"] == 0:
+                    closing.append(image)
+
+        for image in closing:
+            if image["navigator"] is not None:
+                image["navigator"].close()
+
+
+    def handleRequest(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Answers one request.
+
+        :param request: The request, with the image in "file" and the MFT entry numbers in "entries"
+
+        :return:        The response, with the information or error for each entry in "results"
+        """
+
+        image = self.__acquire(request["file"])
+        try:
+            with image["lock"]:
+                if image["error"] is not None:
+                    raise image["error"]
+
+                entries = image["navigator"].getEntries(request["entries"])
+        finally:
+            self.__release(image)
+
+        results = []
+        for info in entries:
+            if isinstance(info, Exception):
+                results.append({"error": str(info)})
+            else:
+                results.append(Interpreter(info).resolveAllInfo())
+
+        return {"results": results}
+
+
+    def serveForever(self) -> None:
+        """
+        Answers requests until shutdown() is called.
+
+        :return: None
+        """
+
+        self.__server.serve_forever()
+
+
+    def shutdown(self) -> None:
+        """
+        Stops answering requests and closes every open image.
+
+        :return: None
+        """
+
+        self.__server.shutdown()
+        self.__server.server_close()
+
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+        # Images still in use by a request are closed once it finishes
+        self.max_images = 0
+        self.__evict()
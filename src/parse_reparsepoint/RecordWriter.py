@@ -0,0 +1,190 @@
+from typing import IO, Any, Callable, Iterable, Mapping, Sequence, Type
+
+
+class RecordWriter:
+
+    # The number of records buffered before they are written out and the stream is flushed
+    BATCH_SIZE = 1024
+
+    # Whether the format is written to a binary stream instead of a text stream
+    BINARY = False
+
+    # The columns written by formats with a fixed layout, in order
+    COLUMNS = (
+        "MFT Entry",
+        "File Name",
+        "File Path",
+        "Tag Value",
+        "Tag Identity",
+        "Tag Description",
+        "Substitute Name",
+        "Print Name",
+        "Flag Info",
+        "OneDrive CID",
+        "OneDrive Account Type",
+        "Error",
+    )
+
+    # The writer class of each output format.  Use registerFormat to add to it.
+    FORMATS = {}
+
+    def __init__(self, stream: IO, columns: Sequence[str] = COLUMNS):
+        """
+        The base of the structured output writers.  Records are written as they are produced and
+        are only buffered in batches of BATCH_SIZE, so memory stays the same however many records
+        are written.  Subclasses implement writeBatch, and finish if the format needs a footer.
+
+        :param stream:  The stream to write to, binary if the format is BINARY and text otherwise
+        :param columns: The columns to write, for formats with a fixed layout
+        """
+
+        self.stream = stream
+        self.columns = list(columns)
+        self.count = 0
+
+        self.__batch = []
+
+
+    @classmethod
+    def registerFormat(cls, name: str) -> Callable[[Type["RecordWriter"]], Type["RecordWriter"]]:
+        """
+        Registers a writer class as the writer of an output format.
+
+        :param name: The name of the format, as given to --format
+
+        :return:     A function that registers the writer class it is given and returns it
+        """
+
+        def register(writer: Type["RecordWriter"]) -> Type["RecordWriter"]:
+            cls.FORMATS[name] = writer
+            return writer
+
+        return register
+
+
+    @classmethod
+    def create(cls, name: str, stream: IO, **kwargs) -> "RecordWriter":
+        """
+        Creates the writer of an output format.
+
+        :param name:   The name of the format
+        :param stream: The stream to write to
+        :param kwargs: Other arguments to create the writer with
+
+        :return:       The writer
+        """
+
+        if name not in cls.FORMATS:
+            raise Exception(f"[-] ERROR: Unknown output format: {name}")
+
+        return cls.FORMATS[name](stream, **kwargs)
+
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    @staticmethod
+    def toRow(info: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Converts the information returned by Interpreter.resolveAllInfo to a row.  The description of
+        known tags is stored under a misspelled key, which is renamed so every row uses the same column.
+
+        :param info: The information to convert
+
+        :return:     The row
+        """
+
+        return {
+            ("Tag Description" if key == "Tag Desctiption" else key): value for key, value in info.items()
+        }
+
+
+    def write(self, info: Mapping[str, Any]) -> None:
+        """
+        Writes the information about one reparse point.
+
+        :param info: The information returned by Interpreter.resolveAllInfo
+        """
+
+        self.__batch.append(self.toRow(info))
+        self.count += 1
+
+        if len(self.__batch) >= self.BATCH_SIZE:
+            self.flush()
+
+
+    def writeError(self, entry: int, error: Exception) -> None:
+        """
+        Writes the error raised while looking up an entry.
+
+        :param entry: The MFT entry number of the entry
+        :param error: The error
+        """
+
+        self.write({"MFT Entry": entry, "Error": str(error)})
+
+
+    def writeAll(self, infos: Iterable[Mapping[str, Any]]) -> int:
+        """
+        Writes the information about many reparse points, consuming them as they are produced.
+
+        :param infos: The information returned by Interpreter.resolveAllInfo for each reparse point
+
+        :return:      The number of records written
+        """
+
+        for info in infos:
+            self.write(info)
+
+        return self.count
+
+
+    def flush(self) -> None:
+        """
+        Writes out the buffered records and flushes the stream.
+
+        :return: None
+        """
+
+        if self.__batch:
+            self.writeBatch(self.__batch)
+            self.__batch = []
+
+        self.stream.flush()
+
+
+    def close(self) -> None:
+        """
+        Writes out the buffered records and finishes the output.  The stream is left open.
+
+        :return: None
+        """
+
+        self.flush()
+        self.finish()
+        self.stream.flush()
+
+
+    def writeBatch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Writes a batch of rows to the stream.
+
+        :param rows: The rows to write
+        """
+
+        raise NotImplementedError
+
+
+    def finish(self) -> None:
+        """
+        Writes anything the format needs after the last row.
+
+        :return: None
+        """
+
+        pass
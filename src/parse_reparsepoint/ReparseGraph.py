@@ -0,0 +1,356 @@
+from typing import Iterable, Optional, Union
+
+from .Interpreter import Interpreter
+from .Navigator import Navigator
+from .ReparseRecord import ReparseRecord
+
+
+class ReparseGraph:
+
+    # The tags of the reparse points that redirect to another path
+    LINK_TAGS = frozenset((0xA000000C, 0xA0000003))
+
+    # How the target of a link was resolved.  A dangling link ends at a path that does not exist on
+    # the volume, an external one ends on another volume or a network share, and a looping one never
+    # ends, or passes through more than MAX_HOPS links.
+    RESOLVED = "resolved"
+    DANGLING = "dangling"
+    EXTERNAL = "external"
+    LOOP = "loop"
+
+    # The most links followed when resolving a path, after which Windows gives up as well
+    MAX_HOPS = 63
+
+    # The prefixes of substitute names that mark them as NT namespace paths
+    NT_PREFIXES = ("\\??\\", "\\\\?\\", "\\\\.\\")
+
+    def __init__(self, navigator: Navigator, records: Optional[Iterable[ReparseRecord]] = None, drive: str = "C:"):
+        """
+        Maps every symbolic link and junction of a volume to where it finally leads.  The target of
+        each link is resolved through every link it passes through, and then looked up in the
+        directory indexes of the volume.  Each link is resolved once and memoized, so the links of
+        long chains and of many links into one directory are only followed once, and loops are found
+        as they are followed.
+
+        Once built, the final target of a link, the links it passes through, and the links that lead
+        into a directory are each found with dictionary lookups.
+
+        :param navigator: The navigator of the volume, used to look up target paths
+        :param records:   The reparse points of the volume.  Defaults to a sweep of the volume.  Only
+                          symbolic links and mount points are kept.
+        :param drive:     The drive letter the volume was mounted as.  Targets on other drives are
+                          external.
+        """
+
+        self.navigator = navigator
+        self.drive = drive.rstrip(":\\").upper() + ":"
+
+        # The symbolic links and mount points of the volume, by MFT entry number
+        self.records = {}
+
+        # The link at each path, and the direct target of each link as path components, or as the
+        # external path when it leads off the volume
+        self.__links = {}
+        self.__targets = {}
+
+        # The status, final path and links followed of each resolved link
+        self.__resolved = {}
+
+        # The MFT entry number of each path looked up, and the files of each directory listed
+        self.__entries = {(): Navigator.ROOT_ENTRY}
+        self.__directories = {}
+
+        # The links whose final target is in each directory
+        self.__redirects = {}
+
+        for record in navigator.sweepEntries() if records is None else records:
+            if record.tag in self.LINK_TAGS:
+                self.__addLink(record)
+
+        for entry in self.records:
+            self.__resolve(entry, [])
+
+        for entry, (status, path, _) in self.__resolved.items():
+            if status in (self.RESOLVED, self.DANGLING) and path is not None:
+                for depth in range(len(path) + 1):
+                    self.__redirects.setdefault(self.__key(path[:depth]), []).append(entry)
+
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+    @staticmethod
+    def __key(path: tuple[str, ...]) -> tuple[str, ...]:
+        """
+        :param path: The components of a path
+
+        :return:     The components compared case insensitively, as NTFS names are
+        """
+
+        return tuple(name.upper() for name in path)
+
+
+    def __stripPrefix(self, path: str) -> str:
+        """
+        :param path: A substitute name, which can be an NT namespace path
+
+        :return:     The path as Win32 writes it, e.g. C:\\Users or \\\\server\\share
+        """
+
+        for prefix in self.NT_PREFIXES:
+            if path.startswith(prefix):
+                path = path[len(prefix) :]
+                if path.upper().startswith("UNC\\"):
+                    path = "\\" + path[3:]
+                break
+
+        return path
+
+
+    def __parsePath(self, path: str, directory: tuple[str, ...] = ()) -> Optional[tuple[str, ...]]:
+        """
+        Splits a path on the volume into its components, with "." and ".." applied.
+
+        :param path:      The path, absolute on the drive of the volume, rooted, or relative
+        :param directory: The components of the directory a relative path is relative to
+
+        :return:          The components of the path, or None if it is not on the volume
+        """
+
+        path = self.__stripPrefix(path)
+
+        if path[1:2] == ":":
+            if path[:2].upper() != self.drive:
+                return None
+            path, directory = path[2:], ()
+        elif path.startswith("\\\\") or path.upper().startswith("VOLUME{"):
+            return None
+        elif path.startswith("\\"):
+            directory = ()
+
+        components = list(directory)
+        for name in path.split("\\"):
+            if name == "..":
+                # Going up from the root stays in the root, as it does on Windows
+                if components:
+                    components.pop()
+            elif name not in ("", "."):
+                components.append(name)
+
+        return tuple(components)
+
+
+    def __formatPath(self, path: tuple[str, ...]) -> str:
+        """
+        :param path: The components of a path on the volume
+
+        :return:     The path, with the drive letter of the volume
+        """
+
+        return self.drive + "\\" + "\\".join(path)
+
+
+    def __addLink(self, record: ReparseRecord) -> None:
+        """
+        Adds a symbolic link or mount point to the graph.
+
+        :param record: The reparse point
+        """
+
+        file_path = record.file_path
+        if file_path is None:
+            directory = self.navigator.getDirectoryPath(record.parent_entry, record.parent_sequence)
+            file_path = f"{directory}\\{record.file_name}"
+
+        path = self.__parsePath(file_path)
+        self.records[record.mft_entry] = record
+        self.__links[self.__key(path)] = record.mft_entry
+
+        try:
+            substitute_name, relative = Interpreter(record).resolveLinkTarget()
+        except ValueError:
+            self.__targets[record.mft_entry] = None
+            return
+
+        # Symbolic links are relative to the directory holding them
+        target = self.__parsePath(substitute_name, path[:-1] if relative else ())
+        self.__targets[record.mft_entry] = target if target is not None else self.__stripPrefix(substitute_name)
+
+
+    def __findLink(self, path: tuple[str, ...]) -> Optional[tuple[int, int]]:
+        """
+        Finds the first link a path passes through.
+
+        :param path: The components of the path
+
+        :return:     The MFT entry number of the link and the number of components of its path, or
+                     None if the path passes through no link
+        """
+
+        key = self.__key(path)
+        for depth in range(1, len(key) + 1):
+            if key[:depth] in self.__links:
+                return self.__links[key[:depth]], depth
+
+        return None
+
+
+    def __resolve(
+        self, entry: int, following: list[int]
+    ) -> tuple[str, Union[tuple[str, ...], str, None], tuple[int, ...]]:
+        """
+        Resolves the final target of a link, following every link its target passes through.  Links
+        found to loop back into the links being followed are resolved as loops, and so are links
+        reached after more than MAX_HOPS links, without following them any further.
+
+        :param entry:     The MFT entry number of the link
+        :param following: The links being resolved that lead to this one
+
+        :return:          The status, the final path as components, as an external path, or None if
+                          the target could not be parsed, and the links followed, starting with
+                          this one
+        """
+
+        if entry in self.__resolved:
+            return self.__resolved[entry]
+
+        path = self.__targets[entry]
+        chain = (entry,)
+        following.append(entry)
+
+        # Whether the result was cut short by the links followed to get here
+        truncated = False
+
+        if path is None:
+            result = (self.DANGLING, None, chain)
+        elif isinstance(path, str):
+            result = (self.EXTERNAL, path, chain)
+        else:
+            result = None
+
+        while result is None:
+            link = self.__findLink(path)
+            if link is None:
+                status = self.RESOLVED if self.__lookup(path) is not None else self.DANGLING
+                result = (status, path, chain)
+                break
+
+            # A link that is still being resolved leads back to itself
+            link_entry, depth = link
+            if link_entry in following:
+                result = (self.LOOP, path, chain + (link_entry,))
+                break
+
+            # Too many links were followed to get here.  Whether this link loops on its own depends on
+            # the links after it, so the result is only kept if the chain is too long by itself.
+            if len(following) > self.MAX_HOPS:
+                result = (self.LOOP, path, chain + (link_entry,))
+                truncated = True
+                break
+
+            status, link_path, link_chain = self.__resolve(link_entry, following)
+            chain += link_chain
+            truncated = truncated or link_entry not in self.__resolved
+
+            if status == self.LOOP or len(chain) > self.MAX_HOPS:
+                result = (self.LOOP, path, chain)
+            elif status == self.EXTERNAL:
+                result = (self.EXTERNAL, "\\".join((link_path.rstrip("\\"),) + path[depth:]), chain)
+            elif link_path is None:
+                result = (self.DANGLING, None, chain)
+            else:
+                path = link_path + path[depth:]
+
+        following.pop()
+        if not truncated or len(result[2]) > self.MAX_HOPS:
+            self.__resolved[entry] = result
+        return result
+
+
+    def __lookup(self, path: tuple[str, ...]) -> Optional[int]:
+        """
+        Looks up a path in the directory indexes of the volume.  Every directory listed and path
+        looked up is memoized.
+
+        :param path: The components of the path
+
+        :return:     The MFT entry number of the file at the path, or None if it does not exist
+        """
+
+        key = self.__key(path)
+        if key in self.__entries:
+            return self.__entries[key]
+
+        directory = self.__lookup(path[:-1])
+        entry = None
+
+        if directory is not None:
+            if directory not in self.__directories:
+                try:
+                    files = self.navigator.listDirectory(directory)
+                except Exception:
+                    files = {}
+                self.__directories[directory] = {name.upper(): file_entry for name, file_entry in files.items()}
+
+            entry = self.__directories[directory].get(key[-1])
+
+        self.__entries[key] = entry
+        return entry
+
+
+    def getFinalTarget(self, entry: int) -> tuple[str, Optional[str], Optional[int]]:
+        """
+        :param entry: The MFT entry number of a symbolic link or mount point
+
+        :return:      How the target was resolved, the final target path, or None if the target of
+                      a link could not be parsed, and the MFT entry number of the final target, or
+                      None if it is not on the volume
+        """
+
+        if entry not in self.records:
+            raise Exception(f"[-] ERROR: MFT entry {entry} is not a symbolic link or mount point")
+
+        status, path, _ = self.__resolved[entry]
+        if path is None or isinstance(path, str):
+            return status, path, None
+
+        return status, self.__formatPath(path), self.__lookup(path) if status == self.RESOLVED else None
+
+
+    def getChain(self, entry: int) -> list[int]:
+        """
+        :param entry: The MFT entry number of a symbolic link or mount point
+
+        :return:      The MFT entry numbers of the links followed to the final target, starting
+                      with this one.  The chain of a loop ends with the link that led back into it.
+        """
+
+        if entry not in self.records:
+            raise Exception(f"[-] ERROR: MFT entry {entry} is not a symbolic link or mount point")
+
+        return list(self.__resolved[entry][2])
+
+
+    def getRedirectsInto(self, path: str) -> list[int]:
+        """
+        Finds the links whose final target is in a directory, or is the path itself.
+
+        :param path: The path on the volume, with or without the drive letter
+
+        :return:     The MFT entry numbers of the links
+        """
+
+        components = self.__parsePath(path)
+        if components is None:
+            return []
+
+        return sorted(self.__redirects.get(self.__key(components), []))
+
+
+    def getLoops(self) -> list[int]:
+        """
+        :return: The MFT entry numbers of the links that never reach a final target
+        """
+
+        return sorted(entry for entry, (status, _, _) in self.__resolved.items() if status == self.LOOP)
@@ -0,0 +1,190 @@
+import struct
+from typing import Container, Iterable, Optional
+
+from .FixupBatch import FixupBatch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ReparsePrefilter:
+
+    # The attribute types the prefilter looks for.  An entry with an $ATTRIBUTE_LIST can keep its
+    # reparse attribute in an extension entry, so it has to be parsed to know.
+    REPARSE_ATTRIBUTE = 0xC0
+    ATTRIBUTE_LIST = 0x20
+    MATCHED_ATTRIBUTES = (ATTRIBUTE_LIST, REPARSE_ATTRIBUTE)
+
+    # The type that ends the attributes of an entry
+    END_MARKER = 0xFFFFFFFF
+
+    # The size of the header of a resident attribute, which ends with the offset to its content
+    RESIDENT_HEADER_SIZE = 0x18
+
+    def __init__(self, tags: Optional[Iterable[int]] = None, use_numpy: bool = True, in_use_only: bool = True):
+        """
+        Picks out the MFT entries of a fixed up batch that may be reparse points, from the offsets
+        and types in their attribute headers alone, so the rest are never parsed.  An entry survives
+        when it is valid, in use, a base entry, and has a reparse attribute or an attribute list.
+
+        When tags are given, an entry with a resident reparse attribute also has to have one of the
+        tags.  The tag of a non-resident reparse attribute, or of one in an extension entry, is not
+        stored in the entry, so those entries survive and their tag is checked after parsing.
+
+        When NumPy is installed every entry of a batch is checked at once, otherwise each entry is
+        checked in Python.
+
+        :param tags:        The reparse tags to keep, or None to keep every reparse point
+        :param use_numpy:   Whether to use NumPy if it is installed
+        :param in_use_only: Whether entries have to be in use.  Carved records of deleted files are
+                            kept even though they are not.
+        """
+
+        self.tags = frozenset(tags) if tags is not None else None
+        self.use_numpy = use_numpy
+        self.in_use_only = in_use_only
+
+
+    def filter(self, batch: FixupBatch) -> list[int]:
+        """
+        :param batch: The fixed up entries to check
+
+        :return:      The indexes of the entries in the batch that may be reparse points
+        """
+
+        if self.use_numpy and np is not None:
+            return self.__filterNumpy(batch)
+
+        return [index for index in range(len(batch)) if batch.valid[index] and self.__matchEntry(batch[index])]
+
+
+    @classmethod
+    def findAttribute(
+        cls, entry_bytes: memoryview, attr_types: Container[int]
+    ) -> Optional[tuple[int, int, int]]:
+        """
+        Walks the attribute headers of one entry up to the first attribute of one of the types,
+        without parsing any attribute.
+
+        :param entry_bytes: The fixed up entry
+        :param attr_types:  The attribute types to look for
+
+        :return:            The type, offset and length of the attribute, or None if the entry has
+                            no attribute of the types
+        """
+
+        entry_size = len(entry_bytes)
+        attr_start = int.from_bytes(entry_bytes[0x14:0x16], "little")
+
+        while attr_start + 8 <= entry_size:
+            attr_type, attr_length = struct.unpack_from("<II", entry_bytes, attr_start)
+            if attr_type == cls.END_MARKER or attr_length == 0:
+                return None
+
+            if attr_type in attr_types:
+                return attr_type, attr_start, attr_length
+
+            attr_start += attr_length
+
+        return None
+
+
+    def __matchEntry(self, entry_bytes: memoryview) -> bool:
+        """
+        Walks the attribute headers of one entry.
+
+        :param entry_bytes: The fixed up entry
+
+        :return:            Whether the entry may be a reparse point
+        """
+
+        # The in use flag is stored at offset 0x16, and the reference to the base entry at offset 0x20
+        if (self.in_use_only and not entry_bytes[0x16] & 0x01) or any(entry_bytes[0x20:0x26]):
+            return False
+
+        attribute = self.findAttribute(entry_bytes, self.MATCHED_ATTRIBUTES)
+        if attribute is None:
+            return False
+
+        attr_type, attr_start, _ = attribute
+        if attr_type == self.ATTRIBUTE_LIST or self.tags is None:
+            return True
+
+        entry_size = len(entry_bytes)
+        if attr_start + self.RESIDENT_HEADER_SIZE > entry_size:
+            return False
+
+        # Resident attributes have a zero at offset 0x08, and the offset to their content at offset
+        # 0x14.  The tag is the first field of the content.
+        if entry_bytes[attr_start + 8]:
+            return True
+
+        content_offset = int.from_bytes(entry_bytes[attr_start + 0x14 : attr_start + 0x16], "little")
+        content_start = attr_start + content_offset
+        return (
+            content_start + 4 <= entry_size
+            and int.from_bytes(entry_bytes[content_start : content_start + 4], "little") in self.tags
+        )
+
+
+    def __filterNumpy(self, batch: FixupBatch) -> list[int]:
+        """
+        Walks the attribute headers of every entry at once with NumPy.  Each step reads the next
+        header of the entries still being walked, and drops the ones that ended or were decided.
+
+        :param batch: The fixed up entries to check
+
+        :return:      The indexes of the entries that may be reparse points
+        """
+
+        entry_size = batch.bytes_per_entry
+        data = np.frombuffer(batch.buffer, dtype=np.uint8)
+        entries = data.reshape(len(batch), entry_size)
+
+        def gather(positions: "np.ndarray", width: int) -> "np.ndarray":
+            value = data[positions].astype(np.int64)
+            for byte in range(1, width):
+                value |= data[positions + byte].astype(np.int64) << (8 * byte)
+            return value
+
+        candidates = np.array(batch.valid, dtype=bool) & ~entries[:, 0x20:0x26].any(axis=1)
+        if self.in_use_only:
+            candidates &= entries[:, 0x16] & 0x01 != 0
+        rows = np.flatnonzero(candidates)
+        starts = rows * entry_size
+        attr_starts = gather(starts + 0x14, 2)
+
+        survivors = []
+        while rows.size:
+            in_bounds = attr_starts + 8 <= entry_size
+            rows, starts, attr_starts = rows[in_bounds], starts[in_bounds], attr_starts[in_bounds]
+
+            positions = starts + attr_starts
+            attr_types = gather(positions, 4)
+            attr_lengths = gather(positions + 4, 4)
+
+            matched = attr_types == self.ATTRIBUTE_LIST
+            reparse = attr_types == self.REPARSE_ATTRIBUTE
+
+            if self.tags is None:
+                matched |= reparse
+            else:
+                # Non-resident reparse attributes have a non-zero byte at offset 0x08
+                header = reparse & (attr_starts + self.RESIDENT_HEADER_SIZE <= entry_size)
+                non_resident = header & (data[np.where(header, positions + 8, 0)] != 0)
+                resident = header & ~non_resident
+
+                content_starts = attr_starts + gather(np.where(resident, positions + 0x14, 0), 2)
+                resident &= content_starts + 4 <= entry_size
+                tags = gather(np.where(resident, starts + content_starts, 0), 4)
+                matched |= non_resident | (resident & np.isin(tags, list(self.tags)))
+
+            survivors.extend(rows[matched].tolist())
+
+            ongoing = ~(matched | reparse | (attr_types == self.END_MARKER) | (attr_lengths == 0))
+            rows, starts, attr_starts = rows[ongoing], starts[ongoing], attr_starts[ongoing] + attr_lengths[ongoing]
+
+        survivors.sort()
+        return survivors
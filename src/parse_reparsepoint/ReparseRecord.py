@@ -0,0 +1,218 @@
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+from .Interpreter import Interpreter
+
+
+class ReparseRecord(Mapping):
+
+    # The keys of the dictionary view, in the order they are listed
+    KEYS = (
+        "reparse_tag",
+        "reparse_data",
+        "file_name",
+        "parent_entry",
+        "parent_sequence",
+        "mft_entry",
+        "file_path",
+    )
+
+    __slots__ = (
+        "tag",
+        "data",
+        "name_data",
+        "parent_entry",
+        "parent_sequence",
+        "mft_entry",
+        "file_path",
+        "__file_name",
+        "__info",
+    )
+
+    def __init__(
+        self,
+        tag: int,
+        data: bytes,
+        name_data: Optional[bytes] = None,
+        parent_entry: Optional[int] = None,
+        parent_sequence: Optional[int] = None,
+        mft_entry: Optional[int] = None,
+        file_path: Optional[str] = None,
+    ):
+        """
+        A reparse point found in the MFT.  Only the raw tag, reparse data and file name are kept, and
+        the file name and the interpreted information are decoded the first time they are used, so
+        large sweeps do not pay for decoding records that are never looked at.
+
+        The record is also a mapping with the keys of the dictionaries the Navigator used to return,
+        so record["file_name"] and dict(record) keep working.
+
+        :param tag:             The reparse tag
+        :param data:            The reparse data
+        :param name_data:       The UTF-16 file name of the entry
+        :param parent_entry:    The MFT entry number of the parent directory
+        :param parent_sequence: The sequence number of the parent directory
+        :param mft_entry:       The MFT entry number of the entry
+        :param file_path:       The full path of the entry
+        """
+
+        self.tag = tag
+        self.data = data
+        self.name_data = name_data
+        self.parent_entry = parent_entry
+        self.parent_sequence = parent_sequence
+        self.mft_entry = mft_entry
+        self.file_path = file_path
+
+        self.__file_name = None
+        self.__info = None
+
+
+    @classmethod
+    def fromDict(cls, data: dict[str, Any]) -> "ReparseRecord":
+        """
+        Builds a record from its dictionary view, like the ones stored in a ResultCache.
+
+        :param data: The dictionary view of the record
+
+        :return:     The record
+        """
+
+        record = cls(
+            int.from_bytes(data["reparse_tag"], "little"),
+            data["reparse_data"],
+            parent_entry=data.get("parent_entry"),
+            parent_sequence=data.get("parent_sequence"),
+            mft_entry=data.get("mft_entry"),
+            file_path=data.get("file_path"),
+        )
+        record.__file_name = data.get("file_name")
+
+        return record
+
+
+    def __getstate__(self) -> tuple:
+        """
+        Pickles the raw fields, leaving out the interpreted information.
+
+        :return: The fields of the record
+        """
+
+        return (
+            self.tag,
+            self.data,
+            self.name_data,
+            self.parent_entry,
+            self.parent_sequence,
+            self.mft_entry,
+            self.file_path,
+            self.__file_name,
+        )
+
+
+    def __setstate__(self, state: tuple) -> None:
+        (
+            self.tag,
+            self.data,
+            self.name_data,
+            self.parent_entry,
+            self.parent_sequence,
+            self.mft_entry,
+            self.file_path,
+            self.__file_name,
+        ) = state
+        self.__info = None
+
+
+    def __repr__(self) -> str:
+        return f"ReparseRecord({dict(self)!r})"
+
+
+    @property
+    def reparse_tag(self) -> bytes:
+        """
+        :return: The reparse tag as it is stored on disk
+        """
+
+        return self.tag.to_bytes(4, "little")
+
+
+    @property
+    def reparse_data(self) -> bytes:
+        """
+        :return: The reparse data
+        """
+
+        return self.data
+
+
+    @property
+    def file_name(self) -> Optional[str]:
+        """
+        :return: The file name of the entry, decoded on first use
+        """
+
+        if self.__file_name is None and self.name_data is not None:
+            self.__file_name = bytes(self.name_data).decode("utf-16-le")
+
+        return self.__file_name
+
+
+    @property
+    def info(self) -> dict[str, str]:
+        """
+        :return: The human-readable information about the reparse point, interpreted on first use
+        """
+
+        if self.__info is None:
+            self.__info = Interpreter(self).resolveAllInfo()
+
+        return self.__info
+
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+
+        return value
+
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """
+        Sets a field through the dictionary view, for code written against the old dictionaries.
+
+        :param key:   The key of the field
+        :param value: The new value
+        """
+
+        if key == "reparse_tag":
+            self.tag = int.from_bytes(value, "little")
+        elif key == "reparse_data":
+            self.data = value
+        elif key == "file_name":
+            self.__file_name = value
+        elif key in self.KEYS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+        self.__info = None
+
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self.KEYS if key in self)
+
+
+    def __contains__(self, key: object) -> bool:
+        if key == "file_name":
+            return self.__file_name is not None or self.name_data is not None
+
+        return key in self.KEYS and getattr(self, key) is not None
+
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,368 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+
+class ResultCache:
+
+    # The default location of the cache database
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "parse-reparsepoint", "cache.sqlite")
+
+    # The number of cached entries kept across all images before the least recently used are evicted
+    DEFAULT_MAX_ENTRIES = 1000000
+
+    # The number of images kept before the least recently used are evicted, with their entries
+    DEFAULT_MAX_IMAGES = 1000
+
+    # The number of entries stored between checks of the size bound
+    EVICT_INTERVAL = 1000
+
+    # The number of entries looked up by each query of a batch lookup, below the SQLite limit on
+    # the number of parameters of a query
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        cache_path: str = DEFAULT_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_images: int = DEFAULT_MAX_IMAGES,
+    ):
+        """
+        Opens, or creates, an SQLite database that caches the parsed geometry of images and the
+        results of looking up their entries.  Images are identified by their path, the size and
+        modification time of each of their segments, and a hash of their boot sector, so a modified
+        image never returns stale results.
+
+        :param cache_path:  The path of the cache database
+        :param max_entries: The number of cached entries to keep before evicting the least recently used
+        :param max_images:  The number of images to keep before evicting the least recently used
+        """
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_images = max_images
+        self.__puts_since_evict = 0
+
+        self.__db = sqlite3.connect(cache_path)
+        self.__db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                image_key TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                geometry TEXT NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                image_key TEXT NOT NULL,
+                entry INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                info TEXT,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (image_key, entry)
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used);
+            """
+        )
+
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Enforces the size bound and closes the database.
+
+        :return: None
+        """
+
+        self.__evict()
+        self.__db.commit()
+        self.__db.close()
+
+
+    def __encode(self, data: dict[str, Any]) -> str:
+        """
+        Serializes a dictionary to JSON, storing bytes values as base64.
+
+        :param data: The dictionary to serialize
+
+        :return:     The JSON string
+        """
+
+        return json.dumps(
+            {
+                key: {"$bytes": base64.b64encode(value).decode()} if isinstance(value, bytes) else value
+                for key, value in data.items()
+            }
+        )
+
+
+    def __decode(self, data: str) -> dict[str, Any]:
+        """
+        Deserializes a dictionary stored by __encode.
+
+        :param data: The JSON string
+
+        :return:     The dictionary
+        """
+
+        return {
+            key: base64.b64decode(value["$bytes"]) if isinstance(value, dict) and "$bytes" in value else value
+            for key, value in json.loads(data).items()
+        }
+
+
+    def __evict(self) -> None:
+        """
+        Deletes the least recently used images and their entries until at most max_images are
+        cached, then the least recently used entries until at most max_entries are cached.  Images
+        that were modified are never looked up again, so they are evicted this way too.
+
+        :return: None
+        """
+
+        self.__puts_since_evict = 0
+
+        evicted = "SELECT image_key FROM images ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?"
+        self.__db.execute(f"DELETE FROM entries WHERE image_key IN ({evicted})", (self.max_images,))
+        self.__db.execute(f"DELETE FROM images WHERE image_key IN ({evicted})", (self.max_images,))
+
+        self.__db.execute(
+            """
+            DELETE FROM entries WHERE rowid IN (
+                SELECT rowid FROM entries ORDER BY last_used, rowid
+                LIMIT MAX(0, (SELECT COUNT(*) FROM entries) - ?)
+            )
+            """,
+            (self.max_entries,),
+        )
+
+
+    def getImageKey(self, segments: list[str], boot: bytes, partition_offset: int = 0) -> str:
+        """
+        Builds the key identifying an image from its path, the size and modification time of each
+        of its segments, its boot sector, and the offset of the volume for volumes inside a disk
+        image.  Modifying any segment of a split image changes the key.
+
+        :param segments:         The paths of the segments of the image, in order
+        :param boot:             The boot sector of the volume
+        :param partition_offset: The byte offset of the volume in the image
+
+        :return:                 The image key
+        """
+
+        identity = f"{os.path.realpath(segments[0])}|".encode()
+        for segment in segments:
+            stat = os.stat(segment)
+            identity += f"{stat.st_size}|{stat.st_mtime_ns}|".encode()
+        if partition_offset:
+            identity += f"{partition_offset}|".encode()
+
+        return hashlib.sha256(identity + hashlib.sha256(bytes(boot)).digest()).hexdigest()
+
+
+    def getGeometry(self, image_key: str) -> Optional[dict[str, Any]]:
+        """
+        :param image_key: The key of the image
+
+        :return:          The cached geometry of the image, or None if it is not cached
+        """
+
+        row = self.__db.execute("SELECT geometry FROM images WHERE image_key = ?", (image_key,)).fetchone()
+        if row is None:
+            return None
+
+        # Commit the touch at once, so no write transaction is left open to lock out other processes
+        self.__db.execute("UPDATE images SET last_used = ? WHERE image_key = ?", (time.time(), image_key))
+        self.__db.commit()
+        return json.loads(row[0])
+
+
+    def putGeometry(self, image_key: str, file_name: str, geometry: dict[str, Any]) -> None:
+        """
+        Caches the geometry of an image.
+
+        :param image_key: The key of the image
+        :param file_name: The path of the image
+        :param geometry:  The geometry to cache
+        """
+
+        self.__db.execute(
+            "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?)",
+            (image_key, os.path.realpath(file_name), json.dumps(geometry), time.time()),
+        )
+        self.__db.commit()
+
+
+    def getEntry(self, image_key: str, entry: int) -> Optional[dict[str, Any]]:
+        """
+        Looks up the cached result of Navigator.getEntry.  If the lookup failed when it was cached,
+        the same error is raised again.
+
+        :param image_key: The key of the image
+        :param entry:     The MFT entry number
+
+        :return:          The cached result, or None if it is not cached
+        """
+
+        row = self.__db.execute(
+            "SELECT result, error FROM entries WHERE image_key = ? AND entry = ?", (image_key, entry)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self.__db.execute(
+            "UPDATE entries SET last_used = ? WHERE image_key = ? AND entry = ?",
+            (time.time(), image_key, entry),
+        )
+        self.__db.commit()
+        if row[1] is not None:
+            raise Exception(row[1])
+
+        return self.__decode(row[0])
+
+
+    def getEntries(
+        self, image_key: str, entries: Iterable[int]
+    ) -> dict[int, tuple[Optional[dict[str, Any]], Optional[str]]]:
+        """
+        Looks up the cached results of many lookups at once, and marks them as used in one
+        transaction, so a batch is read with a single commit.
+
+        :param image_key: The key of the image
+        :param entries:   The MFT entry numbers
+
+        :return:          The cached result or error message of each entry that is cached, by MFT
+                          entry number
+        """
+
+        entries = list(dict.fromkeys(entries))
+        cached = {}
+
+        for start in range(0, len(entries), self.LOOKUP_BATCH_SIZE):
+            batch = entries[start : start + self.LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.__db.execute(
+                f"SELECT entry, result, error FROM entries WHERE image_key = ? AND entry IN ({placeholders})",
+                [image_key] + batch,
+            )
+            for entry, result, error in rows:
+                cached[entry] = (None if result is None else self.__decode(result), error)
+
+        if cached:
+            now = time.time()
+            self.__db.executemany(
+                "UPDATE entries SET last_used = ? WHERE image_key = ? AND entry = ?",
+                [(now, image_key, entry) for entry in cached],
+            )
+            self.__db.commit()
+
+        return cached
+
+
+    def putEntry(
+        self, image_key: str, entry: int, result: Optional[dict[str, Any]], error: Optional[str] = None
+    ) -> None:
+        """
+        Caches the result of Navigator.getEntry, or the error it raised.
+
+        :param image_key: The key of the image
+        :param entry:     The MFT entry number
+        :param result:    The result to cache
+        :param error:     The error message to cache instead of a result
+        """
+
+        self.putEntries(image_key, [(entry, result, error)])
+
+
+    def putEntries(
+        self, image_key: str, results: Iterable[tuple[int, Optional[dict[str, Any]], Optional[str]]]
+    ) -> None:
+        """
+        Caches the results of many lookups in one transaction, so a batch is written with a single
+        commit.
+
+        :param image_key: The key of the image
+        :param results:   The MFT entry number of each lookup, and its result or error message
+        """
+
+        now = time.time()
+        rows = [
+            (image_key, entry, None if result is None else self.__encode(result), error, now)
+            for entry, result, error in results
+        ]
+
+        self.__db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, NULL, ?)", rows)
+
+        self.__puts_since_evict += len(rows)
+        if self.__puts_since_evict >= self.EVICT_INTERVAL:
+            self.__evict()
+
+        self.__db.commit()
+
+
+    def getInfo(self, image_key: str, entry: int) -> Optional[dict[str, Any]]:
+        """
+        :param image_key: The key of the image
+        :param entry:     The MFT entry number
+
+        :return:          The cached result of Interpreter.resolveAllInfo, or None if it is not cached
+        """
+
+        row = self.__db.execute(
+            "SELECT info FROM entries WHERE image_key = ? AND entry = ?", (image_key, entry)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        return json.loads(row[0])
+
+
+    def putInfo(self, image_key: str, entry: int, info: dict[str, Any]) -> None:
+        """
+        Caches the result of Interpreter.resolveAllInfo for an entry whose getEntry result is cached.
+
+        :param image_key: The key of the image
+        :param entry:     The MFT entry number
+        :param info:      The result to cache
+        """
+
+        self.__db.execute(
+            "UPDATE entries SET info = ? WHERE image_key = ? AND entry = ?",
+            (json.dumps(info), image_key, entry),
+        )
+        self.__db.commit()
+
+
+    def invalidate(self, file_name: Optional[str] = None) -> None:
+        """
+        Removes cached results.
+
+        :param file_name: The path of the image to remove the results of.  Everything is removed if omitted.
+        """
+
+        if file_name is None:
+            self.__db.execute("DELETE FROM entries")
+            self.__db.execute("DELETE FROM images")
+        else:
+            self.__db.execute(
+                "DELETE FROM entries WHERE image_key IN (SELECT image_key FROM images WHERE file_name = ?)",
+                (os.path.realpath(file_name),),
+            )
+            self.__db.execute("DELETE FROM images WHERE file_name = ?", (os.path.realpath(file_name),))
+
+        self.__db.commit()
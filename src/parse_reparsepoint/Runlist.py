@@ -0,0 +1,142 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterator
+
+
+class Runlist:
+
+    # The LCN stored for sparse runs, which have no clusters allocated on disk
+    SPARSE = -1
+
+    def __init__(self, runlist: bytes):
+        """
+        Parses the runlist of a non-resident attribute into a list of extents.  Each extent is stored
+        as its starting VCN, its starting LCN and its length in clusters, so memory use scales with the
+        number of fragments instead of the number of clusters.
+
+        :param runlist: The raw runlist to parse
+        """
+
+        self.vcns = array("q")
+        self.lcns = array("q")
+        self.lengths = array("q")
+
+        runlist = memoryview(runlist)
+        pos = 0
+        vcn = 0
+        lcn = 0
+
+        # Continue processing until 0x00 is reached.  This marks the end of the runlist.
+        while pos < len(runlist) and runlist[pos] != 0x00:
+            # The number of bytes in the offset and length fields are stored in the first byte. The
+            # upper 4 bits are the number of bytes in the offset and the lower 4 bits are the number
+            # of bytes in the length.
+            offset_length = runlist[pos] >> 4
+            length_length = runlist[pos] & 0x0F
+            pos += 1
+
+            # The number of consecutive clusters in the run.  Unlike the offset, the length is unsigned.
+            length = int.from_bytes(runlist[pos : pos + length_length], "little")
+            pos += length_length
+
+            if length <= 0:
+                raise Exception(f"[-] ERROR: Runlist has a run of {length} clusters")
+
+            # The offset of the start of the current run from the start of the previous run.  Since
+            # the start of the current run can be before the start of the previous run, the offset
+            # is signed.  A run without an offset is sparse and has no clusters on disk.
+            if offset_length:
+                lcn += int.from_bytes(runlist[pos : pos + offset_length], "little", signed=True)
+                self.lcns.append(lcn)
+            else:
+                self.lcns.append(self.SPARSE)
+            pos += offset_length
+
+            self.vcns.append(vcn)
+            self.lengths.append(length)
+            vcn += length
+
+        self.total_clusters = vcn
+
+
+    @classmethod
+    def fromExtents(cls, extents: list[tuple[int, int, int]]) -> "Runlist":
+        """
+        Builds a runlist from extents previously returned by extents(), without parsing raw bytes.
+
+        :param extents: Tuples of the starting VCN, the starting LCN and the length in clusters of each extent
+
+        :return:        The runlist
+        """
+
+        runlist = cls(b"")
+        for vcn, lcn, length in extents:
+            runlist.vcns.append(vcn)
+            runlist.lcns.append(lcn)
+            runlist.lengths.append(length)
+            runlist.total_clusters = vcn + length
+
+        return runlist
+
+
+    def __len__(self) -> int:
+        """
+        :return: The total number of clusters the runlist spans
+        """
+
+        return self.total_clusters
+
+
+    def __getitem__(self, vcn: int) -> int:
+        """
+        Allows the runlist to be indexed like a list of clusters.
+
+        :param vcn: The virtual cluster number to look up
+
+        :return:    The logical cluster number the VCN maps to
+        """
+
+        return self.lookup(vcn)
+
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterates over every logical cluster number in the runlist, in VCN order.
+
+        :return: The logical cluster numbers
+        """
+
+        for _, lcn, length in self.extents():
+            for i in range(length):
+                yield self.SPARSE if lcn == self.SPARSE else lcn + i
+
+
+    def lookup(self, vcn: int) -> int:
+        """
+        Finds the logical cluster number a virtual cluster number maps to.
+
+        :param vcn: The virtual cluster number to look up
+
+        :return:    The logical cluster number, or Runlist.SPARSE if the cluster is sparse
+        """
+
+        if vcn < 0:
+            vcn += self.total_clusters
+        if not 0 <= vcn < self.total_clusters:
+            raise IndexError(f"[-] ERROR: VCN {vcn} is outside of the runlist")
+
+        extent = bisect_right(self.vcns, vcn) - 1
+        if self.lcns[extent] == self.SPARSE:
+            return self.SPARSE
+
+        return self.lcns[extent] + (vcn - self.vcns[extent])
+
+
+    def extents(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Iterates over the extents of the runlist.
+
+        :return: Tuples of the starting VCN, the starting LCN and the length in clusters of each extent
+        """
+
+        return zip(self.vcns, self.lcns, self.lengths)
@@ -0,0 +1,237 @@
+import bisect
+import mmap
+import os
+import re
+from typing import Optional, Union
+
+from .ImageSource import ImageSource
+
+
+class SegmentedImageSource(ImageSource):
+
+    # Split images are often stored on slower disks or shares, where fewer and larger reads pay off
+    DEFAULT_READAHEAD = 256 * 1024
+
+    # The numeric extension of a segment, e.g. the 001 of image.001
+    SEGMENT_REGEX = re.compile(r"^(.*\.)(\d+)$")
+
+    def __init__(self, path: str, use_mmap: bool = False, readahead: Optional[int] = None):
+        """
+        Reads a raw image split into numbered segments, such as image.001, image.002 and so on, as
+        one image.  Offsets are mapped across the segments, and reads that cross from one segment to
+        the next are stitched together, so the segments never have to be joined on disk.  Every
+        segment is kept open until the source is closed.
+
+        :param path:      The path of the first segment, or of the image without the .001 extension
+        :param use_mmap:  Whether to memory map the segments instead of reading them with syscalls
+        :param readahead: The number of bytes to read ahead of small reads, or None for the default
+        """
+
+        self.__starts = []
+        self.__sizes = []
+        self.__files = []
+        self.__maps = []
+        self.__views = []
+
+        super().__init__(path, use_mmap, readahead)
+
+
+    @classmethod
+    def findSegments(cls, path: str) -> list[str]:
+        """
+        Finds the segments of a split image.  Numbering continues from the path given for as long as
+        the next segment exists, keeping the width of the number.  A path that does not exist, but
+        has segments starting at path.001, is read as those segments.
+
+        :param path: The path of the first segment, or of the image without the .001 extension
+
+        :return:     The paths of the segments in order, just the path for an image that is not
+                     split, or an empty list if nothing exists at the path
+        """
+
+        if not os.path.exists(path):
+            if not os.path.exists(path + ".001"):
+                return []
+            path = path + ".001"
+
+        match = cls.SEGMENT_REGEX.match(path)
+        if match is None:
+            return [path]
+
+        prefix, number = match.group(1), match.group(2)
+        width = len(number)
+        number = int(number)
+
+        segments = []
+        while os.path.exists(f"{prefix}{number:0{width}d}"):
+            segments.append(f"{prefix}{number:0{width}d}")
+            number += 1
+
+        return segments
+
+
+    @classmethod
+    def openImage(cls, path: str, use_mmap: bool = False, readahead: Optional[int] = None) -> ImageSource:
+        """
+        Opens an image that may be split into segments.
+
+        :param path:      The path of the image, of its first segment, or of the image without the
+                          .001 extension
+        :param use_mmap:  Whether to memory map the image instead of reading it with syscalls
+        :param readahead: The number of bytes to read ahead of small reads, or None for the default
+
+        :return:          A SegmentedImageSource if the image has more than one segment, and an
+                          ImageSource otherwise
+        """
+
+        segments = cls.findSegments(path)
+        if not segments:
+            raise OSError(f"[-] ERROR: No such file or directory: {path}")
+
+        if len(segments) > 1:
+            return cls(path, use_mmap, readahead)
+
+        return ImageSource(segments[0], use_mmap, readahead)
+
+
+    def open(self) -> None:
+        """
+        Opens every segment, memory maps them if requested, and maps the offset each one starts at
+        in the image.
+
+        :return: None
+        """
+
+        self.segments = self.findSegments(self.path)
+        if not self.segments:
+            raise OSError(f"[-] ERROR: No such file or directory: {self.path}")
+
+        self.size = 0
+        self.__starts = []
+        self.__sizes = []
+        self.__files = []
+        self.__maps = []
+        self.__views = []
+
+        try:
+            for segment in self.segments:
+                handle = open(segment, "rb")
+                self.__files.append(handle)
+
+                size = os.fstat(handle.fileno()).st_size
+                self.__starts.append(self.size)
+                self.__sizes.append(size)
+                self.size += size
+
+                if self.use_mmap and size:
+                    segment_map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.__maps.append(segment_map)
+                    self.__views.append(memoryview(segment_map))
+                elif self.use_mmap:
+                    self.__maps.append(None)
+                    self.__views.append(memoryview(b""))
+        except Exception:
+            self.close()
+            raise
+
+
+    def close(self) -> None:
+        """
+        Releases the memory maps and closes every segment.
+
+        :return: None
+        """
+
+        super().close()
+
+        for view in self.__views:
+            view.release()
+        for segment_map in self.__maps:
+            if segment_map is not None:
+                try:
+                    segment_map.close()
+                except BufferError:
+                    pass
+        for handle in self.__files:
+            handle.close()
+
+        self.__views = []
+        self.__maps = []
+        self.__files = []
+
+
+    def advise(self, offset: int, length: int, hint: str) -> None:
+        """
+        Gives an access pattern hint for a range of the image, split over the segments it covers.
+
+        :param offset: The byte offset of the range
+        :param length: The length of the range
+        :param hint:   "sequential" or "willneed"
+
+        :return:       None
+        """
+
+        index = bisect.bisect_right(self.__starts, offset) - 1
+        if index < 0:
+            return
+
+        end = offset + length
+        while index < len(self.__files) and self.__starts[index] < end:
+            segment_start = max(offset, self.__starts[index]) - self.__starts[index]
+            segment_end = min(end - self.__starts[index], self.__sizes[index])
+            if segment_end > segment_start:
+                segment_map = self.__maps[index] if self.use_mmap else None
+                self.adviseFile(
+                    self.__files[index], segment_map, segment_start, segment_end - segment_start, hint
+                )
+            index += 1
+
+
+    def __readSegment(self, index: int, offset: int, length: int) -> Union[bytes, memoryview]:
+        """
+        Reads bytes from one segment.
+
+        :param index:  The index of the segment
+        :param offset: The byte offset to read from, relative to the start of the segment
+        :param length: The number of bytes to read
+
+        :return:       The bytes read
+        """
+
+        if self.use_mmap:
+            return self.__views[index][offset : offset + length]
+
+        handle = self.__files[index]
+        handle.seek(offset)
+        return handle.read(length)
+
+
+    def readRange(self, offset: int, length: int) -> Union[bytes, memoryview]:
+        """
+        Reads bytes from the image without buffering.  A read within one segment is read from it
+        directly, and when the segments are memory mapped a memoryview is returned.  A read across
+        segments is stitched together from the part in each one.
+
+        :param offset: The byte offset to read from
+        :param length: The number of bytes to read
+
+        :return:       The bytes read
+        """
+
+        index = bisect.bisect_right(self.__starts, offset) - 1
+        if index < 0 or offset >= self.size:
+            return b""
+
+        segment_offset = offset - self.__starts[index]
+        if segment_offset + length <= self.__sizes[index]:
+            return self.__readSegment(index, segment_offset, length)
+
+        parts = []
+        while length > 0 and index < len(self.segments):
+            part = self.__readSegment(index, segment_offset, min(length, self.__sizes[index] - segment_offset))
+            parts.append(part)
+            length -= len(part)
+            segment_offset = 0
+            index += 1
+
+        return b"".join(parts)
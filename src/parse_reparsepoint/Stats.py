@@ -0,0 +1,228 @@
+import sys
+import threading
+import time
+from typing import IO, Callable, Optional
+
+
+class Stats:
+
+    # The counters reported by the navigator and the interpreter, in the order they are printed
+    COUNTERS = (
+        "bytes_read",
+        "read_calls",
+        "seeks",
+        "records_parsed",
+        "records_invalid",
+        "records_filtered",
+        "fixup_mismatches",
+        "reparse_points",
+        "decode_failures",
+    )
+
+    # The stages that are timed, in the order they are printed
+    STAGES = ("read", "fixup", "parse", "interpret")
+
+    # The upper bound of the first timing bucket.  Each bucket after it is twice as wide.
+    FIRST_BUCKET = 1e-6
+    NUM_BUCKETS = 32
+
+    def __init__(self):
+        """
+        Counters and timing histograms for a navigator and the interpreters of its results.  Pass one
+        to a Navigator or an Interpreter to enable them.  Nothing is counted or timed by objects that
+        are not given one.
+
+        Hooks added with addHook are called for every count and timing as it happens, and for the
+        ones merged in from worker processes, so the numbers can be forwarded to a metrics system.
+
+        Timings are kept in histograms with buckets that double in width, starting at one
+        microsecond, so the distribution of each stage is kept without storing every sample.
+        """
+
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.timings = {}
+        self.started = time.perf_counter()
+
+        self.__hooks = []
+        self.__lock = threading.Lock()
+
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the counters and timings of the stats.  Hooks are left out, as they are often
+        closures that cannot be pickled.  Worker processes are given empty stats of their own, so
+        they count only their own work, which is sent back with snapshot and added with merge.
+
+        :return: The arguments to rebuild the stats with, and their counters and timings
+        """
+
+        return (Stats, (), self.snapshot())
+
+
+    def __setstate__(self, snapshot: dict) -> None:
+        """
+        Restores the counters and timings of pickled stats.
+
+        :param snapshot: The counters and timings returned by snapshot
+        """
+
+        self.merge(snapshot)
+
+
+    def addHook(self, hook: Callable[[str, str, float], None]) -> None:
+        """
+        Adds a function to be called with every count and timing.  It is given "count" or "time",
+        the name of the counter or stage, and the amount counted or the seconds taken.  Timings
+        merged in from a snapshot are only known by their histogram bucket, so each one is given as
+        the upper bound of its bucket, like percentile.
+
+        :param hook: The function to call
+        """
+
+        self.__hooks.append(hook)
+
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Adds to a counter.
+
+        :param name:   The name of the counter
+        :param amount: The amount to add
+        """
+
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+        for hook in self.__hooks:
+            hook("count", name, amount)
+
+
+    def time(self, stage: str, seconds: float) -> None:
+        """
+        Adds a timing to the histogram of a stage.
+
+        :param stage:   The name of the stage
+        :param seconds: The time the stage took
+        """
+
+        bucket = min(int(seconds / self.FIRST_BUCKET).bit_length(), self.NUM_BUCKETS - 1)
+
+        with self.__lock:
+            histogram = self.timings.get(stage)
+            if histogram is None:
+                histogram = self.timings[stage] = {"count": 0, "total": 0.0, "buckets": [0] * self.NUM_BUCKETS}
+
+            histogram["count"] += 1
+            histogram["total"] += seconds
+            histogram["buckets"][bucket] += 1
+
+        for hook in self.__hooks:
+            hook("time", stage, seconds)
+
+
+    def snapshot(self) -> dict:
+        """
+        :return: A copy of the counters and timings, which can be sent between processes and given
+                 to merge
+        """
+
+        with self.__lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {
+                    stage: dict(histogram, buckets=list(histogram["buckets"]))
+                    for stage, histogram in self.timings.items()
+                },
+            }
+
+
+    def merge(self, snapshot: dict) -> None:
+        """
+        Adds counters and timings taken with snapshot to these ones, such as the ones of a worker
+        process, and passes them on to the hooks.
+
+        :param snapshot: The counters and timings to add
+        """
+
+        with self.__lock:
+            for name, amount in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+            for stage, other_histogram in snapshot["timings"].items():
+                histogram = self.timings.setdefault(
+                    stage, {"count": 0, "total": 0.0, "buckets": [0] * self.NUM_BUCKETS}
+                )
+                histogram["count"] += other_histogram["count"]
+                histogram["total"] += other_histogram["total"]
+                histogram["buckets"] = [a + b for a, b in zip(histogram["buckets"], other_histogram["buckets"])]
+
+        for hook in self.__hooks:
+            for name, amount in snapshot["counters"].items():
+                if amount:
+                    hook("count", name, amount)
+
+            for stage, other_histogram in snapshot["timings"].items():
+                for bucket, count in enumerate(other_histogram["buckets"]):
+                    for _ in range(count):
+                        hook("time", stage, self.FIRST_BUCKET * (2 ** bucket))
+
+
+    def percentile(self, stage: str, fraction: float) -> Optional[float]:
+        """
+        Estimates a percentile of the timings of a stage from its histogram.
+
+        :param stage:    The name of the stage
+        :param fraction: The percentile as a fraction, e.g. 0.99
+
+        :return:         The upper bound of the bucket holding the percentile, or None if the stage
+                         was never timed
+        """
+
+        histogram = self.timings.get(stage)
+        if not histogram:
+            return None
+
+        target = fraction * histogram["count"]
+        seen = 0
+        for bucket, count in enumerate(histogram["buckets"]):
+            seen += count
+            if seen >= target:
+                return self.FIRST_BUCKET * (2 ** bucket)
+
+        return self.FIRST_BUCKET * (2 ** (self.NUM_BUCKETS - 1))
+
+
+    def printSummary(self, stream: IO = sys.stderr) -> None:
+        """
+        Prints the counters, the records scanned per second and the timings of each stage.  Records
+        are scanned whether they are parsed, dropped by the prefilter or found invalid.
+
+        :param stream: The stream to print to
+        """
+
+        elapsed = time.perf_counter() - self.started
+        buf = 25
+
+        print("Stats:", file=stream)
+        for name in list(self.COUNTERS) + [name for name in self.counters if name not in self.COUNTERS]:
+            print(f"[+] {name + ':':<{buf}} {self.counters.get(name, 0)}", file=stream)
+
+        print(f"[+] {'elapsed seconds:':<{buf}} {elapsed:.3f}", file=stream)
+        if elapsed > 0:
+            scanned = sum(
+                self.counters.get(name, 0) for name in ("records_parsed", "records_filtered", "records_invalid")
+            )
+            print(f"[+] {'records per second:':<{buf}} {scanned / elapsed:.0f}", file=stream)
+
+        for stage in list(self.STAGES) + [stage for stage in self.timings if stage not in self.STAGES]:
+            histogram = self.timings.get(stage)
+            if not histogram:
+                continue
+
+            print(
+                f"[+] {stage + ' seconds:':<{buf}} {histogram['total']:.3f} over {histogram['count']} calls, "
+                f"mean {histogram['total'] / histogram['count'] * 1e6:.1f}us, "
+                f"p50 <= {self.percentile(stage, 0.5) * 1e6:.0f}us, "
+                f"p99 <= {self.percentile(stage, 0.99) * 1e6:.0f}us",
+                file=stream,
+            )
@@ -0,0 +1,173 @@
+import struct
+from typing import Any, Iterator, Optional
+
+from .Navigator import Navigator
+
+
+class UsnJournal:
+
+    # The reasons a change record is written for, as stored in the Reason field
+    REASON_FILE_CREATE = 0x00000100
+    REASON_FILE_DELETE = 0x00000200
+    REASON_RENAME_NEW_NAME = 0x00002000
+    REASON_REPARSE_POINT_CHANGE = 0x00100000
+
+    # The reasons that can add, remove or change a reparse point, or change its name or path
+    REPARSE_REASONS = REASON_FILE_CREATE | REASON_FILE_DELETE | REASON_RENAME_NEW_NAME | REASON_REPARSE_POINT_CHANGE
+
+    # The file attribute set on change records of directories
+    FILE_ATTRIBUTE_DIRECTORY = 0x10
+
+    # Records never cross a page of the journal.  The rest of a page that cannot fit the next record
+    # is filled with zeros.
+    PAGE_SIZE = 0x1000
+
+    # The file reference, parent reference, USN, timestamp, reason, source info, security ID, file
+    # attributes, file name length and file name offset of each record version
+    RECORD_V2 = struct.Struct("<QQqqIIIIHH")
+    RECORD_V3 = struct.Struct("<16s16sqqIIIIHH")
+
+    def __init__(self, navigator: Navigator):
+        """
+        Reads the change records of the $Extend\\$UsnJrnl change journal of a volume, which NTFS
+        writes whenever a file is created, deleted, renamed or changed.  Version 2 and 3 records are
+        read; version 4 records only describe ranges of changed data, and are skipped.
+
+        :param navigator: The navigator of the volume
+        """
+
+        self.navigator = navigator
+
+        info = navigator.getUsnJournalInfo()
+        self.journal_id = info["journal_id"]
+        self.lowest_valid_usn = info["lowest_valid_usn"]
+        self.maximum_size = info["maximum_size"]
+        self.next_usn = info["next_usn"]
+
+
+    def __parseRecord(self, data: bytes, usn: int) -> Optional[dict[str, Any]]:
+        """
+        Parses one change record.
+
+        :param data: The record
+        :param usn:  The USN of the record
+
+        :return:     The MFT entry and sequence number of the file, the MFT entry of its parent
+                     directory, the USN, timestamp, reason and file attributes of the change, and the
+                     file name, or None if the record is not a version 2 or 3 record
+        """
+
+        major_version = int.from_bytes(data[4:6], "little")
+        if major_version == 2:
+            record_format = self.RECORD_V2
+        elif major_version == 3:
+            record_format = self.RECORD_V3
+        else:
+            return None
+
+        if len(data) < 8 + record_format.size:
+            return None
+
+        (
+            reference,
+            parent_reference,
+            _,
+            timestamp,
+            reason,
+            _,
+            _,
+            attributes,
+            name_length,
+            name_offset,
+        ) = record_format.unpack_from(data, 8)
+
+        # Version 3 records hold 128 bit file references, whose lower 64 bits match version 2 ones
+        if major_version == 3:
+            reference = int.from_bytes(reference[:8], "little")
+            parent_reference = int.from_bytes(parent_reference[:8], "little")
+
+        return {
+            "usn": usn,
+            "entry": reference & 0xFFFFFFFFFFFF,
+            "sequence": reference >> 48,
+            "parent_entry": parent_reference & 0xFFFFFFFFFFFF,
+            "timestamp": timestamp,
+            "reason": reason,
+            "attributes": attributes,
+            "file_name": bytes(data[name_offset : name_offset + name_length]).decode("utf-16-le", errors="replace"),
+        }
+
+
+    def iterRecords(self, start_usn: int = 0, reasons: Optional[int] = None) -> Iterator[dict[str, Any]]:
+        """
+        Yields the change records of the journal from a USN onwards.  Records that are cut off by a
+        chunk are joined with the rest of them from the next chunk.
+
+        :param start_usn: The USN to start at, which must be the USN of a record or of the end of
+                          the journal, such as a next_usn stored earlier
+        :param reasons:   Only yield records with one of these reasons.  Every record is yielded if
+                          omitted.
+
+        :return:          The parsed change records, in USN order
+        """
+
+        start_usn = max(start_usn, self.lowest_valid_usn)
+
+        # The USN of the first byte of pending, which holds the bytes not parsed yet
+        position = start_usn
+        pending = b""
+
+        for usn, data in self.navigator.readUsnJournal(start_usn):
+            if usn + len(data) <= position:
+                continue
+
+            # Data after a sparse gap does not continue the pending bytes
+            if usn > position + len(pending):
+                position = usn
+                pending = b""
+
+            pending = pending + data[position + len(pending) - usn :]
+
+            offset = 0
+            while offset + 8 <= len(pending):
+                length = int.from_bytes(pending[offset : offset + 4], "little")
+
+                # Zero padding, or a damaged record, ends the page
+                if length < 8 or length % 8 or (position + offset) % self.PAGE_SIZE + length > self.PAGE_SIZE:
+                    offset = (position + offset) // self.PAGE_SIZE * self.PAGE_SIZE + self.PAGE_SIZE - position
+                    continue
+
+                if offset + length > len(pending):
+                    break
+
+                record = self.__parseRecord(pending[offset : offset + length], position + offset)
+                offset += length
+
+                if record is not None and (reasons is None or record["reason"] & reasons):
+                    yield record
+
+            pending = pending[offset:]
+            position += offset
+
+
+    def getChangedEntries(self, start_usn: int) -> tuple[set[int], bool]:
+        """
+        Finds the MFT entries whose reparse point may have been added, removed or changed since a
+        USN, from the records with one of REPARSE_REASONS.
+
+        :param start_usn: The USN to look for changes from
+
+        :return:          The MFT entry numbers of the changed files, and whether a directory was
+                          renamed, which changes the path of every file under it without writing
+                          records for them
+        """
+
+        entries = set()
+        directory_renamed = False
+
+        for record in self.iterRecords(start_usn, self.REPARSE_REASONS):
+            entries.add(record["entry"])
+            if record["reason"] & self.REASON_RENAME_NEW_NAME and record["attributes"] & self.FILE_ATTRIBUTE_DIRECTORY:
+                directory_renamed = True
+
+        return entries, directory_renamed
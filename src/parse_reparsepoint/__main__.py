@@ -1,31 +1,624 @@
 import argparse
-from pathlib import Path
+import functools
+import os
+import sys
+from typing import IO, Any, Callable, Iterable, Mapping, Optional, Sequence, Union
 
+# Imported for the output formats they register with RecordWriter
+import parse_reparsepoint.CsvWriter  # noqa: F401
+import parse_reparsepoint.JsonlWriter  # noqa: F401
+import parse_reparsepoint.ParquetWriter  # noqa: F401
+from parse_reparsepoint.DiskScanner import DiskScanner
+from parse_reparsepoint.ImageDiff import ImageDiff
 from parse_reparsepoint.Interpreter import Interpreter
+from parse_reparsepoint.IOScheduler import IOScheduler
+from parse_reparsepoint.Inventory import Inventory
 from parse_reparsepoint.Navigator import Navigator
+from parse_reparsepoint.QueryClient import QueryClient
+from parse_reparsepoint.QueryServer import QueryServer
+from parse_reparsepoint.RecordWriter import RecordWriter
+from parse_reparsepoint.ReparseGraph import ReparseGraph
+from parse_reparsepoint.ResultCache import ResultCache
+from parse_reparsepoint.SegmentedImageSource import SegmentedImageSource
+from parse_reparsepoint.Stats import Stats
+
+
+def parseEntryList(text: str) -> list[int]:
+    """
+    Parses a list of MFT entry numbers.  Entries are separated by commas or whitespace, and each one
+    is either a single number or an inclusive range like 100-200.  Empty lists, reversed ranges and
+    anything that is not a number are rejected.
+
+    :param text: The list to parse
+
+    :return:     The MFT entry numbers, in the order given
+    """
+
+    entries = []
+    for item in text.replace(",", " ").split():
+        try:
+            if "-" in item:
+                start, end = item.split("-", 1)
+                start, end = int(start), int(end)
+                if start > end:
+                    raise argparse.ArgumentTypeError(f"[-] ERROR: Reversed MFT entry range: {item}")
+                entries.extend(range(start, end + 1))
+            else:
+                entries.append(int(item))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"[-] ERROR: Invalid MFT entry: {item}")
+
+    if not entries:
+        raise argparse.ArgumentTypeError("[-] ERROR: No MFT entries given")
+
+    return entries
+
+
+def parseTagList(text: str) -> set[int]:
+    """
+    Parses a list of reparse tags, separated by commas.  Each one is a tag value or a tag identity,
+    as accepted by Interpreter.findTags.
+
+    :param text: The list to parse
+
+    :return:     The reparse tags
+    """
+
+    tags = set()
+    for name in text.split(","):
+        try:
+            tags |= Interpreter.findTags(name.strip())
+        except Exception as ex:
+            raise argparse.ArgumentTypeError(str(ex))
+
+    return tags
+
+
+def readEntries(args: argparse.Namespace) -> list[int]:
+    """
+    Gets the MFT entry numbers requested with -m or --entries-from.
+
+    :param args: The parsed command line arguments
+
+    :return:     The MFT entry numbers, in the order given
+    """
+
+    if args.entries_from == "-":
+        return parseEntryList(sys.stdin.read())
+    if args.entries_from:
+        with open(args.entries_from) as entries_file:
+            return parseEntryList(entries_file.read())
+
+    return args.mft_entry
+
+
+def openOutput(args: argparse.Namespace) -> IO:
+    """
+    Opens the stream structured output is written to.
+
+    :param args: The parsed command line arguments
+
+    :return:     The file named with --output, or stdout
+    """
+
+    binary = RecordWriter.FORMATS[args.format].BINARY
+
+    if args.output:
+        return open(args.output, "wb") if binary else open(args.output, "w", newline="")
+
+    return sys.stdout.buffer if binary else sys.stdout
+
+
+def writeResults(
+    args: argparse.Namespace,
+    results: Iterable[tuple[int, Union[Mapping[str, Any], Exception]]],
+    columns: Sequence[str] = RecordWriter.COLUMNS,
+) -> None:
+    """
+    Writes results with the structured writer chosen with --format.  The results are consumed as
+    they are produced, so a sweep is never held in memory.
+
+    :param args:    The parsed command line arguments
+    :param results: The MFT entry number and the resolved information or error of each entry
+    :param columns: The columns to write
+    """
+
+    output = openOutput(args)
+    try:
+        with RecordWriter.create(args.format, output, columns=columns) as writer:
+            for entry, info in results:
+                if isinstance(info, Exception):
+                    writer.writeError(entry, info)
+                else:
+                    writer.write(info)
+
+    finally:
+        if args.output:
+            output.close()
+
+
+def scanDisk(args: argparse.Namespace, stats: Optional[Stats]) -> None:
+    """
+    Sweeps every NTFS partition of a disk image, and tags each reparse point with its partition.
+
+    :param args:  The parsed command line arguments
+    :param stats: The stats to count into, or None
+    """
+
+    with DiskScanner(
+        args.file, use_mmap=args.mmap, resolve_paths=True, stats=stats, readahead=args.readahead, tags=args.tag
+    ) as scanner:
+        for partition, ex in scanner.failed:
+            print(f"{ex} (partition {partition['number']})", file=sys.stderr)
+        if not scanner.partitions:
+            raise Exception("[-] ERROR: No NTFS partitions found")
+
+        if args.index:
+            records = scanner.sweepIndexedEntries()
+        else:
+            records = scanner.sweepEntries(args.jobs)
+
+        results = (
+            (
+                record.mft_entry,
+                {
+                    "Partition": partition["number"],
+                    "Partition Offset": partition["offset"],
+                    **Interpreter(record, stats).resolveAllInfo(),
+                },
+            )
+            for partition, record in records
+        )
+
+        if args.format != "text":
+            writeResults(args, results, ("Partition", "Partition Offset") + RecordWriter.COLUMNS)
+            return
+
+        for _, info in results:
+            Interpreter.printInfo(info)
+            print()
+
+
+def updateInventory(args: argparse.Namespace, navigator: Navigator, sweep: Callable[[], Iterable[Any]]) -> None:
+    """
+    Writes the reparse points that changed since the inventory named with --inventory was last
+    updated, and stores the updated inventory once they have all been written.
+
+    :param args:      The parsed command line arguments
+    :param navigator: The navigator of the volume
+    :param sweep:     The function that sweeps the volume when the change journal cannot be used
+    """
+
+    inventory = Inventory(args.inventory)
+    previous_usn = inventory.next_usn
+
+    changes = ((entry, {"Change": change, **info}) for change, entry, info in inventory.update(navigator, sweep))
+
+    if args.format != "text":
+        writeResults(args, changes, ("Change",) + RecordWriter.COLUMNS)
+    else:
+        for _, info in changes:
+            Interpreter.printInfo(info)
+            print()
+
+    if inventory.incremental:
+        print(f"[+] Read the change journal from USN {previous_usn} to {inventory.next_usn}", file=sys.stderr)
+    else:
+        print(f"[+] Swept the volume, as {inventory.reason}", file=sys.stderr)
+
+    inventory.save()
+
+
+def carveRecords(args: argparse.Namespace, navigator: Navigator, stats: Optional[Stats]) -> None:
+    """
+    Writes the reparse points of the deleted records carved from the MFT and the rest of the volume,
+    with the byte offset of each record in the image.
+
+    :param args:      The parsed command line arguments
+    :param navigator: The navigator of the volume
+    :param stats:     The stats to count into, or None
+    """
+
+    if args.jobs > 1:
+        records = navigator.carveEntriesParallel(args.jobs, args.unallocated)
+    else:
+        records = navigator.carveEntries(unallocated_only=args.unallocated)
+
+    results = (
+        (record.mft_entry, {"Record Offset": offset, **Interpreter(record, stats).resolveAllInfo()})
+        for offset, record in records
+    )
+
+    if args.format != "text":
+        writeResults(args, results, ("Record Offset",) + RecordWriter.COLUMNS)
+        return
+
+    for _, info in results:
+        Interpreter.printInfo(info)
+        print()
+
+
+def resolveLinks(
+    args: argparse.Namespace, navigator: Navigator, sweep: Callable[[], Iterable[Any]], stats: Optional[Stats]
+) -> None:
+    """
+    Writes every symbolic link and junction with the final target it leads to, following every
+    other link on the way, or only the ones that lead into the directory named with --redirects-into.
+
+    :param args:      The parsed command line arguments
+    :param navigator: The navigator of the volume
+    :param sweep:     The function that sweeps the volume
+    :param stats:     The stats to count into, or None
+    """
+
+    graph = ReparseGraph(navigator, sweep(), drive=args.drive_letter)
+    entries = graph.getRedirectsInto(args.redirects_into) if args.redirects_into else sorted(graph.records)
+
+    def resolve(entry: int) -> dict[str, Any]:
+        status, path, final_entry = graph.getFinalTarget(entry)
+        info = {"Link Status": status, "Final Target": path}
+        if final_entry is not None:
+            info["Final Entry"] = final_entry
+        info["Link Chain"] = ",".join(str(link) for link in graph.getChain(entry))
+
+        return {**info, **Interpreter(graph.records[entry], stats).resolveAllInfo()}
+
+    results = (
+        (entry, resolve(entry)) for entry in entries if args.tag is None or graph.records[entry].tag in args.tag
+    )
+
+    if args.format != "text":
+        writeResults(args, results, ("Link Status", "Final Target", "Final Entry", "Link Chain") + RecordWriter.COLUMNS)
+    else:
+        for _, info in results:
+            Interpreter.printInfo(info)
+            print()
+
+    print(f"[+] Resolved {len(graph)} links, of which {len(graph.getLoops())} loop", file=sys.stderr)
+
+
+def diffImages(args: argparse.Namespace, navigator: Navigator, stats: Optional[Stats]) -> None:
+    """
+    Writes the reparse points that were added, removed or modified between the image and the later
+    image named with --diff.
+
+    :param args:      The parsed command line arguments
+    :param navigator: The navigator of the earlier image
+    :param stats:     The stats to count into, or None
+    """
+
+    with Navigator(
+        args.diff,
+        use_mmap=args.mmap,
+        resolve_paths=True,
+        stats=stats,
+        readahead=args.readahead,
+        partition_offset=args.partition_offset,
+        tags=args.tag,
+    ) as new_navigator:
+        diff = ImageDiff(navigator, new_navigator)
+        changes = ((entry, {"Change": change, **info}) for change, entry, info in diff.compare())
+
+        if args.format != "text":
+            writeResults(args, changes, ("Change",) + RecordWriter.COLUMNS)
+        else:
+            for _, info in changes:
+                Interpreter.printInfo(info)
+                print()
+
+    print(
+        f"[+] Compared {diff.entries_compared} MFT entries, of which {diff.entries_differing} differed",
+        file=sys.stderr,
+    )
+
+
+def serve(argv: list[str]) -> None:
+    """
+    Runs a query server until interrupted.
+
+    :param argv: The command line arguments after "serve"
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="parse-reparsepoint serve", description="Serve reparse point lookups from open images"
+    )
+    address_group = parser.add_mutually_exclusive_group()
+    address_group.add_argument(
+        "--socket",
+        help="Unix socket to listen on (default: ./parse-reparsepoint.sock)",
+        default="parse-reparsepoint.sock",
+    )
+    address_group.add_argument("--port", help="Listen on this localhost TCP port instead", type=int)
+    parser.add_argument(
+        "--max-images", help="Images to keep open", type=int, default=QueryServer.DEFAULT_MAX_IMAGES
+    )
+    args = parser.parse_args(argv)
+
+    address = ("127.0.0.1", args.port) if args.port is not None else args.socket
+    try:
+        server = QueryServer(address, max_images=args.max_images)
+    except Exception as ex:
+        print(ex)
+        return
+
+    print(f"[+] Listening on {address}")
+    try:
+        server.serveForever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
 
 
 def main():
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="Parse reparse point")
-    parser.add_argument("-f", "--file", help="Path to file", type=str, required=True)
-    parser.add_argument("-m", "--mft-entry", help="MFT entry to parse", type=int, required=True)
+    parser.add_argument(
+        "-f", "--file", help="Path to file, or to the first segment of a split image (.001)", type=str, required=True
+    )
+    entry_group = parser.add_mutually_exclusive_group(required=True)
+    entry_group.add_argument(
+        "-m", "--mft-entry", help="MFT entries to parse, e.g. 5 or 5,7,100-200", type=parseEntryList
+    )
+    entry_group.add_argument("--entries-from", help="Read MFT entries to parse from a file, or - for stdin")
+    entry_group.add_argument("--all", help="Parse every reparse point in the MFT", action="store_true")
+    entry_group.add_argument(
+        "--diff", help="Output the reparse points added, removed or modified in a later image of the same volume"
+    )
+    entry_group.add_argument(
+        "--carve",
+        help="Carve the records of deleted files with reparse points from the MFT and the rest of the volume",
+        action="store_true",
+    )
+    parser.add_argument("--mmap", help="Memory map the image instead of reading it", action="store_true")
+    parser.add_argument("-j", "--jobs", help="Worker processes to use with --all or --carve", type=int, default=1)
+    parser.add_argument(
+        "--partition-offset", help="Byte offset of the NTFS volume in a disk image", type=int, default=0
+    )
+    parser.add_argument(
+        "--disk", help="Scan every NTFS partition of a disk image with --all", action="store_true"
+    )
+    parser.add_argument(
+        "--inventory",
+        help="Keep the reparse points found with --all in this file, and only output what changed since it was "
+        "last updated, using the $UsnJrnl change journal when it holds every change",
+    )
+    parser.add_argument(
+        "--tag",
+        help="Only output reparse points with these tags with --all, --diff or --carve, e.g. symlink,cloud,mount "
+        "or 0xA000000C",
+        type=parseTagList,
+    )
+    parser.add_argument(
+        "--unallocated",
+        help="Only carve the MFT and the clusters that $Bitmap marks as free with --carve",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--links",
+        help="Resolve where each symbolic link and junction finally leads with --all, following the links on the way",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--redirects-into", help="Only output the links that lead into this directory with --links, e.g. C:\\Users"
+    )
+    parser.add_argument(
+        "--drive-letter", help="Drive letter the volume was mounted as, for resolving links (default: C)", default="C"
+    )
+    parser.add_argument(
+        "--readahead",
+        help="Bytes to read ahead of small reads of the image (default: 0, or 256 KiB for split images)",
+        type=int,
+    )
+    parser.add_argument(
+        "--io-block-size",
+        help="Bytes that reads of many MFT entries are aligned and merged to "
+        f"(default: {IOScheduler.DEFAULT_BLOCK_SIZE})",
+        type=int,
+    )
+    parser.add_argument(
+        "--index", help="Find reparse points with the $Extend\\$Reparse index with --all", action="store_true"
+    )
+    parser.add_argument(
+        "--cache",
+        help=f"Cache lookups in an SQLite database (default: {ResultCache.DEFAULT_PATH})",
+        nargs="?",
+        const=ResultCache.DEFAULT_PATH,
+    )
+    parser.add_argument("--clear-cache", help="Remove the cached lookups of the image", action="store_true")
+    parser.add_argument("--server", help="Send lookups to a running 'parse-reparsepoint serve' at this address")
+    parser.add_argument(
+        "--format",
+        help="Output format (default: text)",
+        choices=["text"] + sorted(RecordWriter.FORMATS),
+        default="text",
+    )
+    parser.add_argument("-o", "--output", help="File to write --format output to (default: stdout)")
+    parser.add_argument("--stats", help="Print I/O counters and stage timings to stderr", action="store_true")
     args = parser.parse_args()
 
-    if not Path(args.file).exists():
-        print(f"[-] ERROR: No such file or directory: {args.file}")
+    if args.output and args.format == "text":
+        print("[-] ERROR: --output needs a structured --format")
+        return
+
+    if args.disk and (not args.all or args.partition_offset or args.server):
+        print("[-] ERROR: --disk needs --all, and cannot be used with --partition-offset or --server")
+        return
+
+    if args.inventory and (not args.all or args.disk or args.server):
+        print("[-] ERROR: --inventory needs --all, and cannot be used with --disk or --server")
         return
 
+    if args.redirects_into:
+        args.links = True
+
+    if args.links and (not args.all or args.disk or args.inventory or args.server):
+        print("[-] ERROR: --links needs --all, and cannot be used with --disk, --inventory or --server")
+        return
+
+    if args.tag and (not (args.all or args.diff or args.carve) or args.inventory):
+        print("[-] ERROR: --tag needs --all, --diff or --carve, and cannot be used with --inventory")
+        return
+
+    if args.unallocated and not args.carve:
+        print("[-] ERROR: --unallocated needs --carve")
+        return
+
+    if args.server:
+        if args.partition_offset:
+            print("[-] ERROR: --partition-offset cannot be used with --server")
+            return
+        if args.all or args.diff or args.carve:
+            print("[-] ERROR: --all, --diff and --carve cannot be sent to a server")
+            return
+        if args.stats:
+            print("[-] ERROR: --stats cannot be used with --server")
+            return
+
+        try:
+            entries = readEntries(args)
+            with QueryClient(QueryClient.parseAddress(args.server)) as client:
+                results = client.getEntries(os.path.abspath(args.file), entries)
+
+            if args.format != "text":
+                writeResults(
+                    args,
+                    (
+                        (entry, Exception(info["error"]) if "error" in info else info)
+                        for entry, info in zip(entries, results)
+                    ),
+                )
+                return
+        except Exception as ex:
+            print(ex)
+            return
+
+        for entry, info in zip(entries, results):
+            if "error" in info:
+                print(f"{info['error']} (MFT entry {entry})" if len(entries) > 1 else info["error"])
+            else:
+                Interpreter.printInfo(info)
+            if len(entries) > 1:
+                print()
+        return
+
+    for path in (args.file, args.diff) if args.diff else (args.file,):
+        if not SegmentedImageSource.findSegments(path):
+            print(f"[-] ERROR: No such file or directory: {path}")
+            return
+
+    cache = None
+    stats = Stats() if args.stats else None
     try:
-        navigator = Navigator(args.file)
-        info = navigator.getEntry(args.mft_entry)
+        if args.cache:
+            cache = ResultCache(args.cache)
+            if args.clear_cache:
+                cache.invalidate(args.file)
+
+        if args.disk:
+            scanDisk(args, stats)
+            return
+
+        with Navigator(
+            args.file,
+            use_mmap=args.mmap,
+            cache=cache,
+            resolve_paths=True,
+            stats=stats,
+            readahead=args.readahead,
+            partition_offset=args.partition_offset,
+            tags=ReparseGraph.LINK_TAGS if args.links else args.tag,
+            io_block_size=args.io_block_size,
+        ) as navigator:
+            if args.diff:
+                diffImages(args, navigator, stats)
+                return
 
-        interpreter = Interpreter(info)
-        interpreter.printAllInfo()
+            if args.carve:
+                carveRecords(args, navigator, stats)
+                return
+
+            if args.all:
+                if args.index:
+                    sweep = navigator.sweepIndexedEntries
+                elif args.jobs > 1:
+                    sweep = functools.partial(navigator.sweepEntriesParallel, args.jobs)
+                else:
+                    sweep = navigator.sweepEntries
+
+                if args.inventory:
+                    updateInventory(args, navigator, sweep)
+                    return
+
+                if args.links:
+                    resolveLinks(args, navigator, sweep, stats)
+                    return
+
+                records = sweep()
+
+                if args.format != "text":
+                    writeResults(
+                        args,
+                        (
+                            (record.mft_entry, Interpreter(record, stats).resolveAllInfo())
+                            for record in records
+                        ),
+                    )
+                    return
+
+                for info in records:
+                    interpreter = Interpreter(info, stats)
+                    interpreter.printAllInfo()
+                    print()
+                return
+
+            entries = readEntries(args)
+
+            if args.format != "text":
+                writeResults(
+                    args,
+                    (
+                        (entry, info if isinstance(info, Exception) else Interpreter(info, stats).resolveAllInfo())
+                        for entry, info in zip(entries, navigator.getEntries(entries))
+                    ),
+                )
+                return
+
+            if len(entries) > 1 or args.entries_from:
+                for entry, info in zip(entries, navigator.getEntries(entries)):
+                    if isinstance(info, Exception):
+                        print(f"{info} (MFT entry {entry})")
+                    else:
+                        Interpreter(info, stats).printAllInfo()
+                    print()
+                return
+
+            info = navigator.getEntry(entries[0])
+
+            resolved = None
+            if cache is not None:
+                resolved = cache.getInfo(navigator.cache_key, entries[0])
+
+            if resolved is None:
+                resolved = Interpreter(info, stats).resolveAllInfo()
+                if cache is not None:
+                    cache.putInfo(navigator.cache_key, entries[0], resolved)
+
+        Interpreter.printInfo(resolved)
 
     except Exception as ex:
         print(ex)
         return
 
+    finally:
+        if cache is not None:
+            cache.close()
+        if stats is not None:
+            stats.printSummary()
+
 
 if __name__ == "__main__":
     main()
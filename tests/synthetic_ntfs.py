@@ -0,0 +1,835 @@
+"""
+Builds synthetic NTFS volumes for tests and benchmarks.  Only the structures the Navigator reads
+are written: the boot sector, the MFT with its runlist, file name, reparse point and attribute
+list attributes, and the $Extend\\$Reparse index.
+
+Records are rendered while the image is written, so volumes with millions of records can be built
+without holding the MFT in memory.  Clusters that are never written are left as holes in the file.
+"""
+
+import os
+import random
+import struct
+import tempfile
+
+SECTOR = 512
+ENTRY = 1024
+
+ROOT_ENTRY = 5
+BITMAP_ENTRY = 6
+EXTEND_ENTRY = 11
+REPARSE_ENTRY = 26
+USN_JOURNAL_ENTRY = 27
+
+SYMLINK_TAG = 0xA000000C
+MOUNT_POINT_TAG = 0xA0000003
+CLOUD_TAG = 0x9000601A
+UNKNOWN_TAG = 0x8000F00D
+
+# The default share of each kind of reparse point
+DEFAULT_TAG_MIX = {"symlink": 0.25, "mount": 0.1, "cloud": 0.6, "unknown": 0.05}
+
+# The entry number of the first file added by generate.  Entries before it are system files.
+FIRST_FILE_ENTRY = 64
+
+
+def attr_resident(type_id, content, name=""):
+    name_bytes = name.encode("utf-16-le")
+    name_offset = 0x18
+    content_offset = (name_offset + len(name_bytes) + 7) & ~7
+    length = (content_offset + len(content) + 7) & ~7
+
+    attr = bytearray(length)
+    struct.pack_into(
+        "<IIBBHHHIH", attr, 0, type_id, length, 0, len(name), name_offset, 0, 0, len(content), content_offset
+    )
+    attr[name_offset : name_offset + len(name_bytes)] = name_bytes
+    attr[content_offset : content_offset + len(content)] = content
+    return bytes(attr)
+
+
+def encode_runlist(runs):
+    """
+    Encodes (lcn, length) runs as an NTFS runlist.  A run with an LCN of None is sparse.
+    """
+
+    out = bytearray()
+    previous = 0
+    for lcn, length in runs:
+        length_bytes = length.to_bytes(8, "little").rstrip(b"\x00") or b"\x00"
+        if length_bytes[-1] & 0x80:
+            length_bytes += b"\x00"
+
+        offset_bytes = b""
+        if lcn is not None:
+            delta = lcn - previous
+            size = 1
+            while not -(1 << (8 * size - 1)) <= delta < (1 << (8 * size - 1)):
+                size += 1
+            offset_bytes = delta.to_bytes(size, "little", signed=True)
+            previous = lcn
+
+        out.append((len(offset_bytes) << 4) | len(length_bytes))
+        out += length_bytes + offset_bytes
+
+    out.append(0)
+    return bytes(out)
+
+
+def attr_nonresident(type_id, runs, real_size, cluster, name=""):
+    name_bytes = name.encode("utf-16-le")
+    name_offset = 0x40
+    runlist = encode_runlist(runs)
+    runlist_offset = (name_offset + len(name_bytes) + 7) & ~7
+    length = (runlist_offset + len(runlist) + 7) & ~7
+    total = sum(run_length for _, run_length in runs)
+
+    attr = bytearray(length)
+    struct.pack_into("<IIBBHHH", attr, 0, type_id, length, 1, len(name), name_offset, 0, 0)
+    struct.pack_into("<QQHH", attr, 0x10, 0, total - 1, runlist_offset, 0)
+    struct.pack_into("<QQQ", attr, 0x28, total * cluster, real_size, real_size)
+    attr[name_offset : name_offset + len(name_bytes)] = name_bytes
+    attr[runlist_offset : runlist_offset + len(runlist)] = runlist
+    return bytes(attr)
+
+
+def file_name_content(name, parent, parent_sequence=1, namespace=1):
+    return (
+        struct.pack("<Q", parent | (parent_sequence << 48))
+        + bytes(56)
+        + struct.pack("<BB", len(name), namespace)
+        + name.encode("utf-16-le")
+    )
+
+
+def reparse_content(tag, data):
+    return struct.pack("<IHH", tag, len(data), 0) + data
+
+
+def symlink_data(target, relative=False):
+    substitute_name = ("\\??\\" + target).encode("utf-16-le")
+    print_name = target.encode("utf-16-le")
+    return (
+        struct.pack("<HHHHI", 0, len(substitute_name), len(substitute_name), len(print_name), int(relative))
+        + substitute_name
+        + print_name
+    )
+
+
+def mount_point_data(target):
+    substitute_name = ("\\??\\" + target).encode("utf-16-le")
+    print_name = target.encode("utf-16-le")
+    return (
+        struct.pack("<HHHH", 0, len(substitute_name), len(substitute_name) + 2, len(print_name))
+        + substitute_name
+        + b"\x00\x00"
+        + print_name
+        + b"\x00\x00"
+    )
+
+
+def cloud_data(cid):
+    """
+    Reparse data shaped like a OneDrive Personal placeholder, with the CID stored as UTF-16 text.
+    """
+
+    return b"\x01\x00\x00\x00" + bytes(12) + (cid + "!").encode("utf-16-le") + bytes(32)
+
+
+def protect(data, usn):
+    """
+    Moves the last two bytes of each sector into the update sequence array and replaces them with
+    the update sequence number, like NTFS does before writing a record or index block.
+    """
+
+    data = bytearray(data)
+    usa_offset, usa_count = struct.unpack_from("<HH", data, 4)
+    struct.pack_into("<H", data, usa_offset, usn)
+    for i in range(1, usa_count):
+        end = SECTOR * i
+        data[usa_offset + 2 * i : usa_offset + 2 * i + 2] = data[end - 2 : end]
+        struct.pack_into("<H", data, end - 2, usn)
+
+    return bytes(data)
+
+
+def usn_record(usn, entry, reason, name, parent=ROOT_ENTRY, attributes=0x20, sequence=1):
+    """
+    Encodes a version 2 change journal record.
+    """
+
+    name_bytes = name.encode("utf-16-le")
+    length = (0x3C + len(name_bytes) + 7) & ~7
+
+    record = bytearray(length)
+    struct.pack_into(
+        "<IHHQQqqIIIIHH",
+        record,
+        0,
+        length,
+        2,
+        0,
+        entry | (sequence << 48),
+        parent | (1 << 48),
+        usn,
+        0,
+        reason,
+        0,
+        0,
+        attributes,
+        len(name_bytes),
+        0x3C,
+    )
+    record[0x3C : 0x3C + len(name_bytes)] = name_bytes
+    return bytes(record)
+
+
+def make_record(number, attrs, sequence=1, flags=1, base=0, usn=0x0101):
+    record = bytearray(ENTRY)
+    record[0:4] = b"FILE"
+    struct.pack_into("<HHQHHHH", record, 4, 0x30, ENTRY // SECTOR + 1, 0, sequence, 1, 0x38, flags)
+
+    offset = 0x38
+    for attr in attrs:
+        record[offset : offset + len(attr)] = attr
+        offset += len(attr)
+    if offset + 8 > ENTRY:
+        raise ValueError(f"The attributes of record {number} do not fit in {ENTRY} bytes")
+    record[offset : offset + 4] = b"\xff\xff\xff\xff"
+
+    struct.pack_into("<II", record, 0x18, offset + 8, ENTRY)
+    struct.pack_into("<Q", record, 0x20, base)
+    struct.pack_into("<I", record, 0x2C, number)
+    return protect(record, usn)
+
+
+def index_entry_view(key, subnode_vcn=None):
+    length = (16 + len(key) + 7) & ~7
+    if subnode_vcn is not None:
+        length += 8
+
+    entry = bytearray(length)
+    struct.pack_into("<HHIHHI", entry, 0, 0, 0, 0, length, len(key), 0 if subnode_vcn is None else 1)
+    entry[16 : 16 + len(key)] = key
+    if subnode_vcn is not None:
+        struct.pack_into("<Q", entry, length - 8, subnode_vcn)
+    return bytes(entry)
+
+
+def index_entry_directory(reference, key, flags=0):
+    length = (16 + len(key) + 7) & ~7
+    entry = bytearray(length)
+    struct.pack_into("<QHHI", entry, 0, reference, length, len(key), flags)
+    entry[16 : 16 + len(key)] = key
+    return bytes(entry)
+
+
+def index_end(subnode_vcn=None):
+    if subnode_vcn is None:
+        return struct.pack("<QHHI", 0, 16, 0, 2)
+
+    return struct.pack("<QHHIQ", 0, 24, 0, 3, subnode_vcn)
+
+
+def index_root_content(entries, block_size, large, attribute_type=0):
+    body = b"".join(entries)
+    return (
+        struct.pack("<IIIB3x", attribute_type, 1, block_size, 1)
+        + struct.pack("<IIIB3x", 16, 16 + len(body), 16 + len(body), int(large))
+        + body
+    )
+
+
+def index_block(entries, block_size, vcn, usn=0x0202):
+    usa_count = block_size // SECTOR + 1
+    block = bytearray(block_size)
+    block[0:4] = b"INDX"
+    struct.pack_into("<HHQQ", block, 4, 0x28, usa_count, 0, vcn)
+
+    first = (0x28 + 2 * usa_count + 7) & ~7
+    body = b"".join(entries)
+    struct.pack_into("<IIIB3x", block, 0x18, first - 0x18, first - 0x18 + len(body), block_size - 0x18, 0)
+    block[first : first + len(body)] = body
+    return protect(block, usn)
+
+
+class SyntheticImage:
+    def __init__(self, num_records=64, cluster=4096, fragments=1, mft_start=16, gap=3, fill=False):
+        """
+        An NTFS volume being built.
+
+        :param num_records: The number of records the MFT has room for
+        :param cluster:     The cluster size in bytes
+        :param fragments:   The number of runs the MFT is split into
+        :param mft_start:   The cluster the MFT starts at
+        :param gap:         The number of clusters between the runs of the MFT
+        :param fill:        Whether records without a file are written as in use regular files
+                            instead of being left empty
+        """
+
+        self.cluster = cluster
+        self.num_records = num_records
+        self.fill = fill
+
+        mft_clusters = -(-num_records * ENTRY // cluster)
+        fragments = max(1, min(fragments, mft_clusters))
+        sizes = [mft_clusters // fragments] * fragments
+        sizes[-1] += mft_clusters - sum(sizes)
+
+        self.mft_runs = []
+        lcn = mft_start
+        for size in sizes:
+            self.mft_runs.append((lcn, size))
+            lcn += size + gap
+
+        self.next_free = lcn
+        self.clusters = {}
+        self.records = {}
+        self.files = {}
+
+        # The files of the $Extend directory, by name
+        self.extend_files = {}
+
+        # Whether the root directory and the directories added have $I30 indexes of their files
+        self.directory_indexes = False
+
+        # Whether the volume has a $Bitmap, and the clusters it leaves marked as free
+        self.cluster_bitmap = False
+        self.free_clusters = set()
+
+        self.records[ROOT_ENTRY] = make_record(
+            ROOT_ENTRY, [attr_resident(0x30, file_name_content(".", ROOT_ENTRY))], flags=3
+        )
+
+
+    def allocate(self, content):
+        """
+        Stores content in free clusters after the MFT.
+
+        :return: The runs holding the content
+        """
+
+        count = max(1, -(-len(content) // self.cluster))
+        lcn = self.next_free
+        self.next_free += count
+        self.clusters[lcn] = content
+        return [(lcn, count)]
+
+
+    def addFile(self, entry, name, parent=ROOT_ENTRY, tag=None, data=b"", **options):
+        """
+        Adds a file.  Options are:
+            dos:         A short DOS name stored before the long name
+            flags:       The record flags, 1 for in use and 3 for an in use directory
+            sequence:    The sequence number of the record
+            nonresident: Whether the reparse data is stored outside the record
+            extension:   The entry number of an extension record that holds the reparse attribute
+        """
+
+        self.files[entry] = dict(options, name=name, parent=parent, tag=tag, data=data)
+
+
+    def addReparseIndex(self, in_allocation=None, block_size=4096):
+        """
+        Adds $Extend and $Reparse, with an index of the reparse points added so far.
+
+        :param in_allocation: Whether the index is stored in index blocks instead of the index root.
+                              Defaults to index blocks when the index does not fit in the root.
+        :param block_size:    The size of each index block
+        """
+
+        self.extend_files["$ObjId"] = REPARSE_ENTRY
+        self.extend_files["$Reparse"] = REPARSE_ENTRY
+
+        keys = sorted(
+            struct.pack("<IQ", spec["tag"], entry | (1 << 48))
+            for entry, spec in self.files.items()
+            if spec["tag"] is not None and spec.get("flags", 1) & 1
+        )
+
+        if in_allocation is None:
+            in_allocation = len(keys) > 16
+
+        attrs = [attr_resident(0x30, file_name_content("$Reparse", EXTEND_ENTRY))]
+        if not in_allocation:
+            root = index_root_content([index_entry_view(key) for key in keys] + [index_end()], block_size, False)
+            attrs.append(attr_resident(0x90, root, name="$R"))
+            self.records[REPARSE_ENTRY] = make_record(REPARSE_ENTRY, attrs)
+            return
+
+        # Fill index blocks with keys, and move the key after each full block up into the root,
+        # which points to the block holding the smaller keys
+        per_block = (block_size - 0x40 - 16) // len(index_entry_view(bytes(12)))
+        blocks = []
+        separators = []
+        position = 0
+        while True:
+            block_keys = keys[position : position + per_block]
+            block_entries = [index_entry_view(key) for key in block_keys] + [index_end()]
+            blocks.append(index_block(block_entries, block_size, len(blocks)))
+            position += per_block
+            if position >= len(keys):
+                break
+            separators.append(keys[position])
+            position += 1
+
+        root_entries = [index_entry_view(key, vcn) for vcn, key in enumerate(separators)]
+        root = index_root_content(root_entries + [index_end(len(blocks) - 1)], block_size, True)
+        bitmap = (1 << len(blocks)) - 1
+        runs = self.allocate(b"".join(blocks))
+
+        attrs += [
+            attr_resident(0x90, root, name="$R"),
+            attr_nonresident(0xA0, runs, len(blocks) * block_size, self.cluster, name="$R"),
+            attr_resident(0xB0, bitmap.to_bytes(max(8, -(-len(blocks) // 64) * 8), "little"), name="$R"),
+        ]
+        self.records[REPARSE_ENTRY] = make_record(REPARSE_ENTRY, attrs)
+
+
+    def addDirectoryIndexes(self):
+        """
+        Gives the root directory and every directory added an $I30 index of the files in it, kept
+        in the index root.  Each directory can only hold a few files this way.
+        """
+
+        self.directory_indexes = True
+
+
+    def addClusterBitmap(self):
+        """
+        Adds $Bitmap, marking the boot sector, the MFT and every cluster allocated as in use.
+        """
+
+        self.cluster_bitmap = True
+
+
+    def addLostRecord(self, entry, name, parent=ROOT_ENTRY, tag=None, data=b"", allocated=False, **options):
+        """
+        Writes the record of a deleted file outside the MFT, 1024 bytes into a cluster of its own,
+        as records are found in clusters that were freed or reused.  Takes the options of addFile,
+        with the record marked as not in use unless flags are given.
+
+        :param allocated: Whether $Bitmap marks the cluster holding the record as in use
+
+        :return:          The byte offset of the record in the image
+        """
+
+        spec = dict(options, name=name, parent=parent, tag=tag, data=data)
+        spec.setdefault("flags", 0)
+
+        lcn = self.allocate(bytes(1024) + self.__renderFile(entry, spec))[0][0]
+        if not allocated:
+            self.free_clusters.add(lcn)
+
+        return lcn * self.cluster + 1024
+
+
+    def __renderBitmap(self):
+        # Reserve room for the bitmap first, as its own clusters are marked in it
+        runs = self.allocate(bytes(-(-(self.next_free + 64) // 8)))
+        total_clusters = self.next_free + 8
+
+        bitmap = bytearray(-(-total_clusters // 64) * 8)
+        allocated = [(0, 1)] + self.mft_runs + [
+            (lcn, max(1, -(-len(content) // self.cluster))) for lcn, content in self.clusters.items()
+        ]
+        for lcn, count in allocated:
+            for cluster in range(lcn, lcn + count):
+                if cluster not in self.free_clusters:
+                    bitmap[cluster // 8] |= 1 << (cluster % 8)
+
+        self.clusters[runs[0][0]] = bytes(bitmap)
+        return make_record(
+            BITMAP_ENTRY,
+            [
+                attr_resident(0x30, file_name_content("$Bitmap", ROOT_ENTRY)),
+                attr_nonresident(0x80, runs, len(bitmap), self.cluster),
+            ],
+        )
+
+
+    def __renderDirectoryIndex(self, directory, block_size=4096):
+        directory_entries = [
+            index_entry_directory(
+                entry | (spec.get("sequence", 1) << 48), file_name_content(spec["name"], directory)
+            )
+            for entry, spec in sorted(self.files.items(), key=lambda item: item[1]["name"].upper())
+            if spec["parent"] == directory
+        ]
+        return attr_resident(
+            0x90,
+            index_root_content(directory_entries + [index_end()], block_size, False, attribute_type=0x30),
+            name="$I30",
+        )
+
+
+    def addUsnJournal(self, changes, journal_id=1, trimmed_clusters=2, lowest_valid_usn=None):
+        """
+        Adds $Extend\\$UsnJrnl, with a change journal holding one version 2 record per change.  The
+        journal starts with sparse clusters, like a journal that has been trimmed.
+
+        :param changes:          (entry, reason, name) or (entry, reason, name, attributes) tuples
+        :param journal_id:       The journal ID
+        :param trimmed_clusters: The number of sparse clusters before the first record
+        :param lowest_valid_usn: The lowest valid USN.  Defaults to the USN of the first record.
+
+        :return:                 The USN of each record, and the USN after the last record
+        """
+
+        first_usn = trimmed_clusters * self.cluster
+        journal = bytearray()
+        usns = []
+        for change in changes:
+            entry, reason, name = change[:3]
+            attributes = change[3] if len(change) > 3 else 0x20
+
+            usn = first_usn + len(journal)
+            record = usn_record(usn, entry, reason, name, attributes=attributes)
+
+            # Records do not cross pages, so pad to the next page when the record does not fit
+            if usn % 0x1000 + len(record) > 0x1000:
+                journal += bytes(0x1000 - usn % 0x1000)
+                usn = first_usn + len(journal)
+                record = usn_record(usn, entry, reason, name, attributes=attributes)
+
+            usns.append(usn)
+            journal += record
+
+        next_usn = first_usn + len(journal)
+        runs = ([(None, trimmed_clusters)] if trimmed_clusters else []) + self.allocate(bytes(journal))
+        if lowest_valid_usn is None:
+            lowest_valid_usn = first_usn
+        header = struct.pack("<QQQq", 32 * 1024 * 1024, 8 * 1024 * 1024, journal_id, lowest_valid_usn)
+
+        self.extend_files["$UsnJrnl"] = USN_JOURNAL_ENTRY
+        self.records[USN_JOURNAL_ENTRY] = make_record(
+            USN_JOURNAL_ENTRY,
+            [
+                attr_resident(0x30, file_name_content("$UsnJrnl", EXTEND_ENTRY)),
+                attr_nonresident(0x80, runs, next_usn, self.cluster, name="$J"),
+                attr_resident(0x80, header, name="$Max"),
+            ],
+        )
+        return usns, next_usn
+
+
+    def __renderExtend(self, block_size=4096):
+        directory_entries = [
+            index_entry_directory(entry | (1 << 48), file_name_content(name, EXTEND_ENTRY))
+            for name, entry in sorted(self.extend_files.items())
+        ]
+        return make_record(
+            EXTEND_ENTRY,
+            [
+                attr_resident(0x30, file_name_content("$Extend", ROOT_ENTRY)),
+                attr_resident(
+                    0x90,
+                    index_root_content(directory_entries + [index_end()], block_size, False, attribute_type=0x30),
+                    name="$I30",
+                ),
+            ],
+            flags=3,
+        )
+
+
+    def __renderFile(self, entry, spec):
+        attrs = [attr_resident(0x10, bytes(48))]
+        if spec.get("dos"):
+            attrs.append(attr_resident(0x30, file_name_content(spec["dos"], spec["parent"], namespace=2)))
+        attrs.append(attr_resident(0x30, file_name_content(spec["name"], spec["parent"])))
+        if self.directory_indexes and spec.get("flags", 1) & 2:
+            attrs.append(self.__renderDirectoryIndex(entry))
+
+        reparse_attr = None
+        if spec["tag"] is not None:
+            content = reparse_content(spec["tag"], spec["data"])
+            if spec.get("nonresident"):
+                reparse_attr = attr_nonresident(0xC0, self.allocate(content), len(content), self.cluster)
+            else:
+                reparse_attr = attr_resident(0xC0, content)
+
+        if spec.get("extension"):
+            extension = spec["extension"]
+            attribute_list = b"".join(
+                struct.pack("<IHBBQQH6x", attribute_type, 0x20, 0, 0x1A, 0, reference | (1 << 48), 0)
+                for attribute_type, reference in ((0x10, entry), (0x30, entry), (0xC0, extension))
+            )
+            attrs.insert(1, attr_resident(0x20, attribute_list))
+            self.records[extension] = make_record(extension, [reparse_attr], base=entry | (1 << 48))
+        elif reparse_attr is not None:
+            attrs.append(reparse_attr)
+
+        return make_record(entry, attrs, sequence=spec.get("sequence", 1), flags=spec.get("flags", 1))
+
+
+    def __renderFiller(self, entry):
+        return make_record(
+            entry,
+            [attr_resident(0x10, bytes(48)), attr_resident(0x30, file_name_content(f"f{entry}.dat", ROOT_ENTRY))],
+        )
+
+
+    def write(self, path):
+        """
+        Writes the volume to a file.
+
+        :param path: The path of the image to write
+        """
+
+        # Render the files first, since they can allocate clusters and add extension records
+        for entry, spec in self.files.items():
+            self.records[entry] = self.__renderFile(entry, spec)
+
+        if self.extend_files:
+            self.records[EXTEND_ENTRY] = self.__renderExtend()
+
+        if self.cluster_bitmap:
+            self.records[BITMAP_ENTRY] = self.__renderBitmap()
+
+        if self.directory_indexes:
+            self.records[ROOT_ENTRY] = make_record(
+                ROOT_ENTRY,
+                [attr_resident(0x30, file_name_content(".", ROOT_ENTRY)), self.__renderDirectoryIndex(ROOT_ENTRY)],
+                flags=3,
+            )
+
+        self.records[0] = make_record(
+            0,
+            [
+                attr_resident(0x30, file_name_content("$MFT", ROOT_ENTRY)),
+                attr_nonresident(0x80, self.mft_runs, self.num_records * ENTRY, self.cluster),
+            ],
+        )
+
+        total_clusters = self.next_free + 8
+        boot = bytearray(SECTOR)
+        boot[3:11] = b"NTFS    "
+        struct.pack_into("<HB", boot, 11, SECTOR, self.cluster // SECTOR)
+        struct.pack_into("<Q", boot, 40, total_clusters * (self.cluster // SECTOR))
+        struct.pack_into("<Q", boot, 48, self.mft_runs[0][0])
+        boot[510:512] = b"\x55\xaa"
+
+        empty = bytes(ENTRY)
+        per_cluster = self.cluster // ENTRY
+
+        with open(path, "wb") as image:
+            image.truncate(total_clusters * self.cluster)
+            image.write(boot)
+
+            first = 0
+            for lcn, length in self.mft_runs:
+                last = min(first + length * per_cluster, self.num_records)
+
+                # Sparse runs of the MFT have no records on disk
+                if lcn is None:
+                    first = last
+                    continue
+
+                image.seek(lcn * self.cluster)
+
+                chunk = []
+                for entry in range(first, last):
+                    record = self.records.get(entry)
+                    if record is None:
+                        record = self.__renderFiller(entry) if self.fill and entry >= FIRST_FILE_ENTRY else empty
+                    chunk.append(record)
+
+                    if len(chunk) >= 4096:
+                        image.write(b"".join(chunk))
+                        chunk = []
+
+                image.write(b"".join(chunk))
+                first = last
+
+            for lcn, content in self.clusters.items():
+                image.seek(lcn * self.cluster)
+                image.write(content)
+
+
+def generate(
+    path=None,
+    num_records=4096,
+    reparse_fraction=0.05,
+    tag_mix=None,
+    nonresident_fraction=0.0,
+    directories=16,
+    fragments=1,
+    cluster=4096,
+    fill=True,
+    reparse_index=False,
+    seed=0,
+):
+    """
+    Builds a volume with a random population of reparse points.
+
+    :param path:                 The path of the image.  A temporary file is created if omitted, which
+                                 the caller must remove.
+    :param num_records:          The number of records the MFT has room for
+    :param reparse_fraction:     The share of records after the system files that are reparse points
+    :param tag_mix:              The share of each kind of reparse point, out of symlink, mount,
+                                 cloud and unknown
+    :param nonresident_fraction: The share of reparse points whose data is stored outside the record
+    :param directories:          The number of directories the reparse points are spread over
+    :param fragments:            The number of runs the MFT is split into
+    :param cluster:              The cluster size in bytes
+    :param fill:                 Whether every other record is an in use regular file
+    :param reparse_index:        Whether to add the $Extend\\$Reparse index
+    :param seed:                 The seed of the random population
+
+    :return:                     The path of the image, and the spec of every file added, keyed by
+                                 entry number
+    """
+
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix=".img", prefix="synthetic-ntfs-")
+        os.close(handle)
+
+    rng = random.Random(seed)
+    tag_mix = tag_mix or DEFAULT_TAG_MIX
+    kinds, weights = zip(*tag_mix.items())
+
+    image = SyntheticImage(num_records, cluster, fragments, fill=fill)
+
+    parents = [ROOT_ENTRY]
+    for i in range(min(directories, max(0, num_records - FIRST_FILE_ENTRY))):
+        entry = FIRST_FILE_ENTRY + i
+        image.addFile(entry, f"dir{i}", parent=rng.choice(parents), flags=3)
+        parents.append(entry)
+
+    for entry in range(FIRST_FILE_ENTRY + len(parents) - 1, num_records):
+        if rng.random() >= reparse_fraction:
+            continue
+
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "symlink":
+            tag, data = SYMLINK_TAG, symlink_data(f"C:\\target\\{entry}", relative=rng.random() < 0.5)
+        elif kind == "mount":
+            tag, data = MOUNT_POINT_TAG, mount_point_data(f"C:\\mount\\{entry}")
+        elif kind == "cloud":
+            tag, data = CLOUD_TAG, cloud_data(f"{rng.getrandbits(64):016X}")
+        else:
+            tag, data = UNKNOWN_TAG, bytes(rng.getrandbits(8) for _ in range(24))
+
+        image.addFile(
+            entry,
+            f"{kind}{entry}",
+            parent=rng.choice(parents),
+            tag=tag,
+            data=data,
+            nonresident=rng.random() < nonresident_fraction,
+        )
+
+    if reparse_index:
+        image.addReparseIndex()
+
+    image.write(path)
+    return path, image.files
+
+
+def make_disk(path, volumes, scheme="mbr", sector=SECTOR, align=1024 * 1024):
+    """
+    Builds a disk image with a partition table from volume images.  With the MBR scheme, the first
+    volume is a primary partition and the others are logical partitions of an extended partition.
+
+    :param path:    The path of the disk image to write
+    :param volumes: The paths of the volume images, in partition order.  None adds a partition of
+                    one aligned block that does not hold NTFS.
+    :param scheme:  "mbr" or "gpt"
+    :param sector:  The sector size of the disk
+    :param align:   The alignment of each partition in bytes
+
+    :return:        The byte offset of each partition
+    """
+
+    sizes = [align if volume is None else os.path.getsize(volume) for volume in volumes]
+
+    # Leave room before each logical partition for its extended boot record
+    offsets = []
+    offset = align
+    for size in sizes:
+        if scheme == "mbr" and offsets:
+            offset += align
+        offsets.append(offset)
+        offset += -(-size // align) * align
+
+    mbr = bytearray(sector)
+    mbr[510:512] = b"\x55\xaa"
+
+    def mbr_entry(record, index, partition_type, start, sectors):
+        struct.pack_into("<B3xB3xII", record, 446 + index * 16, 0, partition_type, start, sectors)
+
+    with open(path, "wb") as disk:
+        disk.truncate(offset + align)
+
+        if scheme == "gpt":
+            mbr_entry(mbr, 0, 0xEE, 1, min(offset // sector, 0xFFFFFFFF))
+
+            entries = bytearray(128 * 128)
+            basic_data = bytes.fromhex("a2a0d0ebe5b9334487c068b6b72699c7")
+            for index, (start, size) in enumerate(zip(offsets, sizes)):
+                name = f"volume{index + 1}".encode("utf-16-le")
+                struct.pack_into(
+                    "<16s16sQQQ",
+                    entries,
+                    index * 128,
+                    basic_data,
+                    random.Random(index).randbytes(16),
+                    start // sector,
+                    (start + size) // sector - 1,
+                    0,
+                )
+                entries[index * 128 + 56 : index * 128 + 56 + len(name)] = name
+
+            header = bytearray(sector)
+            struct.pack_into(
+                "<8sIIIIQQQQ16sQII",
+                header,
+                0,
+                b"EFI PART",
+                0x10000,
+                92,
+                0,
+                0,
+                1,
+                offset // sector,
+                34,
+                offset // sector,
+                bytes(16),
+                2,
+                128,
+                128,
+            )
+            disk.seek(sector)
+            disk.write(header)
+            disk.seek(2 * sector)
+            disk.write(entries)
+        else:
+            mbr_entry(mbr, 0, 0x07, offsets[0] // sector, sizes[0] // sector)
+            if len(offsets) > 1:
+                extended_start = (offsets[1] - align) // sector
+                mbr_entry(mbr, 1, 0x0F, extended_start, offset // sector - extended_start)
+
+                for index in range(1, len(offsets)):
+                    record_start = (offsets[index] - align) // sector
+                    record = bytearray(sector)
+                    record[510:512] = b"\x55\xaa"
+                    mbr_entry(record, 0, 0x07, align // sector, sizes[index] // sector)
+                    if index + 1 < len(offsets):
+                        following = (offsets[index + 1] - align) // sector
+                        mbr_entry(record, 1, 0x05, following - extended_start, sizes[index + 1] // sector)
+                    disk.seek(record_start * sector)
+                    disk.write(record)
+
+        disk.seek(0)
+        disk.write(mbr)
+
+        for volume, start in zip(volumes, offsets):
+            disk.seek(start)
+            if volume is None:
+                disk.write(b"\xeb\x3cmkfs.fat" + bytes(sector - 10))
+                continue
+            with open(volume, "rb") as volume_file:
+                while chunk := volume_file.read(4 * 1024 * 1024):
+                    disk.write(chunk)
+
+    return offsets
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import AsyncNavigator, Navigator
+
+
+class CountingNavigator(Navigator.Navigator):
+    """
+    Counts the lookups in flight across every copy of the navigator.
+    """
+
+    lock = threading.Lock()
+    in_flight = 0
+    most_in_flight = 0
+
+    def getEntry(self, entry):
+        with CountingNavigator.lock:
+            CountingNavigator.in_flight += 1
+            CountingNavigator.most_in_flight = max(CountingNavigator.most_in_flight, CountingNavigator.in_flight)
+
+        try:
+            time.sleep(0.002)
+            return super().getEntry(entry)
+        finally:
+            with CountingNavigator.lock:
+                CountingNavigator.in_flight -= 1
+
+
+class TestAsyncNavigator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.image, cls.files = synthetic_ntfs.generate(num_records=4096, fragments=3, nonresident_fraction=0.2)
+        cls.reparse_points = sorted(entry for entry, spec in cls.files.items() if spec["tag"] is not None)
+
+        with Navigator.Navigator(cls.image) as nav:
+            cls.expected = {entry: nav.getEntry(entry)["reparse_data"] for entry in cls.reparse_points}
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.image)
+
+    def test_concurrent_get_entry(self):
+        async def lookUp():
+            async with await AsyncNavigator.AsyncNavigator.open(self.image, max_in_flight=4) as nav:
+                records = await asyncio.gather(*(nav.getEntry(entry) for entry in self.reparse_points))
+                batch = await nav.getEntries(self.reparse_points[:20] + [0])
+
+            return records, batch
+
+        records, batch = asyncio.run(lookUp())
+        expected = [self.expected[entry] for entry in self.reparse_points]
+
+        # The results match serial lookups, in the order they were asked for
+        self.assertEqual([record["reparse_data"] for record in records], expected)
+        self.assertEqual([record["reparse_data"] for record in batch[:-1]], expected[:20])
+        self.assertIsInstance(batch[-1], Exception)
+
+    def test_in_flight_cap(self):
+        CountingNavigator.most_in_flight = 0
+        executor = ThreadPoolExecutor(max_workers=8)
+        self.addCleanup(executor.shutdown)
+
+        async def lookUp():
+            nav = AsyncNavigator.AsyncNavigator(CountingNavigator(self.image), max_in_flight=2, executor=executor)
+            async with nav:
+                return await asyncio.gather(*(nav.getEntry(entry) for entry in self.reparse_points[:40]))
+
+        records = asyncio.run(lookUp())
+
+        self.assertEqual(len(records), 40)
+        self.assertEqual(CountingNavigator.most_in_flight, 2)
+
+    def test_sweep(self):
+        async def sweep():
+            async with await AsyncNavigator.AsyncNavigator.open(self.image) as nav:
+                return [record async for record in nav.sweepEntries()]
+
+        # Smaller batches than the sweep, so records are pulled in several trips to the executor
+        batch_size = AsyncNavigator.AsyncNavigator.SWEEP_BATCH_SIZE
+        self.addCleanup(setattr, AsyncNavigator.AsyncNavigator, "SWEEP_BATCH_SIZE", batch_size)
+        AsyncNavigator.AsyncNavigator.SWEEP_BATCH_SIZE = 7
+        records = asyncio.run(sweep())
+
+        self.assertEqual([record["mft_entry"] for record in records], self.reparse_points)
+        self.assertEqual(
+            [record["reparse_data"] for record in records], [self.expected[entry] for entry in self.reparse_points]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import pickle
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import ClusterCache
+
+
+class TestClusterCache(unittest.TestCase):
+    def test_least_recently_used_eviction(self):
+        cache = ClusterCache.ClusterCache(max_bytes=8)
+        cache.put(("image", 1), b"1111")
+        cache.put(("image", 2), b"2222")
+
+        # Touching cluster 1 makes cluster 2 the least recently used
+        self.assertEqual(cache.get(("image", 1)), b"1111")
+        cache.put(("image", 3), b"3333")
+
+        self.assertIsNone(cache.get(("image", 2)))
+        self.assertEqual(cache.get(("image", 3)), b"3333")
+        self.assertEqual(cache.size, 8)
+
+    def test_pickle_drops_clusters(self):
+        cache = ClusterCache.ClusterCache(max_bytes=8)
+        cache.put(("image", 1), b"1111")
+
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(len(copy), 0)
+        self.assertEqual(copy.max_bytes, 8)
+
+if __name__ == "__main__":
+    unittest.main()
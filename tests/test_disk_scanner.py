@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import DiskScanner, Navigator, Stats
+
+
+class TestDiskScanner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+
+        volumes = []
+        cls.reparse_points = []
+        for seed, num_records in enumerate((2048, 20480)):
+            volume, files = synthetic_ntfs.generate(
+                os.path.join(cls.directory.name, f"volume{seed}.img"), num_records=num_records, seed=seed
+            )
+            volumes.append(volume)
+            cls.reparse_points.append(sorted(entry for entry, spec in files.items() if spec["tag"] is not None))
+
+        cls.disk = os.path.join(cls.directory.name, "disk.img")
+        cls.offsets = synthetic_ntfs.make_disk(cls.disk, [volumes[0], None, volumes[1]], "gpt")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_partition_offset(self):
+        with Navigator.Navigator(self.disk, partition_offset=self.offsets[2]) as nav:
+            self.assertEqual([record["mft_entry"] for record in nav.sweepEntries()], self.reparse_points[1])
+
+    def test_sweep(self):
+        expected = [(1, entry) for entry in self.reparse_points[0]] + [(3, entry) for entry in self.reparse_points[1]]
+
+        for jobs in (1, 2):
+            stats = Stats.Stats()
+            with DiskScanner.DiskScanner(self.disk, stats=stats) as scanner:
+                self.assertEqual([partition["number"] for partition in scanner.partitions], [1, 3])
+                results = [
+                    (partition["number"], record["mft_entry"]) for partition, record in scanner.sweepEntries(jobs)
+                ]
+
+            self.assertEqual(results, expected)
+            self.assertEqual(stats.counters["reparse_points"], len(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
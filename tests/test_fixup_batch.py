@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import FixupBatch
+
+
+def make_entry(usn: bytes, torn: bool = False) -> bytes:
+    entry = bytearray(1024)
+    entry[0:4] = b"FILE"
+    entry[4:8] = bytes([0x30, 0x00, 0x03, 0x00])
+
+    # The update sequence array holds the USN followed by the real last two bytes of each sector
+    entry[0x30:0x36] = usn + b"\xAA\xBB" + b"\xCC\xDD"
+    entry[510:512] = usn
+    entry[1022:1024] = b"\x00\x00" if torn else usn
+    return bytes(entry)
+
+
+class TestFixupBatch(unittest.TestCase):
+    def check_batch(self, use_numpy):
+        data = make_entry(b"\x05\x00") + make_entry(b"\x06\x00", torn=True) + bytes(1024)
+        batch = FixupBatch.FixupBatch(data, 1024, use_numpy=use_numpy)
+
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.valid, [True, False, False])
+        self.assertEqual(bytes(batch[0][510:512]), b"\xAA\xBB")
+        self.assertEqual(bytes(batch[0][1022:1024]), b"\xCC\xDD")
+
+    def test_python_fixup(self):
+        self.check_batch(use_numpy=False)
+
+    @unittest.skipIf(FixupBatch.np is None, "NumPy is not installed")
+    def test_numpy_fixup(self):
+        self.check_batch(use_numpy=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import ImageDiff, Navigator
+
+
+class TestImageDiff(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        self.files = {
+            100 + i: dict(
+                name=f"link{i}", tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data(f"C:\\t{i}")
+            )
+            for i in range(50)
+        }
+
+    def writeImage(self, name, fragments=1):
+        image = synthetic_ntfs.SyntheticImage(num_records=8192, fill=True, fragments=fragments)
+        for entry, spec in self.files.items():
+            image.addFile(entry, **spec)
+
+        path = os.path.join(self.directory.name, name)
+        image.write(path)
+        return path
+
+    def compare(self, old, new, use_mmap=False):
+        with Navigator.Navigator(old, use_mmap=use_mmap, resolve_paths=True) as old_nav:
+            with Navigator.Navigator(new, use_mmap=use_mmap, resolve_paths=True) as new_nav:
+                diff = ImageDiff.ImageDiff(old_nav, new_nav)
+                changes = [(change, entry, info["Print Name"]) for change, entry, info in diff.compare()]
+        return diff, changes
+
+    def test_identical(self):
+        old = self.writeImage("old.img")
+        diff, changes = self.compare(old, self.writeImage("new.img", fragments=3))
+        self.assertEqual(changes, [])
+        self.assertEqual(diff.entries_compared, 8192)
+
+        # Only the $MFT entry differs, as it holds the runlist of the other layout
+        self.assertEqual(diff.entries_differing, 1)
+
+    def test_changes(self):
+        old = self.writeImage("old.img")
+
+        self.files[101]["data"] = synthetic_ntfs.symlink_data("C:\\moved")
+        self.files[102] = dict(name="plain")
+        self.files[103].update(sequence=2, data=synthetic_ntfs.symlink_data("C:\\reused"))
+        self.files[5000] = dict(
+            name="mount", tag=synthetic_ntfs.MOUNT_POINT_TAG, data=synthetic_ntfs.mount_point_data("C:\\m")
+        )
+        self.files[104]["name"] = "renamed"
+        self.files[6000] = dict(name="regular")
+
+        for use_mmap in (False, True):
+            diff, changes = self.compare(old, self.writeImage("new.img", fragments=3), use_mmap)
+            self.assertEqual(
+                changes,
+                [
+                    ("modified", 101, "C:\\moved"),
+                    ("removed", 102, "C:\\t2"),
+                    ("removed", 103, "C:\\t3"),
+                    ("added", 103, "C:\\reused"),
+                    ("modified", 104, "C:\\t4"),
+                    ("added", 5000, "C:\\m"),
+                ],
+            )
+
+            # Only the entries that were written to, and the $MFT entry, are parsed
+            self.assertEqual(diff.entries_differing, 7)
+
+
+    def compareUnchanged(self, entry, change):
+        # Changes a file between the images without changing the entry of the link
+        old = self.writeImage("old.img")
+        change()
+        new = self.writeImage("new.img")
+
+        with Navigator.Navigator(old) as old_nav, Navigator.Navigator(new) as new_nav:
+            self.assertEqual(old_nav.readRawEntries(entry, entry + 1), new_nav.readRawEntries(entry, entry + 1))
+
+        results = []
+        for use_mmap in (False, True):
+            with Navigator.Navigator(old, use_mmap=use_mmap, resolve_paths=True) as old_nav:
+                with Navigator.Navigator(new, use_mmap=use_mmap, resolve_paths=True) as new_nav:
+                    results.append(
+                        [
+                            (change, entry, info["Print Name"], info["File Path"])
+                            for change, entry, info in ImageDiff.ImageDiff(old_nav, new_nav).compare()
+                        ]
+                    )
+
+        self.assertEqual(results[0], results[1])
+        return old, new, results[0]
+
+    def test_extension_entry(self):
+        # The reparse attribute changes in the extension entry only
+        self.files[110]["extension"] = 300
+        _, _, changes = self.compareUnchanged(
+            110, lambda: self.files[110].update(data=synthetic_ntfs.symlink_data("C:\\ext"))
+        )
+        self.assertEqual(changes, [("modified", 110, "C:\\ext", "\\link10")])
+
+    def test_non_resident_data(self):
+        # The data outside the entry is rewritten in place
+        self.files[111].update(nonresident=True, data=synthetic_ntfs.symlink_data("C:\\" + "a" * 600))
+        _, _, changes = self.compareUnchanged(
+            111, lambda: self.files[111].update(data=synthetic_ntfs.symlink_data("C:\\" + "b" * 600))
+        )
+        self.assertEqual(changes, [("modified", 111, "C:\\" + "b" * 600, "\\link11")])
+
+    def test_renamed_directory(self):
+        # Renaming the directory changes the path of the link in it
+        self.files[150] = dict(name="links", flags=3)
+        self.files[151] = dict(
+            name="inner", parent=150, tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data("C:\\in")
+        )
+        old, new, changes = self.compareUnchanged(151, lambda: self.files[150].update(name="moved"))
+        self.assertEqual(changes, [("modified", 151, "C:\\in", "\\moved\\inner")])
+
+        # Without paths, the rename changes nothing that is reported
+        with Navigator.Navigator(old) as old_nav, Navigator.Navigator(new) as new_nav:
+            self.assertEqual(list(ImageDiff.ImageDiff(old_nav, new_nav).compare()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
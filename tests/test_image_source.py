@@ -0,0 +1,100 @@
+import os
+import pickle
+import random
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import ImageSource, SegmentedImageSource
+
+
+class TestImageSource(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.data = random.Random(0).randbytes(10000)
+
+        cls.image = os.path.join(cls.directory.name, "image.raw")
+        with open(cls.image, "wb") as image:
+            image.write(cls.data)
+
+        # Uneven segments, including an empty one
+        cls.boundaries = [0, 1000, 1000, 4096, 7777, 10000]
+        for number, (start, stop) in enumerate(zip(cls.boundaries, cls.boundaries[1:]), 1):
+            with open(os.path.join(cls.directory.name, f"split.{number:03d}"), "wb") as segment:
+                segment.write(cls.data[start:stop])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def assertReads(self, source):
+        self.assertEqual(source.size, len(self.data))
+        for boundary in self.boundaries:
+            for offset in (boundary - 3, boundary, boundary + 1):
+                offset = max(offset, 0)
+                for length in (1, 5, 512, 4000):
+                    self.assertEqual(bytes(source.read(offset, length)), self.data[offset : offset + length])
+
+        self.assertEqual(bytes(source.read(0, len(self.data) + 10)), self.data)
+        self.assertEqual(bytes(source.read(len(self.data), 10)), b"")
+
+        # Hints do not change what is read, and are ignored where they cannot be given
+        source.advise(0, len(self.data), "sequential")
+        source.advise(900, 10**6, "willneed")
+        self.assertEqual(bytes(source.read(900, 200)), self.data[900:1100])
+
+    def test_single_file(self):
+        for use_mmap in (False, True):
+            for readahead in (0, 1024):
+                with ImageSource.ImageSource(self.image, use_mmap, readahead) as source:
+                    self.assertEqual(source.segments, [self.image])
+                    self.assertReads(source)
+
+    def test_find_segments(self):
+        first = os.path.join(self.directory.name, "split.001")
+        segments = SegmentedImageSource.SegmentedImageSource.findSegments(first)
+
+        self.assertEqual(len(segments), 5)
+        self.assertEqual(segments[-1], os.path.join(self.directory.name, "split.005"))
+        self.assertEqual(SegmentedImageSource.SegmentedImageSource.findSegments(first[:-4]), segments)
+        self.assertEqual(SegmentedImageSource.SegmentedImageSource.findSegments(self.image), [self.image])
+        self.assertEqual(SegmentedImageSource.SegmentedImageSource.findSegments(self.image + ".missing"), [])
+
+    def test_segmented(self):
+        first = os.path.join(self.directory.name, "split.001")
+        for use_mmap in (False, True):
+            for readahead in (0, 64, None):
+                with SegmentedImageSource.SegmentedImageSource(first, use_mmap, readahead) as source:
+                    self.assertReads(source)
+
+    def test_pickle(self):
+        first = os.path.join(self.directory.name, "split.001")
+        with SegmentedImageSource.SegmentedImageSource(first, readahead=128) as source:
+            copy = pickle.loads(pickle.dumps(source))
+
+        with copy:
+            self.assertEqual(copy.readahead, 128)
+            self.assertReads(copy)
+
+    def test_clone(self):
+        first = os.path.join(self.directory.name, "split.001")
+        sources = (ImageSource.ImageSource(self.image, readahead=64), SegmentedImageSource.SegmentedImageSource(first))
+        for source in sources:
+            with source:
+                clone = source.clone()
+
+            # The clone keeps its own handles open after the source is closed
+            with clone:
+                self.assertIs(type(clone), type(source))
+                self.assertEqual(clone.readahead, source.readahead)
+                self.assertReads(clone)
+
+
+if __name__ == "__main__":
+    unittest.main()
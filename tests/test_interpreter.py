@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import Interpreter
+
+
+class TestInterpreter(unittest.TestCase):
+    def makeData(self, tag, data):
+        return {"reparse_tag": tag.to_bytes(4, "little"), "reparse_data": data, "file_name": "file"}
+
+    def test_onedrive_personal_cid(self):
+        # The CID is split up by UTF-16 padding and whitespace in the raw data
+        data = b"\x01\x00" + "0123456789ABCDEF!".encode("utf-16-le") + b"\r\n\xff"
+        info = Interpreter.Interpreter(self.makeData(0x9000701A, data)).resolveAllInfo()
+
+        self.assertEqual(info["OneDrive CID"], "0123456789ABCDEF")
+        self.assertEqual(info["OneDrive Account Type"], "OneDrive Personal")
+
+    def test_symlink(self):
+        name = "C:\\target".encode("utf-16-le")
+        header = (0).to_bytes(2, "little") + len(name).to_bytes(2, "little")
+        header += len(name).to_bytes(2, "little") + len(name).to_bytes(2, "little")
+        data = header + (1).to_bytes(4, "little") + name + name
+        interpreter = Interpreter.Interpreter(self.makeData(0xA000000C, data))
+        info = interpreter.resolveAllInfo()
+
+        self.assertEqual(info["Substitute Name"], "C:\\target")
+        self.assertEqual(info["Print Name"], "C:\\target")
+        self.assertEqual(info["Flag Info"], "Substitute name is a relative path name")
+        self.assertEqual(interpreter.resolveLinkTarget(), ("C:\\target", True))
+
+    def test_registered_decoder(self):
+        tag = 0x8000BEEF
+
+        def decode(interpreter):
+            return {"Payload Length": str(len(interpreter.reparse_data["reparse_data"]))}
+
+        Interpreter.Interpreter.registerDecoder(tag)(decode)
+        try:
+            info = Interpreter.Interpreter(self.makeData(tag, b"1234")).resolveAllInfo()
+            self.assertEqual(info["Payload Length"], "4")
+        finally:
+            Interpreter.Interpreter.DECODERS[0xFFFFFFFF][tag].remove(decode)
+
+    def test_find_tags(self):
+        self.assertEqual(Interpreter.Interpreter.findTags("symlink"), {0xA000000C})
+        self.assertEqual(Interpreter.Interpreter.findTags("Mount"), {0xA0000003})
+        self.assertEqual(Interpreter.Interpreter.findTags("0x8000BEEF"), {0x8000BEEF})
+        self.assertEqual(len(Interpreter.Interpreter.findTags("cloud")), 16)
+        self.assertRaises(Exception, Interpreter.Interpreter.findTags, "bogus")
+
+
+if __name__ == "__main__":
+    unittest.main()
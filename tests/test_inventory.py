@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import Inventory, Navigator, UsnJournal
+
+CREATE = UsnJournal.UsnJournal.REASON_FILE_CREATE
+DELETE = UsnJournal.UsnJournal.REASON_FILE_DELETE
+RENAME = UsnJournal.UsnJournal.REASON_RENAME_NEW_NAME
+REPARSE_CHANGE = UsnJournal.UsnJournal.REASON_REPARSE_POINT_CHANGE
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.inventory_path = os.path.join(self.directory.name, "inventory.json")
+
+        self.files = {
+            100 + i: (f"link{i}", synthetic_ntfs.SYMLINK_TAG, synthetic_ntfs.symlink_data(f"C:\\target{i}"))
+            for i in range(50)
+        }
+        self.changes = [(entry, CREATE | REPARSE_CHANGE, spec[0]) for entry, spec in self.files.items()]
+
+    def writeImage(self, name, directory="dir", journal_id=1):
+        image = synthetic_ntfs.SyntheticImage(num_records=256, fill=True)
+        image.addFile(64, directory, flags=3)
+        for entry, (file_name, tag, data) in self.files.items():
+            image.addFile(entry, file_name, parent=64 if entry % 2 else synthetic_ntfs.ROOT_ENTRY, tag=tag, data=data)
+        image.addUsnJournal(self.changes, journal_id=journal_id)
+
+        path = os.path.join(self.directory.name, name)
+        image.write(path)
+        return path
+
+    def update(self, image):
+        inventory = Inventory.Inventory(self.inventory_path)
+        with Navigator.Navigator(image, resolve_paths=True) as nav:
+            changes = [(change, entry) for change, entry, _ in inventory.update(nav)]
+        inventory.save()
+        return inventory, changes
+
+    def test_incremental(self):
+        inventory, changes = self.update(self.writeImage("first.img"))
+        self.assertFalse(inventory.incremental)
+        self.assertEqual(changes, [(Inventory.Inventory.ADDED, entry) for entry in sorted(self.files)])
+
+        self.files[101] = ("link1", None, b"")
+        self.files[102] = ("link2", synthetic_ntfs.SYMLINK_TAG, synthetic_ntfs.symlink_data("C:\\moved"))
+        self.files[200] = ("mount", synthetic_ntfs.MOUNT_POINT_TAG, synthetic_ntfs.mount_point_data("C:\\mount"))
+        del self.files[103]
+        self.changes += [(101, REPARSE_CHANGE, "link1"), (102, REPARSE_CHANGE, "link2"), (200, CREATE, "mount")]
+        self.changes.append((103, DELETE, "link3"))
+
+        inventory, changes = self.update(self.writeImage("second.img"))
+        self.assertTrue(inventory.incremental)
+        self.assertEqual(changes, [("removed", 101), ("modified", 102), ("removed", 103), ("added", 200)])
+        self.assertEqual(len(inventory.records), 49)
+
+        # Renaming a directory changes the path of the reparse points under it
+        self.changes.append((64, RENAME, "renamed", 0x10))
+        inventory, changes = self.update(self.writeImage("third.img", directory="renamed"))
+        self.assertTrue(inventory.incremental)
+        self.assertEqual(changes, [("modified", entry) for entry in sorted(inventory.records) if entry % 2])
+
+        inventory, changes = self.update(self.writeImage("third.img", directory="renamed"))
+        self.assertEqual(changes, [])
+
+    def test_recreated_journal(self):
+        self.update(self.writeImage("first.img"))
+
+        self.files[200] = ("mount", synthetic_ntfs.MOUNT_POINT_TAG, synthetic_ntfs.mount_point_data("C:\\mount"))
+        self.changes = [(200, CREATE, "mount")]
+
+        inventory, changes = self.update(self.writeImage("second.img", journal_id=2))
+        self.assertFalse(inventory.incremental)
+        self.assertEqual(changes, [("added", 200)])
+
+
+if __name__ == "__main__":
+    unittest.main()
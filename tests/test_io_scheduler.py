@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import IOScheduler
+
+
+class TestIOScheduler(unittest.TestCase):
+    def test_merge(self):
+        scheduler = IOScheduler.IOScheduler(block_size=4096)
+        reads = scheduler.plan([(9000, 1024, "c"), (100, 1024, "a"), (5000, 1024, "b"), (40960, 10, "d")])
+
+        self.assertEqual(
+            reads,
+            [
+                (0, 12288, [(100, 1024, "a"), (5000, 1024, "b"), (9000, 1024, "c")]),
+                (40960, 4096, [(40960, 10, "d")]),
+            ],
+        )
+
+    def test_touching(self):
+        scheduler = IOScheduler.IOScheduler(block_size=1)
+        reads = scheduler.plan([(0, 1024, 0), (1024, 1024, 1), (4096, 1024, 2), (4096, 1024, 3)])
+
+        self.assertEqual(
+            reads, [(0, 2048, [(0, 1024, 0), (1024, 1024, 1)]), (4096, 1024, [(4096, 1024, 2), (4096, 1024, 3)])]
+        )
+
+    def test_max_read_size(self):
+        scheduler = IOScheduler.IOScheduler(block_size=4096, max_read_size=8192)
+        reads = scheduler.plan([(i * 4096, 4096, i) for i in range(5)] + [(40960, 20000, "large")])
+
+        self.assertEqual(
+            [(offset, length) for offset, length, _ in reads], [(0, 8192), (8192, 8192), (16384, 4096), (40960, 20480)]
+        )
+        self.assertEqual(sum(len(requests) for _, _, requests in reads), 6)
+
+    def test_empty(self):
+        self.assertEqual(IOScheduler.IOScheduler().plan([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+import unittest
+
+# Allow importing from parent directory, and the package by its installed name as the CLI does
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+sys.path.append(os.path.join(parent, "src"))
+
+from parse_reparsepoint.__main__ import parseEntryList
+
+
+class TestParseEntryList(unittest.TestCase):
+    def test_lists(self):
+        self.assertEqual(parseEntryList("5"), [5])
+        self.assertEqual(parseEntryList("5,7,100"), [5, 7, 100])
+        self.assertEqual(parseEntryList("9,3"), [9, 3])
+
+    def test_ranges(self):
+        self.assertEqual(parseEntryList("100-103"), [100, 101, 102, 103])
+        self.assertEqual(parseEntryList("5-5"), [5])
+        self.assertEqual(parseEntryList("1,10-12,4"), [1, 10, 11, 12, 4])
+
+    def test_whitespace(self):
+        self.assertEqual(parseEntryList(" 1\n2\t3-4 ,\n5 "), [1, 2, 3, 4, 5])
+        self.assertEqual(parseEntryList("1,,2"), [1, 2])
+
+    def test_bad_input(self):
+        for text in ("", " ,\n", "5-3", "abc", "1,x", "-5", "1-", "1-2-3", "0x10"):
+            with self.assertRaises(argparse.ArgumentTypeError, msg=text):
+                parseEntryList(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
+import copy
 import os
 import sys
+import tempfile
+import threading
 import unittest
 
 # Allow importing from parent directory
@@ -7,7 +10,8 @@ current = os.path.dirname(os.path.realpath(__file__))
 parent = os.path.dirname(current)
 sys.path.append(parent)
 
-from src.parse_reparsepoint import Navigator
+import synthetic_ntfs
+from src.parse_reparsepoint import Navigator, Stats
 
 FILENAME = "..\\test_navigator.py"
 IMAGES = current + "/images/"
@@ -26,6 +30,239 @@ class TestNavigator(unittest.TestCase):
         self.assertEqual(nav.mft_byte_offset, 3221225472)
         self.assertEqual(len(nav.mft_clusters), 69888)
 
+
+class TestNavigatorSynthetic(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.image, cls.files = synthetic_ntfs.generate(
+            num_records=8192, fragments=5, nonresident_fraction=0.2, reparse_index=True
+        )
+        cls.reparse_points = sorted(entry for entry, spec in cls.files.items() if spec["tag"] is not None)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.image)
+
+    def test_fragmented_runlist(self):
+        with Navigator.Navigator(self.image) as nav:
+            self.assertEqual(len(list(nav.mft_clusters.extents())), 5)
+            self.assertEqual(nav.getEntryCount(), 8192)
+
+    def test_sweep(self):
+        with Navigator.Navigator(self.image) as nav:
+            self.assertEqual([record["mft_entry"] for record in nav.sweepEntries()], self.reparse_points)
+
+    def test_indexed_sweep(self):
+        with Navigator.Navigator(self.image) as nav:
+            self.assertEqual([record["mft_entry"] for record in nav.sweepIndexedEntries()], self.reparse_points)
+
+    def test_get_entry(self):
+        with Navigator.Navigator(self.image, resolve_paths=True) as nav:
+            for entry in self.reparse_points[:50]:
+                spec = self.files[entry]
+                record = nav.getEntry(entry)
+
+                self.assertEqual(int.from_bytes(record["reparse_tag"], "little"), spec["tag"])
+                self.assertEqual(record["reparse_data"], spec["data"])
+                self.assertTrue(record["file_path"].endswith("\\" + spec["name"]))
+
+    def test_directory_path_limit(self):
+        with Navigator.Navigator(self.image, resolve_paths=True) as nav:
+            expected = [nav.getEntry(entry)["file_path"] for entry in self.reparse_points[:50]]
+
+        # The memo of directory paths is cleared when it fills up, without changing any path
+        with Navigator.Navigator(self.image, resolve_paths=True) as nav:
+            nav.MAX_DIRECTORY_PATHS = 2
+            self.assertEqual([nav.getEntry(entry)["file_path"] for entry in self.reparse_points[:50]], expected)
+            self.assertLessEqual(len(nav._Navigator__directory_paths), 2)
+
+    def test_get_entries(self):
+        with Navigator.Navigator(self.image) as nav:
+            results = nav.getEntries([self.reparse_points[0], 0, self.reparse_points[-1]])
+
+        self.assertEqual(results[0]["mft_entry"], self.reparse_points[0])
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2]["mft_entry"], self.reparse_points[-1])
+
+        # Reads merged into blocks of any size, including the clusters of non-resident reparse data
+        entries = self.reparse_points[::3] + [0] + self.reparse_points[::7]
+        with Navigator.Navigator(self.image) as nav:
+            expected = [None if entry == 0 else nav.getEntry(entry)["reparse_data"] for entry in entries]
+
+        for io_block_size in (1, 4096, None):
+            with Navigator.Navigator(self.image, io_block_size=io_block_size) as nav:
+                results = nav.getEntries(entries)
+
+            self.assertEqual(
+                [None if isinstance(result, Exception) else result["reparse_data"] for result in results], expected
+            )
+
+    def test_concurrent_copies(self):
+        entries = self.reparse_points[:200]
+        with Navigator.Navigator(self.image) as nav:
+            expected = [nav.getEntry(entry)["reparse_data"] for entry in entries]
+
+            # Copies read from their own handles, so reads from other threads never move their position
+            copies = [copy.copy(nav) for _ in range(4)]
+            self.assertEqual(len({id(handle.source) for handle in copies + [nav]}), 5)
+
+            results = {}
+            barrier = threading.Barrier(len(copies))
+
+            def lookUp(handle):
+                barrier.wait()
+                results[handle] = [
+                    [handle.getEntry(entry)["reparse_data"] for entry in entries] for _ in range(5)
+                ]
+
+            threads = [threading.Thread(target=lookUp, args=(handle,)) for handle in copies]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for handle in copies:
+                self.assertEqual(results[handle], [expected] * 5)
+                handle.close()
+
+            # Closing the copies leaves the navigator open
+            self.assertEqual(nav.getEntry(entries[0])["reparse_data"], expected[0])
+
+    def test_split_image(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        # Segments that do not line up with clusters or records
+        with open(self.image, "rb") as image:
+            number = 1
+            while segment := image.read(1000003):
+                with open(os.path.join(directory.name, f"image.{number:03d}"), "wb") as segment_file:
+                    segment_file.write(segment)
+                number += 1
+
+        for use_mmap in (False, True):
+            with Navigator.Navigator(os.path.join(directory.name, "image.001"), use_mmap=use_mmap) as nav:
+                self.assertGreater(len(nav.source.segments), 1)
+                self.assertEqual([record["mft_entry"] for record in nav.sweepEntries()], self.reparse_points)
+                entry = self.reparse_points[-1]
+                self.assertEqual(nav.getEntry(entry)["reparse_data"], self.files[entry]["data"])
+
+    def test_stats(self):
+        stats = Stats.Stats()
+        with Navigator.Navigator(self.image, stats=stats) as nav:
+            records = list(nav.sweepEntries())
+
+        self.assertEqual(stats.counters["reparse_points"], len(records))
+        self.assertGreaterEqual(stats.counters["records_parsed"], len(records))
+        self.assertGreater(stats.counters["records_filtered"], 0)
+        self.assertEqual(
+            stats.counters["records_parsed"] + stats.counters["records_filtered"] + stats.counters["records_invalid"],
+            nav.getEntryCount(),
+        )
+        self.assertGreaterEqual(stats.counters["bytes_read"], nav.getEntryCount() * nav.bytes_per_entry)
+        self.assertEqual(stats.timings["parse"]["count"], stats.counters["records_parsed"])
+
+    def test_parallel_sweep(self):
+        with Navigator.Navigator(self.image, resolve_paths=True) as nav:
+            expected = [(record.mft_entry, record.reparse_data, record.file_path) for record in nav.sweepEntries()]
+
+            # Shards that do not line up with the fragments of the MFT
+            for shard_size in (None, 1000):
+                records = [
+                    (record.mft_entry, record.reparse_data, record.file_path)
+                    for record in nav.sweepEntriesParallel(2, shard_size)
+                ]
+                self.assertEqual(records, expected)
+
+        serial_stats, parallel_stats = Stats.Stats(), Stats.Stats()
+        with Navigator.Navigator(self.image, stats=serial_stats) as nav:
+            serial = list(nav.sweepEntries())
+        with Navigator.Navigator(self.image, stats=parallel_stats) as nav:
+            self.assertEqual(list(nav.sweepEntriesParallel(2, 1000)), serial)
+
+        for counter in ("reparse_points", "records_parsed", "records_filtered", "records_invalid"):
+            self.assertEqual(parallel_stats.counters[counter], serial_stats.counters[counter], counter)
+        self.assertEqual(parallel_stats.timings["parse"]["count"], serial_stats.timings["parse"]["count"])
+
+    def test_tag_filter(self):
+        tags = {synthetic_ntfs.SYMLINK_TAG, synthetic_ntfs.CLOUD_TAG}
+        expected = [entry for entry in self.reparse_points if self.files[entry]["tag"] in tags]
+
+        with Navigator.Navigator(self.image, tags=tags) as nav:
+            self.assertEqual([record["mft_entry"] for record in nav.sweepEntries()], expected)
+            self.assertEqual([record["mft_entry"] for record in nav.sweepIndexedEntries()], expected)
+
+    def test_sparse_mft_run(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        # The second half of the MFT is a sparse run
+        image = synthetic_ntfs.SyntheticImage(num_records=64, fragments=2)
+        image.addFile(20, "link", tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data("C:\\link"))
+        image.mft_runs[1] = (None, image.mft_runs[1][1])
+        path = os.path.join(directory.name, "sparse.img")
+        image.write(path)
+
+        with Navigator.Navigator(path) as nav:
+            self.assertEqual([record["mft_entry"] for record in nav.sweepEntries()], [20])
+
+            with self.assertRaisesRegex(Exception, "sparse run of the MFT"):
+                nav.getEntry(40)
+
+            results = nav.getEntries([40, 20])
+            self.assertIn("sparse run of the MFT", str(results[0]))
+            self.assertEqual(results[1]["mft_entry"], 20)
+
+    def test_carve(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        def link(target):
+            return dict(tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data(target))
+
+        image = synthetic_ntfs.SyntheticImage(num_records=256, fill=True)
+        image.addFile(100, "live", **link("C:\\live"))
+        image.addFile(101, "deleted", flags=0, **link("C:\\deleted"))
+        free = image.addLostRecord(300, "lost", **link("C:\\lost"))
+        reused = image.addLostRecord(
+            301,
+            "reused",
+            tag=synthetic_ntfs.MOUNT_POINT_TAG,
+            data=synthetic_ntfs.mount_point_data("C:\\m"),
+            allocated=True,
+        )
+        image.addLostRecord(302, "plain")
+        torn = image.addLostRecord(303, "torn", **link("C:\\torn"))
+        image.addClusterBitmap()
+
+        path = os.path.join(directory.name, "carve.img")
+        image.write(path)
+
+        # Break the fixup at the end of the first sector of a record
+        with open(path, "r+b") as image_file:
+            image_file.seek(torn + 510)
+            image_file.write(b"XX")
+
+        for use_mmap in (False, True):
+            with Navigator.Navigator(path, use_mmap=use_mmap, resolve_paths=True) as nav:
+                # The deleted entry of the MFT is carved, as sweeps skip it, but the live one is not
+                carved = [(offset, record.mft_entry, record.file_path) for offset, record in nav.carveEntries()]
+                self.assertEqual(
+                    [entry for entry in carved if entry[1] == 101], [(carved[0][0], 101, "\\deleted")]
+                )
+                self.assertEqual(carved[1:], [(free, 300, "\\lost"), (reused, 301, "\\reused")])
+                deleted = carved[0][0]
+
+                carved = [offset for offset, _ in nav.carveEntries(unallocated_only=True)]
+                self.assertEqual(carved, [deleted, free])
+
+                # A shard boundary inside a record
+                carved = [offset for offset, _ in nav.carveEntriesParallel(2, shard_size=free + 512)]
+                self.assertEqual(carved, [deleted, free, reused])
+
+        with Navigator.Navigator(path, tags=[synthetic_ntfs.MOUNT_POINT_TAG]) as nav:
+            self.assertEqual([offset for offset, _ in nav.carveEntries()], [reused])
+
 if __name__ == "__main__":
     unittest.main()
         
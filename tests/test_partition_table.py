@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import ImageSource, PartitionTable
+
+
+class TestPartitionTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.volume, _ = synthetic_ntfs.generate(os.path.join(cls.directory.name, "volume.img"), num_records=256)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def readTable(self, volumes, scheme, **options):
+        disk = os.path.join(self.directory.name, f"{scheme}.img")
+        offsets = synthetic_ntfs.make_disk(disk, volumes, scheme, **options)
+
+        with ImageSource.ImageSource(disk) as source:
+            table = PartitionTable.PartitionTable(source)
+            return table, offsets, table.getNTFSPartitions()
+
+    def test_mbr(self):
+        table, offsets, ntfs = self.readTable([self.volume, None, self.volume], "mbr")
+
+        self.assertEqual(table.scheme, "mbr")
+        self.assertEqual([partition["number"] for partition in table.partitions], [1, 5, 6])
+        self.assertEqual([partition["offset"] for partition in table.partitions], offsets)
+        self.assertEqual([partition["number"] for partition in ntfs], [1, 6])
+
+    def test_gpt(self):
+        for sector in (512, 4096):
+            table, offsets, ntfs = self.readTable([None, self.volume], "gpt", sector=sector)
+
+            self.assertEqual(table.scheme, "gpt")
+            self.assertEqual(table.sector_size, sector)
+            self.assertEqual([partition["offset"] for partition in table.partitions], offsets)
+            self.assertEqual(table.partitions[1]["name"], "volume2")
+            self.assertEqual(table.partitions[1]["type"], "ebd0a0a2-b9e5-4433-87c0-68b6b72699c7")
+            self.assertEqual([partition["number"] for partition in ntfs], [2])
+
+    def test_corrupt_gpt(self):
+        disk = os.path.join(self.directory.name, "corrupt.img")
+        synthetic_ntfs.make_disk(disk, [self.volume], "gpt")
+
+        # Entry counts, entry sizes and first entry LBAs written over the header in the second sector
+        fields = ((80, 4, 1025), (80, 4, 2**32 - 1), (84, 4, 0), (84, 4, 100), (84, 4, 192), (72, 8, 2**40))
+        for offset, width, value in fields:
+            with open(disk, "rb") as disk_file:
+                data = bytearray(disk_file.read())
+            data[512 + offset : 512 + offset + width] = value.to_bytes(width, "little")
+
+            corrupt = os.path.join(self.directory.name, "corrupt-copy.img")
+            with open(corrupt, "wb") as disk_file:
+                disk_file.write(data)
+
+            with ImageSource.ImageSource(corrupt) as source:
+                with self.assertRaises(Exception, msg=(offset, value)):
+                    PartitionTable.PartitionTable(source)
+
+    def test_volume(self):
+        with ImageSource.ImageSource(self.volume) as source:
+            table = PartitionTable.PartitionTable(source)
+
+        self.assertEqual(table.scheme, "none")
+        self.assertEqual(table.partitions[0]["offset"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import QueryClient, QueryServer
+
+
+class TestQueryServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        self.images = []
+        for number in range(2):
+            image = synthetic_ntfs.SyntheticImage(num_records=64)
+            image.addFile(
+                40, f"link{number}", tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data(f"C:\\{number}")
+            )
+            self.images.append(os.path.join(self.directory.name, f"image{number}.img"))
+            image.write(self.images[-1])
+
+    def startServer(self, max_images=QueryServer.QueryServer.DEFAULT_MAX_IMAGES):
+        server = QueryServer.QueryServer(os.path.join(self.directory.name, "server.sock"), max_images)
+        thread = threading.Thread(target=server.serveForever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            thread.join()
+
+        self.addCleanup(stop)
+        return server
+
+    def test_round_trip(self):
+        server = self.startServer()
+
+        with QueryClient.QueryClient(server.address) as client:
+            for number, image in enumerate(self.images * 2):
+                results = client.getEntries(image, [40, 3])
+                self.assertEqual(results[0]["Tag Value"], f"0x{synthetic_ntfs.SYMLINK_TAG:08X}")
+                self.assertEqual(results[0]["File Path"], f"\\link{number % 2}")
+                self.assertIn("error", results[1])
+
+            with self.assertRaises(Exception):
+                client.getEntries(os.path.join(self.directory.name, "missing.img"), [40])
+
+            # The connection is still usable after an error
+            self.assertEqual(client.getEntries(self.images[0], [40])[0]["File Name"], "link0")
+
+    def test_socket_path(self):
+        # A socket left at the path is replaced, but a file left there by mistake is not
+        self.startServer()
+        server = self.startServer()
+        with QueryClient.QueryClient(server.address) as client:
+            self.assertEqual(client.getEntries(self.images[0], [40])[0]["File Name"], "link0")
+
+        path = os.path.join(self.directory.name, "not-a-socket")
+        with open(path, "w") as regular_file:
+            regular_file.write("keep")
+
+        with self.assertRaises(Exception):
+            QueryServer.QueryServer(path)
+        with open(path) as regular_file:
+            self.assertEqual(regular_file.read(), "keep")
+
+    def test_eviction(self):
+        server = self.startServer(max_images=1)
+
+        # An image in use by another request is retired by the eviction instead of being closed
+        image = server._QueryServer__acquire(self.images[0])
+        server.handleRequest({"file": self.images[1], "entries": [40]})
+        self.assertTrue(image["retired"])
+
+        with image["lock"]:
+            self.assertEqual(image["navigator"].getEntry(40)["file_name"], "link0")
+
+        # The last request using it closes it
+        server._QueryServer__release(image)
+        with self.assertRaises(ValueError):
+            image["navigator"].getEntry(40)
+
+        # The evicted image is opened again by the next request
+        results = server.handleRequest({"file": self.images[0], "entries": [40]})["results"]
+        self.assertEqual(results[0]["File Name"], "link0")
+
+
+if __name__ == "__main__":
+    unittest.main()
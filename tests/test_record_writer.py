@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import CsvWriter, JsonlWriter, ParquetWriter, RecordWriter
+
+INFO = {
+    "Tag Value": "0xA000000C",
+    "Tag Identity": "IO_REPARSE_TAG_SYMLINK",
+    "Tag Desctiption": "Used for symbolic link support.",
+    "File Name": "link",
+    "MFT Entry": 31,
+    "Substitute Name": "\\??\\C:\\target",
+}
+
+
+class TestRecordWriter(unittest.TestCase):
+    def test_jsonl(self):
+        stream = io.StringIO()
+        with RecordWriter.RecordWriter.create("jsonl", stream) as writer:
+            self.assertIsInstance(writer, JsonlWriter.JsonlWriter)
+            writer.write(INFO)
+            writer.writeError(32, Exception("[-] ERROR: File is not a reparse point"))
+
+        rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(rows[0]["Tag Description"], "Used for symbolic link support.")
+        self.assertEqual(rows[0]["MFT Entry"], 31)
+        self.assertEqual(rows[1], {"MFT Entry": 32, "Error": "[-] ERROR: File is not a reparse point"})
+
+    def test_csv_batches(self):
+        stream = io.StringIO(newline="")
+        writer = CsvWriter.CsvWriter(stream, columns=["MFT Entry", "File Name"])
+        writer.BATCH_SIZE = 2
+
+        writer.writeAll([INFO] * 3)
+
+        # Two records fill a batch and are written before the writer is closed
+        self.assertEqual(stream.getvalue().splitlines(), ["MFT Entry,File Name", "31,link", "31,link"])
+
+        writer.close()
+        self.assertEqual(len(stream.getvalue().splitlines()), 4)
+
+    @unittest.skipIf(ParquetWriter.pa is None, "pyarrow is not installed")
+    def test_parquet(self):
+        stream = io.BytesIO()
+        with ParquetWriter.ParquetWriter(stream) as writer:
+            writer.writeAll([INFO] * 3)
+
+        stream.seek(0)
+        table = ParquetWriter.pq.read_table(stream)
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column("MFT Entry").to_pylist(), [31, 31, 31])
+        self.assertEqual(table.column("Tag Description").to_pylist()[0], "Used for symbolic link support.")
+
+        # Offsets and other numbers are integer columns too
+        stream = io.BytesIO()
+        columns = ("Partition", "Partition Offset", "Record Offset") + RecordWriter.RecordWriter.COLUMNS
+        with ParquetWriter.ParquetWriter(stream, columns=columns) as writer:
+            writer.write({"Partition": 2, "Partition Offset": 1048576, "Record Offset": 8 << 32, **INFO})
+
+        stream.seek(0)
+        table = ParquetWriter.pq.read_table(stream)
+        for column, value in (("Partition", 2), ("Partition Offset", 1048576), ("Record Offset", 8 << 32)):
+            self.assertTrue(ParquetWriter.pa.types.is_int64(table.schema.field(column).type), column)
+            self.assertEqual(table.column(column).to_pylist(), [value])
+
+
+if __name__ == "__main__":
+    unittest.main()
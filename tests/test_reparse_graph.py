@@ -0,0 +1,132 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import Navigator, ReparseGraph
+
+
+def symlink(name, parent, target, relative=False):
+    return dict(
+        name=name, parent=parent, tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data(target, relative)
+    )
+
+
+def junction(name, parent, target):
+    return dict(
+        name=name,
+        parent=parent,
+        flags=3,
+        tag=synthetic_ntfs.MOUNT_POINT_TAG,
+        data=synthetic_ntfs.mount_point_data(target),
+    )
+
+
+class TestReparseGraph(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        root = synthetic_ntfs.ROOT_ENTRY
+        cls.files = {
+            64: dict(name="Users", parent=root, flags=3),
+            65: dict(name="Data", parent=root, flags=3),
+            66: dict(name="bob", parent=64, flags=3),
+            67: dict(name="Documents", parent=66, flags=3),
+            68: dict(name="notes.txt", parent=66),
+            69: dict(name="L1", parent=root, flags=3),
+            70: dict(name="L2", parent=root, flags=3),
+            80: junction("docs", root, "C:\\Users\\bob\\Documents"),
+            81: symlink("bob", 65, "..\\Users\\bob", relative=True),
+            82: symlink("chain", 69, "C:\\DOCS"),
+            83: symlink("deep", 69, "C:\\Data\\bob\\notes.txt"),
+            84: symlink("loopA", 69, "C:\\L1\\loopB"),
+            85: symlink("loopB", 69, "C:\\L1\\loopA\\x"),
+            86: symlink("self", 69, "C:\\L1\\self\\sub"),
+            87: symlink("into", 70, "C:\\L1\\loopA"),
+            88: symlink("dangling", 70, "C:\\Users\\alice"),
+            89: symlink("other", 70, "D:\\stuff"),
+            90: symlink("via", 70, "C:\\L2\\other\\x"),
+            91: junction("unc", 70, "UNC\\server\\share"),
+        }
+
+        cls.directory = tempfile.TemporaryDirectory()
+        image = synthetic_ntfs.SyntheticImage(num_records=128)
+        for entry, spec in cls.files.items():
+            image.addFile(entry, **spec)
+        image.addDirectoryIndexes()
+
+        cls.image = os.path.join(cls.directory.name, "links.img")
+        image.write(cls.image)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.navigator = Navigator.Navigator(self.image, resolve_paths=True)
+        self.addCleanup(self.navigator.close)
+        self.graph = ReparseGraph.ReparseGraph(self.navigator)
+
+    def test_list_directory(self):
+        self.assertEqual(self.navigator.listDirectory(66), {"Documents": 67, "notes.txt": 68})
+        self.assertEqual(
+            set(self.navigator.listDirectory(synthetic_ntfs.ROOT_ENTRY)), {"Users", "Data", "L1", "L2", "docs"}
+        )
+
+    def test_final_target(self):
+        self.assertEqual(len(self.graph), 12)
+        self.assertEqual(self.graph.getFinalTarget(80), ("resolved", "C:\\Users\\bob\\Documents", 67))
+        self.assertEqual(self.graph.getFinalTarget(81), ("resolved", "C:\\Users\\bob", 66))
+        self.assertEqual(self.graph.getFinalTarget(88), ("dangling", "C:\\Users\\alice", None))
+        self.assertEqual(self.graph.getFinalTarget(89), ("external", "D:\\stuff", None))
+        self.assertEqual(self.graph.getFinalTarget(91), ("external", "\\\\server\\share", None))
+        self.assertRaises(Exception, self.graph.getFinalTarget, 68)
+
+    def test_chains(self):
+        # Links are followed wherever they are in the target path, and names match in any case
+        self.assertEqual(self.graph.getFinalTarget(82), ("resolved", "C:\\Users\\bob\\Documents", 67))
+        self.assertEqual(self.graph.getChain(82), [82, 80])
+        self.assertEqual(self.graph.getFinalTarget(83), ("resolved", "C:\\Users\\bob\\notes.txt", 68))
+        self.assertEqual(self.graph.getChain(83), [83, 81])
+        self.assertEqual(self.graph.getFinalTarget(90), ("external", "D:\\stuff\\x", None))
+
+    def test_loops(self):
+        self.assertEqual(self.graph.getLoops(), [84, 85, 86, 87])
+        self.assertEqual(self.graph.getChain(87), [87, 84, 85, 84])
+        self.assertEqual(self.graph.getFinalTarget(86)[0], "loop")
+
+    def test_long_chain(self):
+        # Each link points to the next, so only the links at most MAX_HOPS from the end resolve
+        count = 1000
+        first = 100
+        image = synthetic_ntfs.SyntheticImage(num_records=2048)
+        image.addFile(first - 1, "Chain", flags=3)
+        for number in range(count):
+            target = f"C:\\Chain\\link{number + 1}" if number + 1 < count else "C:\\Users"
+            image.addFile(first + number, **symlink(f"link{number}", first - 1, target))
+
+        path = os.path.join(self.directory.name, "chain.img")
+        image.write(path)
+
+        with Navigator.Navigator(path, resolve_paths=True) as nav:
+            graph = ReparseGraph.ReparseGraph(nav)
+
+        limit = first + count - ReparseGraph.ReparseGraph.MAX_HOPS
+        self.assertEqual(graph.getLoops(), list(range(first, limit)))
+        self.assertEqual(graph.getFinalTarget(limit)[0], "dangling")
+        self.assertEqual(len(graph.getChain(limit)), ReparseGraph.ReparseGraph.MAX_HOPS)
+
+    def test_redirects_into(self):
+        self.assertEqual(self.graph.getRedirectsInto("C:\\Users"), [80, 81, 82, 83, 88])
+        self.assertEqual(self.graph.getRedirectsInto("\\users\\BOB\\documents"), [80, 82])
+        self.assertEqual(self.graph.getRedirectsInto("C:\\Data"), [])
+        self.assertEqual(self.graph.getRedirectsInto("D:\\stuff"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import FixupBatch, Navigator, ReparsePrefilter
+
+
+class TestReparsePrefilter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        image = synthetic_ntfs.SyntheticImage(num_records=256, fill=True)
+        image.addFile(100, "link", tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data("C:\\target"))
+        image.addFile(101, "mount", tag=synthetic_ntfs.MOUNT_POINT_TAG, data=synthetic_ntfs.mount_point_data("C:\\m"))
+        image.addFile(
+            102,
+            "cloud",
+            tag=synthetic_ntfs.CLOUD_TAG,
+            data=synthetic_ntfs.cloud_data("0123456789ABCDEF"),
+            nonresident=True,
+        )
+        image.addFile(103, "extended", tag=synthetic_ntfs.MOUNT_POINT_TAG, data=b"", extension=200)
+        image.addFile(104, "deleted", tag=synthetic_ntfs.SYMLINK_TAG, data=b"", flags=0)
+        image.addFile(105, "directory", flags=3)
+
+        handle, cls.image = tempfile.mkstemp(suffix=".img")
+        os.close(handle)
+        image.write(cls.image)
+
+        with Navigator.Navigator(cls.image) as nav:
+            cls.batch = FixupBatch.FixupBatch(nav.readRawEntries(0, nav.getEntryCount()), nav.bytes_per_entry)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.image)
+
+    def check_filter(self, use_numpy):
+        prefilter = ReparsePrefilter.ReparsePrefilter(use_numpy=use_numpy)
+        self.assertEqual(prefilter.filter(self.batch), [100, 101, 102, 103])
+
+        # Reparse points outside the entry survive, as their tag is not stored in it
+        prefilter = ReparsePrefilter.ReparsePrefilter([synthetic_ntfs.SYMLINK_TAG], use_numpy=use_numpy)
+        self.assertEqual(prefilter.filter(self.batch), [100, 102, 103])
+
+        prefilter = ReparsePrefilter.ReparsePrefilter(use_numpy=use_numpy, in_use_only=False)
+        self.assertEqual(prefilter.filter(self.batch), [100, 101, 102, 103, 104])
+
+    def test_python_filter(self):
+        self.check_filter(use_numpy=False)
+
+    @unittest.skipIf(ReparsePrefilter.np is None, "NumPy is not installed")
+    def test_numpy_filter(self):
+        self.check_filter(use_numpy=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
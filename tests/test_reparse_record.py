@@ -0,0 +1,52 @@
+import os
+import pickle
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import ReparseRecord
+
+
+class TestReparseRecord(unittest.TestCase):
+    def makeRecord(self):
+        name = "C:\\target".encode("utf-16-le")
+        header = (0).to_bytes(2, "little") + len(name).to_bytes(2, "little")
+        header += len(name).to_bytes(2, "little") + len(name).to_bytes(2, "little")
+        data = header + (0).to_bytes(4, "little") + name + name
+
+        return ReparseRecord.ReparseRecord(0xA000000C, data, "link".encode("utf-16-le"), 5, 5, 31)
+
+    def test_dictionary_view(self):
+        record = self.makeRecord()
+
+        self.assertEqual(record["reparse_tag"], b"\x0c\x00\x00\xa0")
+        self.assertEqual(record["file_name"], "link")
+        self.assertEqual(record["mft_entry"], 31)
+        self.assertNotIn("file_path", record)
+        self.assertEqual(
+            list(record),
+            ["reparse_tag", "reparse_data", "file_name", "parent_entry", "parent_sequence", "mft_entry"],
+        )
+
+        record["file_path"] = "\\link"
+        self.assertEqual(dict(record)["file_path"], "\\link")
+
+    def test_lazy_info(self):
+        record = self.makeRecord()
+
+        self.assertEqual(record.info["Substitute Name"], "C:\\target")
+        self.assertIs(record.info, record.info)
+
+    def test_round_trips(self):
+        record = self.makeRecord()
+
+        self.assertEqual(ReparseRecord.ReparseRecord.fromDict(dict(record)), record)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+
+if __name__ == "__main__":
+    unittest.main()
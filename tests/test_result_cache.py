@@ -0,0 +1,165 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import Navigator, ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache.ResultCache(os.path.join(self.directory.name, "cache.sqlite"), max_entries=2)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_entry_round_trip(self):
+        result = {"reparse_tag": b"\x0c\x00\x00\xa0", "reparse_data": b"\x00\x01", "file_name": "link"}
+        self.cache.putEntry("image", 31, result)
+        self.cache.putEntry("image", 60, None, "[-] ERROR: File is not a reparse point")
+
+        self.assertEqual(self.cache.getEntry("image", 31), result)
+        self.assertIsNone(self.cache.getEntry("image", 32))
+        with self.assertRaises(Exception):
+            self.cache.getEntry("image", 60)
+
+    def test_eviction(self):
+        self.cache.EVICT_INTERVAL = 1
+        for entry in range(5):
+            self.cache.putEntry("image", entry, {"file_name": str(entry)})
+
+        self.assertIsNone(self.cache.getEntry("image", 0))
+        self.assertEqual(self.cache.getEntry("image", 4), {"file_name": "4"})
+
+    def test_batched_puts(self):
+        self.cache.max_entries = 10
+        self.cache.putEntries("image", [(1, {"file_name": "1"}, None), (2, None, "[-] ERROR: Invalid entry")])
+        self.cache.putEntries("image", [])
+
+        self.assertEqual(self.cache.getEntry("image", 1), {"file_name": "1"})
+        with self.assertRaises(Exception):
+            self.cache.getEntry("image", 2)
+
+    def test_batched_gets(self):
+        self.cache.max_entries = 10
+        self.cache.putEntries("image", [(1, {"file_name": "1"}, None), (2, None, "[-] ERROR: Invalid entry")])
+
+        self.assertEqual(
+            self.cache.getEntries("image", [1, 2, 3, 1]),
+            {1: ({"file_name": "1"}, None), 2: (None, "[-] ERROR: Invalid entry")},
+        )
+        self.assertEqual(self.cache.getEntries("other", [1]), {})
+
+    def test_shared_database(self):
+        self.cache.max_entries = 10
+        self.cache.putGeometry("image", "image.img", {"bytes_per_cluster": 4096})
+        self.cache.putEntry("image", 1, {"file_name": "1"})
+
+        # Lookups leave no write transaction open, so other processes can still write
+        other = sqlite3.connect(self.cache.cache_path, timeout=0)
+        self.addCleanup(other.close)
+        for lookUp in (
+            lambda: self.cache.getGeometry("image"),
+            lambda: self.cache.getEntry("image", 1),
+            lambda: self.cache.getEntries("image", [1]),
+            lambda: self.cache.putEntries("image", []),
+        ):
+            lookUp()
+            other.execute("INSERT OR REPLACE INTO entries VALUES ('other', 1, NULL, 'error', NULL, 0)")
+            other.commit()
+
+    def test_image_eviction(self):
+        self.cache.max_images = 1
+        self.cache.EVICT_INTERVAL = 1
+        self.cache.putGeometry("old", "old.img", {"bytes_per_cluster": 4096})
+        self.cache.putEntry("old", 1, {"file_name": "1"})
+        self.cache.putGeometry("new", "new.img", {"bytes_per_cluster": 4096})
+        self.cache.putEntry("new", 2, {"file_name": "2"})
+
+        # The least recently used image is evicted with its entries
+        self.assertIsNone(self.cache.getGeometry("old"))
+        self.assertIsNone(self.cache.getEntry("old", 1))
+        self.assertEqual(self.cache.getGeometry("new"), {"bytes_per_cluster": 4096})
+        self.assertEqual(self.cache.getEntry("new", 2), {"file_name": "2"})
+
+    def test_segmented_image_key(self):
+        segments = []
+        for number in (1, 2):
+            segments.append(os.path.join(self.directory.name, f"split.{number:03d}"))
+            with open(segments[-1], "wb") as segment:
+                segment.write(b"\x00" * 512)
+
+        key = self.cache.getImageKey(segments, b"boot")
+        self.assertEqual(self.cache.getImageKey(segments, b"boot"), key)
+
+        # Modifying a later segment changes the key
+        stat = os.stat(segments[1])
+        os.utime(segments[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertNotEqual(self.cache.getImageKey(segments, b"boot"), key)
+
+
+class TestNavigatorCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = ResultCache.ResultCache(os.path.join(self.directory.name, "cache.sqlite"))
+        self.addCleanup(self.cache.close)
+
+        # Two versions of one volume, with link targets of the same length
+        self.images = []
+        for version, target in enumerate(("C:\\before", "C:\\after!")):
+            image = synthetic_ntfs.SyntheticImage(num_records=64)
+            image.addFile(40, "link", tag=synthetic_ntfs.SYMLINK_TAG, data=synthetic_ntfs.symlink_data(target))
+            self.images.append((os.path.join(self.directory.name, f"version{version}.img"), target))
+            image.write(self.images[-1][0])
+
+        self.path = os.path.join(self.directory.name, "volume.img")
+
+    def copyVersion(self, version, keep_mtime=False):
+        stat = os.stat(self.path) if keep_mtime else None
+        shutil.copyfile(self.images[version][0], self.path)
+        if keep_mtime:
+            os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        else:
+            os.utime(self.path, ns=(os.stat(self.path).st_atime_ns, os.stat(self.path).st_mtime_ns + 10**9))
+
+    def lookUp(self):
+        with Navigator.Navigator(self.path, cache=self.cache) as nav:
+            record = nav.getEntry(40)
+            self.assertEqual(nav.getEntries([40])[0]["reparse_data"], record["reparse_data"])
+            with self.assertRaises(Exception):
+                nav.getEntry(3)
+
+            return record["reparse_data"]
+
+    def test_navigator_cache(self):
+        before = synthetic_ntfs.symlink_data(self.images[0][1])
+        after = synthetic_ntfs.symlink_data(self.images[1][1])
+
+        self.copyVersion(0)
+        self.assertEqual(self.lookUp(), before)
+
+        # A hit returns the cached lookup, even though the image was changed behind the cache's back
+        self.copyVersion(1, keep_mtime=True)
+        self.assertEqual(self.lookUp(), before)
+
+        # Invalidating the image drops its lookups
+        self.cache.invalidate(self.path)
+        self.assertEqual(self.lookUp(), after)
+
+        # A modified image gets a new key, so its stale lookups are never returned
+        self.copyVersion(0)
+        self.assertEqual(self.lookUp(), before)
+
+if __name__ == "__main__":
+    unittest.main()
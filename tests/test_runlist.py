@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import Runlist
+
+
+class TestRunlist(unittest.TestCase):
+    def test_parse_fragmented_runlist(self):
+        # 16 clusters at LCN 0x100, 4 sparse clusters, then 8 clusters 0x20 before the first run
+        runlist = Runlist.Runlist(bytes([0x21, 0x10, 0x00, 0x01, 0x01, 0x04, 0x11, 0x08, 0xE0, 0x00]))
+
+        self.assertEqual(len(runlist), 28)
+        self.assertEqual(list(runlist.extents()), [(0, 0x100, 16), (16, -1, 4), (20, 0xE0, 8)])
+        self.assertEqual(runlist[0], 0x100)
+        self.assertEqual(runlist[15], 0x10F)
+        self.assertEqual(runlist[17], Runlist.Runlist.SPARSE)
+        self.assertEqual(runlist[27], 0xE7)
+
+    def test_lookup_out_of_range(self):
+        runlist = Runlist.Runlist(bytes([0x11, 0x02, 0x10, 0x00]))
+
+        with self.assertRaises(IndexError):
+            runlist.lookup(2)
+
+    def test_run_lengths(self):
+        # A length with its high bit set is a long run, not a negative one
+        runlist = Runlist.Runlist(bytes([0x11, 0x80, 0x10, 0x00]))
+        self.assertEqual(list(runlist.extents()), [(0, 0x10, 0x80)])
+
+        # Runs without any clusters are corrupt
+        for raw in (bytes([0x11, 0x00, 0x10, 0x00]), bytes([0x10, 0x10, 0x00])):
+            with self.assertRaises(Exception, msg=raw.hex()):
+                Runlist.Runlist(raw)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import os
+import pickle
+import sys
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from src.parse_reparsepoint import Interpreter, Stats
+
+
+class TestStats(unittest.TestCase):
+    def test_counters_and_hooks(self):
+        stats = Stats.Stats()
+        events = []
+        stats.addHook(lambda kind, name, value: events.append((kind, name, value)))
+
+        stats.count("read_calls")
+        stats.count("bytes_read", 4096)
+        stats.time("read", 3e-6)
+
+        self.assertEqual(stats.counters["read_calls"], 1)
+        self.assertEqual(stats.counters["bytes_read"], 4096)
+        self.assertEqual(events, [("count", "read_calls", 1), ("count", "bytes_read", 4096), ("time", "read", 3e-6)])
+
+    def test_percentiles(self):
+        stats = Stats.Stats()
+        for _ in range(99):
+            stats.time("parse", 3e-6)
+        stats.time("parse", 1e-3)
+
+        self.assertEqual(stats.percentile("parse", 0.5), 4e-6)
+        self.assertGreaterEqual(stats.percentile("parse", 1.0), 1e-3)
+        self.assertIsNone(stats.percentile("fixup", 0.5))
+
+    def test_merge_snapshot(self):
+        stats = Stats.Stats()
+        stats.count("records_parsed", 2)
+        events = []
+        stats.addHook(lambda kind, name, value: events.append((kind, name, value)))
+
+        # Worker processes count into empty stats of their own
+        worker = Stats.Stats()
+        worker.count("records_parsed", 3)
+        worker.time("parse", 3e-6)
+        worker.time("parse", 3e-6)
+        stats.merge(worker.snapshot())
+
+        self.assertEqual(stats.counters["records_parsed"], 5)
+        self.assertEqual(stats.timings["parse"]["count"], 2)
+
+        # The hooks are given the merged counts, and the timings by their bucket
+        self.assertEqual(events, [("count", "records_parsed", 3), ("time", "parse", 4e-6), ("time", "parse", 4e-6)])
+
+    def test_pickle(self):
+        stats = Stats.Stats()
+        stats.addHook(lambda kind, name, value: None)
+        stats.count("records_parsed", 2)
+        stats.time("parse", 1e-5)
+
+        copy = pickle.loads(pickle.dumps(stats))
+        self.assertEqual(copy.counters, stats.counters)
+        self.assertEqual(copy.timings, stats.timings)
+
+    def test_summary_rate(self):
+        stats = Stats.Stats()
+        stats.count("records_parsed", 10)
+        stats.count("records_filtered", 980)
+        stats.count("records_invalid", 10)
+        stats.started -= 1.0
+
+        stream = io.StringIO()
+        stats.printSummary(stream)
+        rate = int(stream.getvalue().split("records per second:")[1].split()[0])
+
+        # Records dropped by the prefilter or found invalid were scanned too
+        self.assertGreater(rate, 500)
+        self.assertLessEqual(rate, 1000)
+
+    def test_interpreter_decode_failures(self):
+        stats = Stats.Stats()
+        data = {"reparse_tag": (0xA000000C).to_bytes(4, "little"), "reparse_data": b"\x00", "file_name": "link"}
+        Interpreter.Interpreter(data, stats).resolveAllInfo()
+
+        self.assertEqual(stats.counters["decode_failures"], 1)
+        self.assertEqual(stats.timings["interpret"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
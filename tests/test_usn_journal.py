@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Allow importing from parent directory
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import synthetic_ntfs
+from src.parse_reparsepoint import Navigator, UsnJournal
+
+
+class TestUsnJournal(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.changes = [
+            (100 + i, UsnJournal.UsnJournal.REASON_FILE_CREATE if i % 3 else 0x2, f"file{i}") for i in range(200)
+        ]
+        cls.changes.append((64, UsnJournal.UsnJournal.REASON_RENAME_NEW_NAME, "dir", 0x10))
+
+        image = synthetic_ntfs.SyntheticImage(num_records=512)
+        cls.usns, cls.next_usn = image.addUsnJournal(cls.changes, journal_id=7, trimmed_clusters=3)
+
+        handle, cls.image = tempfile.mkstemp(suffix=".img")
+        os.close(handle)
+        image.write(cls.image)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.image)
+
+    def test_info(self):
+        with Navigator.Navigator(self.image) as nav:
+            journal = UsnJournal.UsnJournal(nav)
+
+        self.assertEqual(journal.journal_id, 7)
+        self.assertEqual(journal.lowest_valid_usn, 3 * 4096)
+        self.assertEqual(journal.next_usn, self.next_usn)
+
+    def test_records(self):
+        with Navigator.Navigator(self.image) as nav:
+            journal = UsnJournal.UsnJournal(nav)
+            records = list(journal.iterRecords())
+            later = list(journal.iterRecords(self.usns[150]))
+
+        # The records span several pages of the journal
+        self.assertGreater(self.next_usn - self.usns[0], 4096)
+        self.assertEqual([record["usn"] for record in records], self.usns)
+        self.assertEqual([record["entry"] for record in records], [change[0] for change in self.changes])
+        self.assertEqual(records[1]["file_name"], "file1")
+        self.assertEqual([record["usn"] for record in later], self.usns[150:])
+
+    def test_changed_entries(self):
+        with Navigator.Navigator(self.image) as nav:
+            entries, directory_renamed = UsnJournal.UsnJournal(nav).getChangedEntries(self.usns[0])
+
+        self.assertEqual(entries, {100 + i for i in range(200) if i % 3} | {64})
+        self.assertTrue(directory_renamed)
+
+
+if __name__ == "__main__":
+    unittest.main()